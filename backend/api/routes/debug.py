@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse, Response
+
+from backend.config import settings
+from backend.services.debug_store import ARTIFACT_PENDING, ARTIFACT_READY, debug_store
+
+router = APIRouter()
+
+
+@router.get("/debug/{artifact_id}")
+async def get_debug_artifact(artifact_id: str):
+    """
+    Debug overlays are rendered after the identify response is sent.
+    A request for one still rendering waits briefly, then gets a 202.
+    """
+
+    status, data = await debug_store.get(
+        artifact_id,
+        wait=settings.DEBUG_WAIT_SECONDS,
+    )
+
+    if status == ARTIFACT_READY:
+        return Response(
+            content=data,
+            media_type="image/jpeg",
+            headers={"Cache-Control": "private, max-age=60"},
+        )
+
+    if status == ARTIFACT_PENDING:
+        return JSONResponse(
+            status_code=202,
+            content={"status": "rendering"},
+            headers={"Retry-After": "1"},
+        )
+
+    raise HTTPException(status_code=404, detail="Debug image not found or expired")
@@ -1,8 +1,10 @@
 import time
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 
 from backend.dependencies import get_db, get_vision
+from backend.services.warmup import warmup_state
 
 router = APIRouter()
 
@@ -24,9 +26,31 @@ async def health_check(db=Depends(get_db), vision=Depends(get_vision)):
         "timestamp": time.time(),
         "database": "connected" if db.is_connected() else "disconnected",
         "model": "loaded" if vision.is_loaded() else "loading",
+        "ready": warmup_state.ready,
     }
 
 
+@router.get("/health/live")
+async def liveness():
+    # the process is up and the event loop answers; says nothing about warm-up
+    return {"status": "alive", "timestamp": time.time()}
+
+
+@router.get("/health/ready")
+async def readiness(vision=Depends(get_vision)):
+    """503 until startup warm-up has run, so the load balancer holds traffic back."""
+
+    ready = warmup_state.ready and vision.is_loaded()
+
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "warming",
+            "warmup": warmup_state.as_dict(),
+        },
+    )
+
+
 @router.get("/supabase/ping")
 async def supabase_ping(db=Depends(get_db)):
     count = await db.get_species_count()
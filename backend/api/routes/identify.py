@@ -1,29 +1,187 @@
-from unittest import result
+import asyncio
+import json
+import time
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Request, UploadFile
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 
-from backend.dependencies import get_db, get_vision
+from backend.config import settings
+from backend.dependencies import get_db, get_job_queue, get_vision
 from backend.models import IdentificationResponse
-from backend.services.identify_service import identify_flower_service
+
+# the identify pipeline (cv2, numpy, PIL, extractors) is imported inside
+# the handlers so importing the app stays cheap; the startup warm-up
+# (services/warmup.py) imports and exercises it in the background
 
 router = APIRouter()
 
+
+@router.get("/identify/hints")
+async def get_identify_hints(response: Response):
+    from backend.services.identify_service import WORKING_SIZE_HEADER, identify_hints
+    from backend.services.image_processing_service import WORKING_MAX_SIDE
+
+    response.headers[WORKING_SIZE_HEADER] = str(WORKING_MAX_SIDE)
+    return identify_hints()
+
+
 @router.post("/identify", response_model=IdentificationResponse)
 async def identify_flower(
     request: Request,
-    image: UploadFile = File(...),
+    response: Response,
+    image: Optional[UploadFile] = File(None),
     use_cache: bool = True,
+    image_hash: Optional[str] = Header(default=None, alias="X-Image-Hash"),
     db=Depends(get_db),
     vision=Depends(get_vision),
 ):
-    result = await identify_flower_service(
-        image=image,
-        use_cache=request.query_params.get("use_cache", True),
-        db=db,
-        vision=vision,
-        request=request,
+    from backend.services.admission import DEGRADED_HEADER
+    from backend.services.identify_service import (
+        WORKING_SIZE_HEADER,
+        identify_flower_service,
+        lookup_cached_identification,
     )
+    from backend.services.image_processing_service import WORKING_MAX_SIDE
+
+    response.headers[WORKING_SIZE_HEADER] = str(WORKING_MAX_SIDE)
+
+    if image is None:
+        # hash-only request: answer from cache or ask for the upload
+        if not image_hash:
+            raise HTTPException(status_code=400, detail="No file uploaded")
+
+        result = await lookup_cached_identification(
+            image_hash=image_hash,
+            db=db,
+            request=request,
+        )
+
+        if result is None:
+            raise HTTPException(
+                status_code=404,
+                detail="Unknown image hash; upload the image to identify it.",
+            )
+    else:
+        result = await identify_flower_service(
+            image=image,
+            use_cache=use_cache,
+            db=db,
+            vision=vision,
+            request=request,
+            admission=getattr(request.app.state, "identify_admission", None),
+        )
+
+    degraded = getattr(request.state, "degraded_pose_mode", "")
+    if degraded:
+        response.headers[DEGRADED_HEADER] = f"pose={degraded}"
+
+    trace = getattr(request.state, "trace", None)
+    if settings.SERVER_TIMING and trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
 
     return result
 
-print("🚀 ROUTE RESULT:", result)
\ No newline at end of file
+@router.post("/identify/batch")
+async def identify_flower_batch(
+    request: Request,
+    images: List[UploadFile] = File(...),
+    use_cache: bool = True,
+    db=Depends(get_db),
+    vision=Depends(get_vision),
+):
+    from backend.services.identify_service import WORKING_SIZE_HEADER, identify_batch_service
+    from backend.services.image_processing_service import WORKING_MAX_SIDE
+    from backend.services.preprocess_service import read_upload
+
+    if len(images) > settings.MAX_BATCH_IMAGES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many images. Maximum per batch is {settings.MAX_BATCH_IMAGES}.",
+        )
+
+    # read everything while the form's spooled files are still open;
+    # per-image validation errors are reported in the stream, not raised
+    payloads = []
+    for image in images:
+        try:
+            payloads.append(await read_upload(image))
+        except HTTPException as e:
+            payloads.append(e)
+
+    async def ndjson():
+        async for record in identify_batch_service(
+            payloads=payloads,
+            use_cache=use_cache,
+            db=db,
+            vision=vision,
+            request=request,
+            admission=getattr(request.app.state, "identify_admission", None),
+        ):
+            yield json.dumps(record, default=str) + "\n"
+
+    return StreamingResponse(
+        ndjson(),
+        media_type="application/x-ndjson",
+        headers={WORKING_SIZE_HEADER: str(WORKING_MAX_SIDE)},
+    )
+
+@router.post("/identify/jobs", status_code=202)
+async def create_identify_job(
+    request: Request,
+    image: UploadFile = File(...),
+    use_cache: bool = True,
+    queue=Depends(get_job_queue),
+):
+    from backend.services.preprocess_service import read_upload
+
+    payload = await read_upload(image)
+
+    job_id, deduplicated = await asyncio.to_thread(queue.enqueue, payload, use_cache)
+
+    workers = getattr(request.app.state, "job_workers", None)
+    if workers is not None:
+        workers.notify()
+
+    return {
+        "job_id": job_id,
+        "deduplicated": deduplicated,
+        "status_url": str(request.url_for("get_identify_job", job_id=job_id)),
+    }
+
+
+@router.get("/identify/jobs/{job_id}")
+async def get_identify_job(
+    request: Request,
+    job_id: str,
+    wait: float = 0.0,
+    queue=Depends(get_job_queue),
+):
+    from backend.services.job_queue import JOB_DONE, JOB_FAILED
+
+    job = await asyncio.to_thread(queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # long-poll: re-check at least once a second until done or out of time
+    workers = getattr(request.app.state, "job_workers", None)
+    deadline = time.time() + min(max(wait, 0.0), settings.JOB_MAX_WAIT_SECONDS)
+
+    while job["status"] not in (JOB_DONE, JOB_FAILED) and time.time() < deadline:
+        remaining = min(deadline - time.time(), 1.0)
+        if workers is not None:
+            await workers.wait_for(job_id, remaining)
+        else:
+            await asyncio.sleep(remaining)
+        job = await asyncio.to_thread(queue.get, job_id)
+
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+        "status_code": job["status_code"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Node memory for the species embedding matrix as workers are added.
+
+Publishes a synthetic N x dim matrix with backend.services.embedding_store,
+then for each reader count starts that many processes which either
+attach the shared file (`shared`) or load their own copy (`private`, what
+every worker did before), score a query against every row so all pages
+are touched, and report their memory once all of them are loaded.
+With the shared store, total PSS should stay flat as readers are added.
+
+Linux only (smaps_rollup).
+
+Usage: python -m backend.benchmarks.embedding_share [--species 200000] [--dim 384]
+                                                   [--readers 1,2,4,8] [--out share.json]
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from backend.benchmarks.memory_report import memory_kb
+from backend.services.embedding_store import attach, publish
+
+
+MODES = ("private", "shared")
+
+
+def _reader(path: str, mode: str, barrier, results, done) -> None:
+    matrix = attach(path).matrix
+    if mode == "private":
+        matrix = np.array(matrix)
+
+    query = np.ones(matrix.shape[1], dtype=np.float32) / np.sqrt(matrix.shape[1])
+    best = int(np.argmax(matrix @ query))
+
+    # measure only once every reader has its matrix resident
+    barrier.wait()
+    results.put({"pid": os.getpid(), "best": best, **memory_kb(os.getpid())})
+    done.wait()
+
+
+def run_readers(path: str, mode: str, count: int) -> Dict[str, Any]:
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(count)
+    results = ctx.Queue()
+    done = ctx.Event()
+
+    procs = [ctx.Process(target=_reader, args=(path, mode, barrier, results, done)) for _ in range(count)]
+    for p in procs:
+        p.start()
+
+    readers = [results.get(timeout=300) for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+
+    return {
+        "mode": mode,
+        "readers": count,
+        "uss_mean_kb": round(sum(r["uss"] for r in readers) / count),
+        "rss_mean_kb": round(sum(r["rss"] for r in readers) / count),
+        "total_pss_kb": sum(r["pss"] for r in readers),
+    }
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--species", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--readers", default="1,2,4,8")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        print("❌ Needs Linux /proc/<pid>/smaps_rollup")
+        return 1
+
+    counts = [int(c) for c in args.readers.split(",") if c.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "embeddings.bin")
+
+        rng = np.random.default_rng(args.seed)
+        ids = [f"{i:08x}-0000-4000-8000-{i:012x}" for i in range(args.species)]
+        generation = publish(path, ids, rng.standard_normal((args.species, args.dim), dtype=np.float32))
+
+        size_mb = os.path.getsize(path) / 2**20
+        print(f"📦 {args.species} x {args.dim} matrix, {size_mb:.1f} MB (generation {generation})", file=sys.stderr)
+
+        rows = []
+        for mode in MODES:
+            for count in counts:
+                print(f"🚀 {mode}: {count} reader(s)...", file=sys.stderr)
+                rows.append(run_readers(path, mode, count))
+
+    print(f"\n{'mode':<10}{'readers':>8}{'USS/reader':>12}{'RSS/reader':>12}{'total PSS':>12}  (MB)")
+    for row in rows:
+        print(
+            f"{row['mode']:<10}{row['readers']:>8}{row['uss_mean_kb'] / 1024:>12.1f}"
+            f"{row['rss_mean_kb'] / 1024:>12.1f}{row['total_pss_kb'] / 1024:>12.1f}"
+        )
+
+    if args.out:
+        args.out.write_text(json.dumps({"species": args.species, "dim": args.dim, "matrix_mb": size_mb, "rows": rows}, indent=2))
+        print(f"\n✅ Wrote {args.out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Offline micro-benchmarks for every identify pipeline stage.
+
+Times process_upload, prepare_image, each trait extractor and
+rank_candidates separately and end to end on a fixture image folder,
+with median / p95 latency, Python-heap allocations and peak RSS.
+Without FIXTURE_DIR the fixtures are seeded synthetic scenes
+(services/synthetic_flowers.py) encoded as JPEGs in memory, so runs
+on any machine see the same inputs. Results are written as JSON; pass
+--baseline to flag regressions against an earlier run on the same
+fixtures. The reproductive stage is always timed past its pose
+confidence gate, so it measures the hotspot analysis rather than the
+early return.
+
+Usage: python -m backend.benchmarks.extractors [FIXTURE_DIR] [--count 6] [--seed 0] [--repeat 5]
+                                              [--out results.json] [--baseline old.json] [--threshold 0.15]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import mimetypes
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from fastapi import UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from backend.services.synthetic_flowers import corpus_scenes
+from backend.services.candidate_service import rank_candidates
+from backend.services.color_extractor import extract_color_traits
+from backend.services.image_processing_service import prepare_image
+from backend.services.pose_extractor import compute_pose_traits
+from backend.services.preprocess_service import process_upload
+from backend.services.reproductive_extractor import MIN_POSE_CONFIDENCE, extract_reproductive_traits
+from backend.services.shape_extractor import compute_shape_traits
+
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+STAGES = (
+    "process_upload",
+    "prepare_image",
+    "extract_pose_traits",
+    "extract_shape_traits",
+    "extract_color_traits",
+    "extract_reproductive_traits",
+    "rank_candidates",
+    "end_to_end",
+)
+
+# synthetic shortlist size for rank_candidates (search_by_traits returns up to ~50)
+CANDIDATE_COUNT = 50
+
+TRAIT_VALUES = {
+    "petal_count": list(range(3, 21)),
+    "petal_shape_outer": ["rounded", "oval", "pointed"],
+    "petal_shape_inner": ["none", "clustered"],
+    "petal_overlap": ["separate", "moderate", "layered"],
+    "petal_margin": ["smooth", "slightly_serrated", "ruffled"],
+    "bloom_openness": ["open", "partially_open", "closed"],
+    "petal_flow": ["radial", "cupped", "trumpet"],
+    "flower_size": ["small", "medium", "large"],
+}
+
+
+# =========================
+# FIXTURES
+# =========================
+
+def load_fixtures(folder: Path) -> List[Tuple[str, bytes]]:
+    return [
+        (p.name, p.read_bytes())
+        for p in sorted(folder.iterdir())
+        if p.suffix.lower() in IMAGE_SUFFIXES
+    ]
+
+
+def synthetic_fixtures(count: int, seed: int = 0) -> List[Tuple[str, bytes]]:
+    """Seeded synthetic scenes as JPEG bytes, like the written corpus."""
+
+    fixtures = []
+    for stem, scene in corpus_scenes(count, seed):
+        buffer = io.BytesIO()
+        scene.image.save(buffer, format="JPEG", quality=92)
+        fixtures.append((f"{stem}.jpg", buffer.getvalue()))
+    return fixtures
+
+
+def synthetic_candidates(count: int = CANDIDATE_COUNT, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"species-{i:03d}",
+            "scientific_name": f"Benchmarkia {i:03d}",
+            **{key: rng.choice(values) for key, values in TRAIT_VALUES.items()},
+        }
+        for i in range(count)
+    ]
+
+
+def _pose_hints(crop: Image.Image, pose: Dict[str, Any]) -> Dict[str, Any]:
+    clusters = pose.get("clusters") or []
+    centre_point = None
+    if clusters:
+        cx, cy = clusters[0]["centre"]
+        centre_point = (cx / 1000 * crop.width, cy / 1000 * crop.height)
+
+    return {
+        "centre_point": centre_point,
+        "centre_visible": bool(clusters),
+        "pose_confidence": pose.get("pose_confidence", 0.0),
+    }
+
+
+def _reproductive_hints(hints: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    `hints` pushed past the reproductive confidence gate. Most synthetic
+    poses fall below it, and the gated early return costs nothing, so
+    the stage is timed on the hotspot path it runs for confident poses.
+    """
+
+    return {
+        **hints,
+        "centre_visible": True,
+        "pose_confidence": max(hints["pose_confidence"], MIN_POSE_CONFIDENCE),
+    }
+
+
+def _upload(name: str, data: bytes) -> UploadFile:
+    content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    return UploadFile(
+        file=io.BytesIO(data),
+        filename=name,
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+# =========================
+# PIPELINE
+# =========================
+
+async def _run_pipeline(name: str, data: bytes, candidates: List[Dict[str, Any]], timings: Dict[str, List[float]]) -> None:
+    """
+    One image through every stage, timing each one into `timings`.
+    Runs inside the suite's event loop so process_upload is timed
+    without loop startup.
+    """
+
+    def timed(stage: str, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        result = fn()
+        timings[stage].append(time.perf_counter() - start)
+        return result
+
+    total_start = time.perf_counter()
+
+    upload = _upload(name, data)
+    start = time.perf_counter()
+    processed = await process_upload(upload)
+    timings["process_upload"].append(time.perf_counter() - start)
+
+    prepared = timed("prepare_image", lambda: prepare_image(processed.pil_image, processed.stats))
+
+    crop = prepared.cropped_flower
+
+    pose = timed("extract_pose_traits", lambda: compute_pose_traits(crop))
+    shape = timed("extract_shape_traits", lambda: compute_shape_traits(crop, pose))
+
+    pose_hints = _pose_hints(crop, pose)
+
+    timed("extract_color_traits", lambda: extract_color_traits(crop, pose_hints, processed.image_metadata))
+    reproductive = timed("extract_reproductive_traits", lambda: extract_reproductive_traits(crop, _reproductive_hints(pose_hints)))
+
+    traits = {**shape, **reproductive}
+    timed("rank_candidates", lambda: rank_candidates(candidates, traits))
+
+    timings["end_to_end"].append(time.perf_counter() - total_start)
+
+
+async def _allocations(name: str, data: bytes, candidates: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Per-stage traced peak and block count for one image (separate, untimed pass)."""
+
+    results: Dict[str, Dict[str, int]] = {}
+
+    def start_trace() -> Any:
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        return before
+
+    def stop_trace(stage: str, before: Any) -> None:
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+
+        diff = after.compare_to(before, "filename")
+        results[stage] = {
+            "peak_bytes": int(peak),
+            "blocks": int(sum(max(d.count_diff, 0) for d in diff)),
+        }
+
+    def traced(stage: str, fn: Callable[[], Any]) -> Any:
+        before = start_trace()
+        try:
+            return fn()
+        finally:
+            stop_trace(stage, before)
+
+    upload = _upload(name, data)
+    before = start_trace()
+    try:
+        processed = await process_upload(upload)
+    finally:
+        stop_trace("process_upload", before)
+
+    prepared = traced("prepare_image", lambda: prepare_image(processed.pil_image, processed.stats))
+    crop = prepared.cropped_flower
+    pose = traced("extract_pose_traits", lambda: compute_pose_traits(crop))
+    shape = traced("extract_shape_traits", lambda: compute_shape_traits(crop, pose))
+
+    hints = _pose_hints(crop, pose)
+    traced("extract_color_traits", lambda: extract_color_traits(crop, hints, processed.image_metadata))
+    reproductive = traced("extract_reproductive_traits", lambda: extract_reproductive_traits(crop, _reproductive_hints(hints)))
+    traced("rank_candidates", lambda: rank_candidates(candidates, {**shape, **reproductive}))
+
+    return results
+
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak // 1024) if sys.platform == "darwin" else int(peak)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+# =========================
+# SUITE
+# =========================
+
+async def _measure(
+    fixtures: List[Tuple[str, bytes]],
+    candidates: List[Dict[str, Any]],
+    repeat: int,
+    warmup: int,
+) -> Tuple[Dict[str, List[float]], int, Dict[str, List[Dict[str, int]]]]:
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    for name, data in fixtures[:warmup]:
+        await _run_pipeline(name, data, candidates, {stage: [] for stage in STAGES})
+
+    for _ in range(repeat):
+        for name, data in fixtures:
+            await _run_pipeline(name, data, candidates, timings)
+
+    rss_after_timing = _peak_rss_kb()
+
+    allocations: Dict[str, List[Dict[str, int]]] = {}
+    for name, data in fixtures:
+        for stage, record in (await _allocations(name, data, candidates)).items():
+            allocations.setdefault(stage, []).append(record)
+
+    return timings, rss_after_timing, allocations
+
+
+def run_suite(fixtures: List[Tuple[str, bytes]], repeat: int, warmup: int = 1, source: str = "") -> Dict[str, Any]:
+    candidates = synthetic_candidates()
+
+    # extractors print debug blocks; keep the report readable. One event
+    # loop for the whole suite.
+    with contextlib.redirect_stdout(io.StringIO()):
+        timings, rss_after_timing, allocations = asyncio.run(_measure(fixtures, candidates, repeat, warmup))
+
+    stages: Dict[str, Any] = {}
+    for stage in STAGES:
+        values = timings[stage]
+        entry: Dict[str, Any] = {
+            "runs": len(values),
+            "median_ms": round(statistics.median(values) * 1000, 3),
+            "p95_ms": round(_percentile(values, 0.95) * 1000, 3),
+            "mean_ms": round(statistics.mean(values) * 1000, 3),
+        }
+        if stage in allocations:
+            entry["alloc_peak_bytes"] = max(r["peak_bytes"] for r in allocations[stage])
+            entry["alloc_blocks"] = int(statistics.median(r["blocks"] for r in allocations[stage]))
+        stages[stage] = entry
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "pillow": Image.__version__,
+            "machine": platform.machine(),
+            "source": source,
+            "fixtures": [name for name, _ in fixtures],
+            "repeat": repeat,
+            "peak_rss_kb": rss_after_timing,
+        },
+        "stages": stages,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Stages whose median or p95 grew by more than `threshold` (fraction)."""
+
+    regressions = []
+
+    for stage, entry in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old:
+            continue
+
+        for key in ("median_ms", "p95_ms", "alloc_peak_bytes"):
+            if key not in entry or not old.get(key):
+                continue
+
+            change = (entry[key] - old[key]) / old[key]
+            if change > threshold:
+                regressions.append({
+                    "stage": stage,
+                    "metric": key,
+                    "baseline": old[key],
+                    "current": entry[key],
+                    "change": round(change, 3),
+                })
+
+    return regressions
+
+
+def _print_report(report: Dict[str, Any], regressions: Optional[List[Dict[str, Any]]]) -> None:
+    meta = report["meta"]
+    print(f"\n⏱️  Extractor benchmarks ({len(meta['fixtures'])} fixtures x {meta['repeat']}, peak RSS {meta['peak_rss_kb'] / 1024:.1f} MiB)")
+    print(f"{'stage':<30}{'median ms':>11}{'p95 ms':>10}{'peak KiB':>11}{'blocks':>9}")
+
+    for stage, entry in report["stages"].items():
+        peak = entry.get("alloc_peak_bytes")
+        blocks = entry.get("alloc_blocks")
+        print(
+            f"{stage:<30}{entry['median_ms']:>11}{entry['p95_ms']:>10}"
+            f"{'-' if peak is None else round(peak / 1024):>11}{'-' if blocks is None else blocks:>9}"
+        )
+
+    if regressions is None:
+        return
+
+    if not regressions:
+        print("\n✅ No regressions against baseline")
+        return
+
+    print(f"\n❌ {len(regressions)} regression(s):")
+    for r in regressions:
+        print(f"   {r['stage']} {r['metric']}: {r['baseline']} → {r['current']} (+{r['change'] * 100:.1f}%)")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fixtures", type=Path, nargs="?", default=None, help="image folder; defaults to synthetic scenes")
+    parser.add_argument("--count", type=int, default=6, help="synthetic scenes when no FIXTURE_DIR")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic corpus seed")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed fractional slowdown")
+    args = parser.parse_args(argv)
+
+    if args.fixtures is None:
+        fixtures = synthetic_fixtures(args.count, args.seed)
+        source = f"synthetic count={args.count} seed={args.seed}"
+    else:
+        fixtures = load_fixtures(args.fixtures)
+        source = str(args.fixtures)
+
+    if not fixtures:
+        print(f"❌ No fixture images in {args.fixtures or 'the synthetic corpus'}")
+        return 1
+
+    report = run_suite(fixtures, args.repeat, source=source)
+
+    regressions = None
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        baseline_source = baseline.get("meta", {}).get("source")
+        if baseline_source != source:
+            print(f"⚠️ Baseline fixtures ({baseline_source or 'unknown'}) differ from this run ({source})")
+        regressions = compare(report, baseline, args.threshold)
+        report["regressions"] = regressions
+
+    _print_report(report, regressions)
+
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2))
+        print(f"\n✅ Wrote {args.out}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Import-time profile for the API (cold start cost before the first request).
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters,
+takes the median self / cumulative time per module across runs and
+prints the slowest top-level packages plus the backend modules. Fails
+when the total exceeds --budget-ms or when a module listed in --forbid
+(heavy dependencies that should only load on first use) is imported.
+
+Usage: python -m backend.benchmarks.import_profile [--module backend.main] [--runs 5]
+                                                  [--budget-ms 600] [--top 15] [--out profile.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+# imported lazily (identify handlers, startup warm-up, client construction)
+DEFAULT_FORBID = "cv2,onnxruntime,supabase,unittest"
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+# =========================
+# PROFILE
+# =========================
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int, int]]:
+    """module -> (self us, cumulative us, depth) from -X importtime output."""
+
+    modules = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return modules
+
+
+def profile_once(module: str, env: Dict[str, str]) -> Dict[str, Tuple[int, int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return parse_importtime(proc.stderr)
+
+
+def profile(module: str, runs: int, env: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Median self / cumulative ms per module over `runs` cold imports."""
+
+    samples = [profile_once(module, env) for _ in range(runs)]
+
+    merged: Dict[str, Dict[str, Any]] = {}
+    for name in samples[0]:
+        rows = [s[name] for s in samples if name in s]
+        merged[name] = {
+            "self_ms": round(statistics.median(r[0] for r in rows) / 1000, 2),
+            "cumulative_ms": round(statistics.median(r[1] for r in rows) / 1000, 2),
+            "depth": rows[0][2],
+        }
+    return merged
+
+
+# =========================
+# REPORT
+# =========================
+
+def _print_table(title: str, rows: List[Tuple[str, Dict[str, Any]]]) -> None:
+    print(f"\n{title}")
+    print(f"{'module':<52}{'self ms':>10}{'cumul ms':>10}")
+    for name, row in rows:
+        print(f"{name:<52}{row['self_ms']:>10}{row['cumulative_ms']:>10}")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=600.0)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--forbid", default=DEFAULT_FORBID, help="comma-separated modules that must not load at import")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    # no credentials on purpose: importing the app must not need them
+    env = {k: v for k, v in os.environ.items() if k not in ("SUPABASE_URL", "SUPABASE_KEY", "HF_TOKEN")}
+
+    try:
+        modules = profile(args.module, max(args.runs, 1), env)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    total_ms = modules[args.module]["cumulative_ms"] if args.module in modules else 0.0
+
+    packages = sorted(
+        ((name, row) for name, row in modules.items() if "." not in name and name != args.module),
+        key=lambda item: item[1]["cumulative_ms"],
+        reverse=True,
+    )
+    backend = sorted(
+        ((name, row) for name, row in modules.items() if name.startswith("backend.")),
+        key=lambda item: item[1]["cumulative_ms"],
+        reverse=True,
+    )
+
+    _print_table(f"📦 Slowest packages importing {args.module} (median of {args.runs})", packages[:args.top])
+    _print_table("🧩 Backend modules", backend[:args.top])
+
+    forbid = [m.strip() for m in args.forbid.split(",") if m.strip()]
+    leaked = [m for m in forbid if m in modules]
+
+    print(f"\n⏱️  {args.module}: {total_ms:.0f}ms (budget {args.budget_ms:.0f}ms)")
+
+    if args.out:
+        args.out.write_text(json.dumps({
+            "module": args.module,
+            "runs": args.runs,
+            "total_ms": total_ms,
+            "budget_ms": args.budget_ms,
+            "leaked": leaked,
+            "modules": modules,
+        }, indent=2))
+        print(f"✅ Wrote {args.out}")
+
+    failed = False
+    if leaked:
+        print(f"❌ Imported eagerly: {', '.join(leaked)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"❌ Over budget by {total_ms - args.budget_ms:.0f}ms")
+        failed = True
+
+    if not failed:
+        print("✅ Within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Async load generator for throughput and tail-latency testing.
+
+Drives /identify, /search, /catalogue and /species/{id} with a weighted
+request mix, either as a closed model (N virtual users, each sending its
+next request when the previous one returns) or an open model (Poisson
+arrivals at a fixed rate, latency measured from the scheduled send time
+so a stalled server cannot hide its queueing). /identify replays an
+image folder. Reports throughput, latency percentiles and histograms,
+error rates and the server's per-stage Server-Timing breakdown.
+
+With --in-process the app is served through an ASGI transport using the
+local database and stub vision backend, so no server, network or
+Supabase project is needed.
+
+Usage: python -m backend.benchmarks.loadgen --images FIXTURE_DIR [--url http://localhost:8000 | --in-process]
+                                           [--model closed --concurrency 8 | --model open --rate 20]
+                                           [--mix identify=1,search=4,catalogue=3,species=2]
+                                           [--duration 30] [--warmup 5] [--use-cache] [--out results.json]
+
+/identify is sent with use_cache=false unless --use-cache is given: a
+small folder replayed for a whole run would otherwise be measured as
+cache hits.
+"""
+
+import argparse
+import asyncio
+import bisect
+import contextlib
+import json
+import mimetypes
+import os
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+
+ENDPOINTS = ("identify", "search", "catalogue", "species")
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+DEFAULT_MIX = "identify=1,search=4,catalogue=3,species=2"
+
+# upper bounds (ms) of the printed latency histogram
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+SEARCH_TERMS = ["rose", "lily", "daisy", "poppy", "iris", "tulip", "sunflower", "lotus"]
+COLOR_FILTERS = ["red", "yellow", "white", "pink", "purple", "blue", "orange"]
+SORTS = ["name", "popularity", "recent"]
+
+
+# =========================
+# RESULTS
+# =========================
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    latency: float
+    server_timing: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 400
+
+
+def parse_server_timing(header: Optional[str]) -> Dict[str, float]:
+    """`stage;dur=12.3, other;dur=4.5` -> {stage: ms}."""
+
+    timings: Dict[str, float] = {}
+    if not header:
+        return timings
+
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                try:
+                    timings[name] = timings.get(name, 0.0) + float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    last = len(sorted_values) - 1
+    return sorted_values[min(int(round(q * last)), last)]
+
+
+def _latency_summary(latencies_ms: List[float]) -> Dict[str, Any]:
+    values = sorted(latencies_ms)
+    if not values:
+        return {}
+
+    histogram = {f"<={bound}": 0 for bound in HISTOGRAM_BOUNDS_MS}
+    histogram[f">{HISTOGRAM_BOUNDS_MS[-1]}"] = 0
+    for v in values:
+        idx = bisect.bisect_left(HISTOGRAM_BOUNDS_MS, v)
+        key = f"<={HISTOGRAM_BOUNDS_MS[idx]}" if idx < len(HISTOGRAM_BOUNDS_MS) else f">{HISTOGRAM_BOUNDS_MS[-1]}"
+        histogram[key] += 1
+
+    return {
+        "mean_ms": round(statistics.fmean(values), 2),
+        "p50_ms": round(_percentile(values, 0.5), 2),
+        "p90_ms": round(_percentile(values, 0.9), 2),
+        "p99_ms": round(_percentile(values, 0.99), 2),
+        "max_ms": round(values[-1], 2),
+        "histogram": histogram,
+    }
+
+
+def summarise(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    by_endpoint: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+
+    endpoints: Dict[str, Any] = {}
+    for endpoint, group in sorted(by_endpoint.items()):
+        errors: Dict[str, int] = {}
+        for s in group:
+            if not s.ok:
+                key = s.error or str(s.status)
+                errors[key] = errors.get(key, 0) + 1
+
+        stages: Dict[str, List[float]] = {}
+        for s in group:
+            for stage, ms in s.server_timing.items():
+                stages.setdefault(stage, []).append(ms)
+
+        endpoints[endpoint] = {
+            "requests": len(group),
+            "throughput_rps": round(len(group) / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(sum(errors.values()) / len(group), 4),
+            "errors": errors,
+            "latency": _latency_summary([s.latency * 1000 for s in group if s.ok]),
+            "server_timing": {
+                stage: {
+                    "count": len(values),
+                    "p50_ms": round(_percentile(sorted(values), 0.5), 2),
+                    "p90_ms": round(_percentile(sorted(values), 0.9), 2),
+                }
+                for stage, values in sorted(stages.items())
+            },
+        }
+
+    failed = sum(1 for s in samples if not s.ok)
+    return {
+        "requests": len(samples),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(failed / len(samples), 4) if samples else 0.0,
+        "latency": _latency_summary([s.latency * 1000 for s in samples if s.ok]),
+        "endpoints": endpoints,
+    }
+
+
+# =========================
+# WORKLOAD
+# =========================
+
+def load_images(folder: Path) -> List[Tuple[str, bytes]]:
+    return [
+        (p.name, p.read_bytes())
+        for p in sorted(folder.iterdir())
+        if p.suffix.lower() in IMAGE_SUFFIXES
+    ]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}' in mix (expected one of {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("Request mix has no positive weights")
+    return mix
+
+
+class Workload:
+    """Builds the next request for a randomly drawn endpoint."""
+
+    def __init__(self, mix: Dict[str, float], images: List[Tuple[str, bytes]], species_ids: List[str], use_cache: bool, seed: int):
+        self.endpoints = list(mix)
+        self.weights = [mix[e] for e in self.endpoints]
+        self.images = images
+        self.species_ids = species_ids
+        self.use_cache = use_cache
+        self._rng = random.Random(seed)
+        self._image_cursor = 0
+
+    def next_endpoint(self) -> str:
+        return self._rng.choices(self.endpoints, weights=self.weights)[0]
+
+    async def send(self, client: httpx.AsyncClient, endpoint: str) -> httpx.Response:
+        if endpoint == "identify":
+            name, data = self.images[self._image_cursor % len(self.images)]
+            self._image_cursor += 1
+            content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            return await client.post(
+                "/api/v1/identify",
+                params={"use_cache": str(self.use_cache).lower()},
+                files={"image": (name, data, content_type)},
+            )
+
+        if endpoint == "search":
+            return await client.get("/api/v1/search", params={"q": self._rng.choice(SEARCH_TERMS), "limit": 20})
+
+        if endpoint == "catalogue":
+            params: Dict[str, Any] = {
+                "sort_by": self._rng.choice(SORTS),
+                "page": self._rng.randint(1, 3),
+                "limit": 20,
+            }
+            if self._rng.random() < 0.5:
+                params["color"] = self._rng.choice(COLOR_FILTERS)
+            return await client.get("/api/v1/catalogue", params=params)
+
+        species_id = self._rng.choice(self.species_ids) if self.species_ids else "unknown"
+        return await client.get(f"/api/v1/species/{species_id}")
+
+
+async def _timed(client: httpx.AsyncClient, workload: Workload, endpoint: str, started: float) -> Sample:
+    try:
+        response = await workload.send(client, endpoint)
+    except Exception as e:
+        return Sample(endpoint, 0, time.perf_counter() - started, error=type(e).__name__)
+
+    return Sample(
+        endpoint,
+        response.status_code,
+        time.perf_counter() - started,
+        server_timing=parse_server_timing(response.headers.get("server-timing")),
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float) -> bool:
+    """Polls /health/ready until the server has finished its startup warm-up."""
+
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get("/health/ready")
+            # 404: a server without readiness gating is ready when it answers
+            if response.status_code in (200, 404):
+                return True
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.25)
+    return False
+
+
+async def discover_species(client: httpx.AsyncClient) -> List[str]:
+    try:
+        response = await client.get("/api/v1/catalogue", params={"limit": 100})
+        items = response.json().get("items", [])
+    except (httpx.HTTPError, ValueError, AttributeError):
+        return []
+    return [item["id"] for item in items if item.get("id")]
+
+
+# =========================
+# ARRIVAL MODELS
+# =========================
+
+async def run_closed(client: httpx.AsyncClient, workload: Workload, concurrency: int, deadline: float) -> List[Sample]:
+    samples: List[Sample] = []
+
+    async def user() -> None:
+        while time.perf_counter() < deadline:
+            endpoint = workload.next_endpoint()
+            samples.append(await _timed(client, workload, endpoint, time.perf_counter()))
+
+    await asyncio.gather(*[user() for _ in range(concurrency)])
+    return samples
+
+
+async def run_open(client: httpx.AsyncClient, workload: Workload, rate: float, deadline: float, max_inflight: int, seed: int) -> Tuple[List[Sample], int]:
+    """Returns (samples, arrivals dropped because max_inflight was reached)."""
+
+    rng = random.Random(seed)
+    samples: List[Sample] = []
+    inflight: set = set()
+    dropped = 0
+
+    next_send = time.perf_counter()
+    while next_send < deadline:
+        delay = next_send - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if len(inflight) >= max_inflight:
+            dropped += 1
+        else:
+            endpoint = workload.next_endpoint()
+            task = asyncio.ensure_future(_timed(client, workload, endpoint, next_send))
+            task.add_done_callback(lambda t: (inflight.discard(t), samples.append(t.result())))
+            inflight.add(task)
+
+        next_send += rng.expovariate(rate)
+
+    if inflight:
+        await asyncio.gather(*inflight, return_exceptions=True)
+    return samples, dropped
+
+
+# =========================
+# CLIENT
+# =========================
+
+@contextlib.asynccontextmanager
+async def open_client(url: Optional[str], timeout: float, connections: int) -> AsyncIterator[httpx.AsyncClient]:
+    # sized to the most requests that can be in flight: a smaller pool
+    # queues them client-side, and the open model would count that wait
+    # as server latency
+    limits = httpx.Limits(max_connections=max(connections, 1), max_keepalive_connections=max(connections, 1))
+
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+            yield client
+        return
+
+    # in-process: local database + stub vision, selected before the app is imported
+    os.environ.setdefault("DATABASE_BACKEND", "local")
+    os.environ.setdefault("VISION_BACKEND", "stub")
+    os.environ.setdefault("SERVER_TIMING", "true")
+    os.environ.setdefault("JOB_QUEUE_PATH", f"/tmp/calyx_loadgen_{os.getpid()}.sqlite3")
+
+    # the app's own debug prints would drown the report
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        from backend.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=timeout) as client:
+                yield client
+
+
+async def run_load(args: argparse.Namespace, images: List[Tuple[str, bytes]], mix: Dict[str, float]) -> Dict[str, Any]:
+    connections = args.max_inflight if args.model == "open" else args.concurrency
+    async with open_client(args.url, args.timeout, connections) as client:
+        if not await wait_ready(client, args.ready_timeout):
+            print(f"⚠️ Server not ready after {args.ready_timeout:.0f}s; running anyway", file=sys.stderr)
+
+        species_ids = await discover_species(client)
+        if "species" in mix and not species_ids:
+            print("⚠️ No species found via /catalogue; /species requests will 404", file=sys.stderr)
+
+        workload = Workload(mix, images, species_ids, use_cache=args.use_cache, seed=args.seed)
+
+        if args.warmup > 0:
+            print(f"🔥 Warming up for {args.warmup:.0f}s...", file=sys.stderr)
+            await run_closed(client, workload, args.concurrency, time.perf_counter() + args.warmup)
+
+        print(f"🚀 Running {args.model} model for {args.duration:.0f}s...", file=sys.stderr)
+        start = time.perf_counter()
+        deadline = start + args.duration
+
+        dropped = 0
+        if args.model == "open":
+            samples, dropped = await run_open(client, workload, args.rate, deadline, args.max_inflight, args.seed)
+        else:
+            samples = await run_closed(client, workload, args.concurrency, deadline)
+
+        elapsed = time.perf_counter() - start
+
+    report = summarise(samples, elapsed)
+    report["config"] = {
+        "target": args.url or "in-process",
+        "model": args.model,
+        "concurrency": args.concurrency if args.model == "closed" else None,
+        "rate_rps": args.rate if args.model == "open" else None,
+        "mix": mix,
+        "duration_s": args.duration,
+        "images": len(images),
+        "use_cache": args.use_cache,
+    }
+    if args.model == "open":
+        report["dropped_arrivals"] = dropped
+    return report
+
+
+# =========================
+# REPORT
+# =========================
+
+def _print_report(report: Dict[str, Any]) -> None:
+    cfg = report["config"]
+    load = f"{cfg['concurrency']} users" if cfg["model"] == "closed" else f"{cfg['rate_rps']} req/s offered"
+    print(f"\n📊 {report['requests']} requests in {report['elapsed_s']}s against {cfg['target']} ({cfg['model']}, {load})")
+    print(f"   throughput {report['throughput_rps']} req/s, error rate {report['error_rate'] * 100:.2f}%")
+    if "dropped_arrivals" in report:
+        print(f"   dropped arrivals (max in-flight reached): {report['dropped_arrivals']}")
+
+    print(f"\n{'endpoint':<12}{'reqs':>7}{'rps':>9}{'err %':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint, entry in report["endpoints"].items():
+        lat = entry["latency"] or {}
+        print(
+            f"{endpoint:<12}{entry['requests']:>7}{entry['throughput_rps']:>9}{entry['error_rate'] * 100:>8.2f}"
+            f"{lat.get('p50_ms', '-'):>10}{lat.get('p90_ms', '-'):>10}{lat.get('p99_ms', '-'):>10}{lat.get('max_ms', '-'):>10}"
+        )
+
+    for endpoint, entry in report["endpoints"].items():
+        histogram = (entry["latency"] or {}).get("histogram")
+        if not histogram:
+            continue
+
+        peak = max(histogram.values()) or 1
+        print(f"\n📈 {endpoint} latency (ms)")
+        for bucket, n in histogram.items():
+            print(f"   {bucket:>8} {'█' * max(int(30 * n / peak), 1 if n else 0)} {n}")
+
+        if entry["errors"]:
+            print(f"   errors: {entry['errors']}")
+
+        if entry["server_timing"]:
+            print("   server stages (p50 / p90 ms):")
+            for stage, st in entry["server_timing"].items():
+                print(f"     {stage:<28}{st['p50_ms']:>9}{st['p90_ms']:>9}")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", default=None, help="base URL of a running API")
+    target.add_argument("--in-process", action="store_true", help="serve the app in-process with local db + stub vision")
+    parser.add_argument("--images", type=Path, default=None, help="image folder replayed by /identify")
+    parser.add_argument("--model", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="virtual users (closed model)")
+    parser.add_argument("--rate", type=float, default=10.0, help="mean arrivals per second (open model)")
+    parser.add_argument("--max-inflight", type=int, default=1000, help="open model: drop arrivals beyond this")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--ready-timeout", type=float, default=120.0, help="wait this long for /health/ready")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--use-cache", dest="use_cache", action="store_true", help="send use_cache=true on /identify")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="send use_cache=false on /identify (default)")
+    parser.set_defaults(use_cache=False)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    images: List[Tuple[str, bytes]] = []
+    if "identify" in mix:
+        if args.images is None or not args.images.is_dir():
+            print("❌ --images FIXTURE_DIR is required when the mix includes identify")
+            return 1
+        images = load_images(args.images)
+        if not images:
+            print(f"❌ No fixture images in {args.images}")
+            return 1
+        if args.use_cache:
+            print(
+                f"⚠️ --use-cache with {len(images)} images: after the first pass every "
+                "/identify is a cache hit and the pipeline is not measured",
+                file=sys.stderr,
+            )
+
+    report = asyncio.run(run_load(args, images, mix))
+    _print_report(report)
+
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2))
+        print(f"\n✅ Wrote {args.out}")
+
+    return 1 if report["requests"] == 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Per-worker memory under gunicorn, with and without copy-on-write preload.
+
+For each mode (PRELOAD_APP=false, then true) starts gunicorn with
+backend/gunicorn.conf.py on the local database and stub vision, waits
+for /health/ready, and reads /proc/<pid>/smaps_rollup for the master
+and every worker: once idle and once after a burst of /identify calls
+(requests write to refcounts, which is what breaks page sharing).
+USS (private pages) is what each extra worker really costs.
+
+Linux only (smaps_rollup).
+
+Usage: python -m backend.benchmarks.memory_report --images DIR [--workers 4] [--requests 40]
+                                                 [--modes off,on] [--port 8790] [--out memory.json]
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+
+MODES = {"off": "false", "on": "true"}
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+# =========================
+# /proc
+# =========================
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """rss / pss / uss / shared in kB from smaps_rollup."""
+
+    fields: Dict[str, int] = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1])
+
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": private,
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        pass
+
+    # kernels without CONFIG_PROC_CHILDREN: scan for the parent pid
+    children = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # pid (comm) state ppid ...; comm may contain spaces
+        if int(stat.rsplit(")", 1)[1].split()[1]) == pid:
+            children.append(int(entry.name))
+    return children
+
+
+def measure(master: int) -> Dict[str, Any]:
+    workers = sorted(child_pids(master))
+    per_worker = [memory_kb(pid) for pid in workers]
+
+    return {
+        "master": memory_kb(master),
+        "workers": per_worker,
+        "worker_uss_mean": round(sum(w["uss"] for w in per_worker) / max(len(per_worker), 1)),
+        "total_pss": memory_kb(master)["pss"] + sum(w["pss"] for w in per_worker),
+    }
+
+
+# =========================
+# SERVER
+# =========================
+
+def _wait_ready(url: str, workers: int, timeout: float) -> bool:
+    """Ready answers on every worker we hit; sample it a few times per worker."""
+
+    deadline = time.time() + timeout
+    hits = 0
+    with httpx.Client(base_url=url, timeout=5.0) as client:
+        while time.time() < deadline:
+            try:
+                hits = hits + 1 if client.get("/health/ready").status_code == 200 else 0
+            except httpx.HTTPError:
+                hits = 0
+            if hits >= workers * 3:
+                return True
+            time.sleep(0.2)
+    return False
+
+
+def _burst(url: str, images: List[Path], count: int) -> int:
+    failures = 0
+    with httpx.Client(base_url=url, timeout=60.0) as client:
+        for i in range(count):
+            path = images[i % len(images)]
+            response = client.post(
+                "/api/v1/identify",
+                params={"use_cache": "false"},
+                files={"image": (path.name, path.read_bytes(), "image/jpeg")},
+            )
+            failures += response.status_code != 200
+    return failures
+
+
+def run_mode(mode: str, args: argparse.Namespace, images: List[Path]) -> Dict[str, Any]:
+    env = {
+        **os.environ,
+        "PRELOAD_APP": MODES[mode],
+        "DATABASE_BACKEND": "local",
+        "VISION_BACKEND": "stub",
+        "WEB_CONCURRENCY": str(args.workers),
+        "PORT": str(args.port),
+        "JOB_QUEUE_PATH": os.path.join(tempfile.gettempdir(), f"calyx_memory_{mode}_{os.getpid()}.sqlite3"),
+    }
+    url = f"http://127.0.0.1:{args.port}"
+
+    print(f"🚀 preload {mode}: starting {args.workers} workers...", file=sys.stderr)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn.conf.py", "backend.main:app"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    try:
+        if not _wait_ready(url, args.workers, args.ready_timeout):
+            raise RuntimeError(f"server not ready after {args.ready_timeout:.0f}s (preload {mode})")
+        time.sleep(args.settle)
+
+        idle = measure(proc.pid)
+        failures = _burst(url, images, args.requests)
+        time.sleep(args.settle)
+        loaded = measure(proc.pid)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    return {"idle": idle, "after_requests": loaded, "failed_requests": failures}
+
+
+# =========================
+# REPORT
+# =========================
+
+def _mb(kb: float) -> str:
+    return f"{kb / 1024:.1f}"
+
+
+def _print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"\n{'preload':<9}{'phase':<16}{'master USS':>12}{'worker USS':>12}{'worker RSS':>12}{'total PSS':>12}  (MB)")
+    for mode, result in results.items():
+        for phase in ("idle", "after_requests"):
+            m = result[phase]
+            rss = sum(w["rss"] for w in m["workers"]) / max(len(m["workers"]), 1)
+            print(
+                f"{mode:<9}{phase:<16}{_mb(m['master']['uss']):>12}{_mb(m['worker_uss_mean']):>12}"
+                f"{_mb(rss):>12}{_mb(m['total_pss']):>12}"
+            )
+
+    if "off" in results and "on" in results:
+        for phase in ("idle", "after_requests"):
+            off = results["off"][phase]["worker_uss_mean"]
+            on = results["on"][phase]["worker_uss_mean"]
+            saved = off - on
+            print(f"\n📉 {phase}: preload saves {_mb(saved)} MB unique memory per worker ({saved / max(off, 1):.0%})")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--images", type=Path, required=True, help="folder of images for the request burst")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--modes", default="off,on")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds to wait before each measurement")
+    parser.add_argument("--ready-timeout", type=float, default=180.0)
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    if not Path("/proc/self/smaps_rollup").exists():
+        print("❌ Needs Linux /proc/<pid>/smaps_rollup")
+        return 1
+
+    images = sorted(p for p in args.images.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not images:
+        print(f"❌ No images in {args.images}")
+        return 1
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        print(f"❌ Unknown mode(s): {', '.join(unknown)} (expected off, on)")
+        return 1
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for mode in modes:
+        try:
+            results[mode] = run_mode(mode, args, images)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+
+    _print_report(results)
+
+    if args.out:
+        args.out.write_text(json.dumps({"workers": args.workers, "requests": args.requests, "results": results}, indent=2))
+        print(f"\n✅ Wrote {args.out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Golden-output parity check for the trait extractors.
+
+`record` runs the reference implementation (original per-contour pose
+scorers and pairwise grouping at full resolution) over an image corpus
+and stores cluster geometry, traits, colours and the ranking of the
+seed species as a versioned golden file. `check` re-runs the corpus
+with the pose mode under test and diffs it against the golden file
+using the per-field tolerances in backend.services.parity.
+
+Without CORPUS_DIR both commands use the seeded synthetic corpus
+(synthetic_flowers, rendered in memory) and the golden file committed
+at backend/benchmarks/golden/parity_synthetic.json. Run the check after
+any change to the extractors; re-record only when a change in output
+is intended.
+
+Usage: python -m backend.benchmarks.parity check [--mode full|pyramid]
+       python -m backend.benchmarks.parity record
+       python -m backend.benchmarks.parity record CORPUS_DIR [--golden CORPUS_DIR/golden.json]
+       python -m backend.benchmarks.parity check CORPUS_DIR [--mode full|pyramid] [--golden ...]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+from pathlib import Path
+from typing import List
+
+from backend.services.parity import (
+    PARITY_VERSION,
+    SYNTHETIC_COUNT,
+    SYNTHETIC_SEED,
+    check_golden,
+    folder_corpus,
+    record_golden,
+    synthetic_corpus,
+)
+
+
+GOLDEN_NAME = "golden.json"
+SYNTHETIC_GOLDEN = Path(__file__).resolve().parent / "golden" / "parity_synthetic.json"
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=("record", "check"))
+    parser.add_argument("corpus", type=Path, nargs="?", default=None, help="image folder; defaults to the synthetic corpus")
+    parser.add_argument("--golden", type=Path, default=None, help=f"defaults to CORPUS_DIR/{GOLDEN_NAME}")
+    parser.add_argument("--mode", default="full", help="pose mode to check (full, pyramid, reference)")
+    args = parser.parse_args(argv)
+
+    if args.corpus is None:
+        golden_path = args.golden or SYNTHETIC_GOLDEN
+    else:
+        golden_path = args.golden or args.corpus / GOLDEN_NAME
+
+    if args.command == "record":
+        if args.corpus is None:
+            manifest, load = synthetic_corpus(SYNTHETIC_COUNT, SYNTHETIC_SEED)
+        else:
+            manifest, load = folder_corpus(args.corpus)
+
+        # extractors print debug output per image
+        with contextlib.redirect_stdout(io.StringIO()):
+            golden = record_golden(manifest, load)
+
+        if not golden["snapshots"]:
+            print(f"❌ No images in {args.corpus}")
+            return 1
+
+        if args.corpus is None:
+            golden["synthetic"] = {"count": SYNTHETIC_COUNT, "seed": SYNTHETIC_SEED}
+
+        golden_path.parent.mkdir(parents=True, exist_ok=True)
+        golden_path.write_text(json.dumps(golden, indent=2, sort_keys=True) + "\n")
+        print(f"✅ Recorded {len(golden['snapshots'])} reference snapshots (parity v{PARITY_VERSION}) to {golden_path}")
+        return 0
+
+    if not golden_path.exists():
+        print(f"❌ No golden file at {golden_path}; run `record` first")
+        return 1
+
+    golden = json.loads(golden_path.read_text())
+
+    if args.corpus is None:
+        # the golden file names the corpus it was recorded from
+        synthetic = golden.get("synthetic") or {}
+        manifest, load = synthetic_corpus(
+            synthetic.get("count", SYNTHETIC_COUNT),
+            synthetic.get("seed", SYNTHETIC_SEED),
+        )
+    else:
+        manifest, load = folder_corpus(args.corpus)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            failures = check_golden(manifest, load, golden, args.mode)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    total = len(golden["snapshots"])
+    print(f"\n🔍 Parity: {args.mode} vs {golden.get('pose_mode')} on {total} images")
+
+    if not failures:
+        print(f"✅ All {total} images within tolerance")
+        return 0
+
+    for name, mismatches in sorted(failures.items()):
+        print(f"\n❌ {name}: {len(mismatches)} field(s) out of tolerance")
+        for m in mismatches:
+            print(f"   {m.field}: {m.expected} → {m.actual}")
+
+    print(f"\n❌ {len(failures)}/{total} images differ")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
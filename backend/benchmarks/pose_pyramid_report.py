@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Accuracy vs latency report for pose segmentation modes.
+
+Runs compute_pose_traits in "full" mode and in "pyramid" mode for
+each pyramid level on a folder of fixture images, and compares the
+primary cluster against the full-resolution result. Images too small
+for a level fall back to full mode; they are reported in their own
+pyramid_lN_fallback row rather than counted as pyramid.
+
+Usage: python -m backend.benchmarks.pose_pyramid_report FIXTURE_DIR [--levels 1 2] [--repeat 3] [--json out.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from backend.services.image_processing_service import resize_for_processing
+from backend.services.pose_extractor import compute_pose_traits, resolve_pose_mode
+
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _load_fixtures(folder: Path) -> List[Path]:
+    return sorted(
+        p for p in folder.iterdir()
+        if p.suffix.lower() in IMAGE_SUFFIXES
+    )
+
+
+def _run(img: Image.Image, mode: str, repeat: int, levels: Optional[int] = None):
+    timings = []
+    result = None
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        # compute_pose_traits prints its own debug block
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = compute_pose_traits(img, mode=mode, pyramid_levels=levels)
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings), result
+
+
+def _compare(reference: Dict[str, Any], candidate: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    ref_clusters = reference["clusters"]
+    cand_clusters = candidate["clusters"]
+
+    if not ref_clusters or not cand_clusters:
+        return {
+            "agree": float(bool(ref_clusters) == bool(cand_clusters)),
+            "centre_offset": None,
+            "mask_iou": None,
+            "area_error": None,
+        }
+
+    (rx, ry), (cx, cy) = ref_clusters[0]["centre"], cand_clusters[0]["centre"]
+
+    ref_mask = reference["cluster_masks"][0] > 0
+    cand_mask = candidate["cluster_masks"][0] > 0
+
+    union = np.count_nonzero(ref_mask | cand_mask)
+    iou = np.count_nonzero(ref_mask & cand_mask) / union if union else 1.0
+
+    ref_area = ref_clusters[0]["area"]
+
+    return {
+        "agree": 1.0,
+        # 0-1000 grid units
+        "centre_offset": float(np.hypot(rx - cx, ry - cy)),
+        "mask_iou": float(iou),
+        "area_error": abs(cand_clusters[0]["area"] - ref_area) / max(ref_area, 1),
+    }
+
+
+def _summarise(values: List[Optional[float]]) -> Optional[float]:
+    present = [v for v in values if v is not None]
+    if not present:
+        return None
+    return round(statistics.mean(present), 4)
+
+
+def build_report(fixtures: List[Path], levels: List[int], repeat: int) -> Dict[str, Any]:
+    rows: Dict[str, Dict[str, List[Any]]] = {"full": {"latency": []}}
+    for level in levels:
+        for name in (f"pyramid_l{level}", f"pyramid_l{level}_fallback"):
+            rows[name] = {
+                "latency": [], "agree": [], "centre_offset": [], "mask_iou": [], "area_error": [],
+            }
+
+    for path in fixtures:
+        img = resize_for_processing(Image.open(path).convert("RGB"))
+
+        full_latency, reference = _run(img, "full", repeat)
+        rows["full"]["latency"].append(full_latency)
+
+        for level in levels:
+            latency, result = _run(img, "pyramid", repeat, levels=level)
+
+            # too small for this level: compute_pose_traits ran full mode
+            fell_back = resolve_pose_mode("pyramid", img.height, img.width, level) != "pyramid"
+
+            row = rows[f"pyramid_l{level}_fallback" if fell_back else f"pyramid_l{level}"]
+            row["latency"].append(latency)
+            for key, value in _compare(reference, result).items():
+                row[key].append(value)
+
+    full_median = statistics.median(rows["full"]["latency"])
+
+    report: Dict[str, Any] = {"fixtures": len(fixtures), "repeat": repeat, "modes": {}}
+
+    for name, row in rows.items():
+        if not row["latency"]:
+            continue
+
+        median = statistics.median(row["latency"])
+        entry = {
+            "images": len(row["latency"]),
+            "median_ms": round(median * 1000, 2),
+            "speedup": round(full_median / median, 2) if median else None,
+        }
+        for key in ("agree", "centre_offset", "mask_iou", "area_error"):
+            if key in row:
+                entry[key] = _summarise(row[key])
+        report["modes"][name] = entry
+
+    return report
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"\n🌸 Pose mode report ({report['fixtures']} fixtures, median of {report['repeat']})")
+    print(f"{'mode':<23}{'images':>7}{'ms':>10}{'speedup':>9}{'agree':>8}{'centre':>9}{'IoU':>8}{'area err':>10}")
+
+    for name, entry in report["modes"].items():
+        def fmt(key, width):
+            value = entry.get(key)
+            return f"{'-' if value is None else value:>{width}}"
+
+        print(
+            f"{name:<23}{entry['images']:>7}{entry['median_ms']:>10}{fmt('speedup', 9)}"
+            f"{fmt('agree', 8)}{fmt('centre_offset', 9)}{fmt('mask_iou', 8)}{fmt('area_error', 10)}"
+        )
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    fixtures = _load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"❌ No fixture images in {args.fixtures}")
+        return 1
+
+    report = build_report(fixtures, args.levels, args.repeat)
+    _print_report(report)
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+        print(f"\n✅ Wrote {args.json}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
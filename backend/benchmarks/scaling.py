@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Scaling curves for pose extraction on synthetic flower scenes.
+
+Three independent sweeps over generated scenes (see services/synthetic_flowers.py):
+
+  resolution  one bloom, growing image size; pose latency in full and
+              pyramid mode plus centre error against ground truth
+  contours    fixed size, growing clutter; mask contour count, pose
+              latency and _group_contours vs the pairwise reference
+  clusters    fixed size, growing bloom count; multi-cluster pose
+              latency and how many blooms were found
+
+Each curve gets a log-log slope (latency exponent against pixels,
+contours or blooms); slopes above --superlinear are flagged.
+
+Usage: python -m backend.benchmarks.scaling [--sweeps resolution,contours,clusters] [--repeat 3]
+                                           [--sizes 256,512,1024,2048] [--clutter 0,50,200,800]
+                                           [--flowers 1,2,4,8,12] [--out curves.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from backend.services.synthetic_flowers import SyntheticScene, random_scene
+from backend.services.pose_extractor import (
+    MAX_CLUSTERS,
+    _compute_planes,
+    _group_contours,
+    _group_contours_reference,
+    compute_pose_traits,
+)
+
+
+SWEEPS = ("resolution", "contours", "clusters")
+
+DEFAULT_SIZES = "256,384,512,768,1024,1536,2048"
+DEFAULT_CLUTTER = "0,25,50,100,200,400,800"
+DEFAULT_FLOWERS = "1,2,4,6,9,12"
+
+# working size for the contour and cluster sweeps
+FIXED_SIZE = (1024, 768)
+
+
+# =========================
+# HELPERS
+# =========================
+
+def _parse_ints(spec: str) -> List[int]:
+    return [int(v) for v in spec.split(",") if v.strip()]
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """(median ms, last result); pose prints debug output per call."""
+
+    samples = []
+    result = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3), result
+
+
+def loglog_slope(xs: Sequence[float], ys: Sequence[float]) -> Optional[float]:
+    """Least-squares exponent k in y ~ x^k; None with fewer than two usable points."""
+
+    points = [(math.log(x), math.log(y)) for x, y in zip(xs, ys) if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+
+    mx = statistics.fmean(p[0] for p in points)
+    my = statistics.fmean(p[1] for p in points)
+    var = sum((p[0] - mx) ** 2 for p in points)
+    if var == 0:
+        return None
+
+    return round(sum((p[0] - mx) * (p[1] - my) for p in points) / var, 3)
+
+
+def _mask_contours(scene: SyntheticScene):
+    bgr = cv2.cvtColor(np.asarray(scene.image), cv2.COLOR_RGB2BGR)
+    mask = _compute_planes(bgr)[3]
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return list(contours)
+
+
+def _matched_blooms(scene: SyntheticScene, clusters: List[Dict[str, Any]]) -> int:
+    """Ground-truth blooms with a detected cluster centre inside their radius."""
+
+    w, h = scene.spec.width, scene.spec.height
+    matched = 0
+
+    for truth in scene.ground_truth:
+        tx, ty = truth["centre"][0] / 1000 * w, truth["centre"][1] / 1000 * h
+        for cluster in clusters:
+            cx, cy = cluster["centre"][0] / 1000 * w, cluster["centre"][1] / 1000 * h
+            if math.hypot(cx - tx, cy - ty) <= truth["radius"]:
+                matched += 1
+                break
+
+    return matched
+
+
+# =========================
+# SWEEPS
+# =========================
+
+def sweep_resolution(sizes: List[int], repeat: int, seed: int) -> Dict[str, Any]:
+    points = []
+
+    for width in sizes:
+        height = int(width * 0.75)
+        scene = random_scene(width, height, flowers=1, clutter=20, noise=4.0, seed=seed)
+
+        point: Dict[str, Any] = {"width": width, "height": height, "pixels": width * height}
+        for mode in ("full", "pyramid"):
+            ms, pose = _time(lambda: compute_pose_traits(scene.image, mode=mode), repeat)
+            point[f"{mode}_ms"] = ms
+
+            clusters = pose["clusters"]
+            if clusters:
+                truth = scene.ground_truth[0]["centre"]
+                point[f"{mode}_centre_error"] = round(math.hypot(
+                    clusters[0]["centre"][0] - truth[0],
+                    clusters[0]["centre"][1] - truth[1],
+                ), 1)
+            else:
+                point[f"{mode}_centre_error"] = None
+
+        points.append(point)
+
+    pixels = [p["pixels"] for p in points]
+    return {
+        "x": "pixels",
+        "points": points,
+        "slopes": {
+            "full_ms": loglog_slope(pixels, [p["full_ms"] for p in points]),
+            "pyramid_ms": loglog_slope(pixels, [p["pyramid_ms"] for p in points]),
+        },
+    }
+
+
+def sweep_contours(clutter_levels: List[int], repeat: int, seed: int) -> Dict[str, Any]:
+    width, height = FIXED_SIZE
+    points = []
+
+    for clutter in clutter_levels:
+        scene = random_scene(width, height, flowers=1, clutter=clutter, seed=seed)
+        contours = _mask_contours(scene)
+
+        pose_ms, _ = _time(lambda: compute_pose_traits(scene.image), repeat)
+        group_ms, _ = _time(lambda: _group_contours(contours), repeat)
+        reference_ms, _ = _time(lambda: _group_contours_reference(contours), repeat)
+
+        points.append({
+            "clutter": clutter,
+            "contours": len(contours),
+            "pose_ms": pose_ms,
+            "group_ms": group_ms,
+            "group_reference_ms": reference_ms,
+        })
+
+    counts = [p["contours"] for p in points]
+    return {
+        "x": "contours",
+        "points": points,
+        "slopes": {
+            key: loglog_slope(counts, [p[key] for p in points])
+            for key in ("pose_ms", "group_ms", "group_reference_ms")
+        },
+    }
+
+
+def sweep_clusters(flower_counts: List[int], repeat: int, seed: int) -> Dict[str, Any]:
+    width, height = FIXED_SIZE
+    points = []
+
+    for flowers in flower_counts:
+        scene = random_scene(width, height, flowers=flowers, clutter=20, seed=seed)
+
+        ms, pose = _time(lambda: compute_pose_traits(scene.image, max_clusters=MAX_CLUSTERS), repeat)
+
+        points.append({
+            "flowers": flowers,
+            "clusters": len(pose["clusters"]),
+            "matched": _matched_blooms(scene, pose["clusters"]),
+            "pose_ms": ms,
+        })
+
+    return {
+        "x": "flowers",
+        "points": points,
+        "slopes": {
+            "pose_ms": loglog_slope([p["flowers"] for p in points], [p["pose_ms"] for p in points]),
+        },
+    }
+
+
+# =========================
+# REPORT
+# =========================
+
+def _print_curve(name: str, curve: Dict[str, Any], superlinear: float) -> None:
+    points = curve["points"]
+    if not points:
+        return
+
+    columns = list(points[0])
+    widths = [len(c) + 2 for c in columns]
+
+    print(f"\n📈 {name} (x = {curve['x']})")
+    print("".join(f"{c:>{w}}" for c, w in zip(columns, widths)))
+    for point in points:
+        print("".join(f"{'-' if point[c] is None else point[c]:>{w}}" for c, w in zip(columns, widths)))
+
+    for key, slope in curve["slopes"].items():
+        if slope is None:
+            continue
+        flag = "⚠️ superlinear" if slope > superlinear else "✅"
+        print(f"   {key}: exponent {slope} {flag}")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sweeps", default=",".join(SWEEPS))
+    parser.add_argument("--sizes", default=DEFAULT_SIZES)
+    parser.add_argument("--clutter", default=DEFAULT_CLUTTER)
+    parser.add_argument("--flowers", default=DEFAULT_FLOWERS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--superlinear", type=float, default=1.15, help="flag exponents above this")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    sweeps = [s.strip() for s in args.sweeps.split(",") if s.strip()]
+    unknown = [s for s in sweeps if s not in SWEEPS]
+    if unknown:
+        print(f"❌ Unknown sweep(s): {', '.join(unknown)}")
+        return 1
+
+    report: Dict[str, Any] = {"repeat": args.repeat, "seed": args.seed, "curves": {}}
+
+    if "resolution" in sweeps:
+        report["curves"]["resolution"] = sweep_resolution(_parse_ints(args.sizes), args.repeat, args.seed)
+    if "contours" in sweeps:
+        report["curves"]["contours"] = sweep_contours(_parse_ints(args.clutter), args.repeat, args.seed)
+    if "clusters" in sweeps:
+        report["curves"]["clusters"] = sweep_clusters(_parse_ints(args.flowers), args.repeat, args.seed)
+
+    for name, curve in report["curves"].items():
+        _print_curve(name, curve, args.superlinear)
+
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2))
+        print(f"\n✅ Wrote {args.out}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -35,8 +35,97 @@ class Settings:
     CORS_ORIGINS: list[str] = _split_csv(os.getenv("CORS_ORIGINS", ""))
 
     MAX_IMAGE_BYTES: int = int(os.getenv("MAX_IMAGE_BYTES", str(5 * 1024 * 1024)))
+    MAX_BATCH_IMAGES: int = int(os.getenv("MAX_BATCH_IMAGES", "32"))
     MAX_CATALOGUE_LIMIT: int = int(os.getenv("MAX_CATALOGUE_LIMIT", "100"))
     MAX_POPULAR_LIMIT: int = int(os.getenv("MAX_POPULAR_LIMIT", "50"))
 
+    # async identify jobs (POST /identify/jobs)
+    JOB_QUEUE_PATH: str = os.getenv("JOB_QUEUE_PATH", "/tmp/calyx_jobs.sqlite3")
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_MAX_WAIT_SECONDS: float = float(os.getenv("JOB_MAX_WAIT_SECONDS", "30"))
+    # a `running` job is only re-queued once its worker has held it this
+    # long (it crashed); other workers sharing the file keep their jobs
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+    # finished jobs are reused for the same image (use_cache=true only)
+    # for this long, and deleted after JOB_RETENTION_SECONDS
+    JOB_DEDUP_TTL_SECONDS: float = float(os.getenv("JOB_DEDUP_TTL_SECONDS", "600"))
+    JOB_RETENTION_SECONDS: float = float(os.getenv("JOB_RETENTION_SECONDS", "86400"))
+
+    # "supabase" or "local" (in-memory stand-in seeded from LOCAL_DB_SEED_PATH)
+    DATABASE_BACKEND: str = os.getenv("DATABASE_BACKEND", "supabase").lower()
+    LOCAL_DB_SEED_PATH: str = os.getenv("LOCAL_DB_SEED_PATH", str(BACKEND_DIR / "database" / "seed_species.json"))
+    LOCAL_DB_LATENCY_MS: float = float(os.getenv("LOCAL_DB_LATENCY_MS", "0"))
+    LOCAL_DB_JITTER_MS: float = float(os.getenv("LOCAL_DB_JITTER_MS", "0"))
+    LOCAL_DB_ERROR_RATE: float = float(os.getenv("LOCAL_DB_ERROR_RATE", "0"))
+    LOCAL_DB_RANDOM_SEED: int = int(os.getenv("LOCAL_DB_RANDOM_SEED", "0"))
+
+    # "hf" (HuggingFace inference API) or "stub" (deterministic, no network)
+    VISION_BACKEND: str = os.getenv("VISION_BACKEND", "hf").lower()
+    VISION_STUB_LATENCY_MS: float = float(os.getenv("VISION_STUB_LATENCY_MS", "0"))
+
+    # import the identify pipeline (cv2, numpy, extractors) in a background
+    # thread at startup instead of on the first request
+    WARM_IMPORTS: bool = os.getenv("WARM_IMPORTS", "true").lower() == "true"
+
+    # pre-fork servers (backend/gunicorn.conf.py): build read-only state
+    # in the master and gc.freeze() it so workers share the pages. With
+    # DATABASE_BACKEND=supabase the shared catalogue state is the
+    # embedding matrix, so set EMBEDDING_STORE_PATH too
+    PRELOAD_APP: bool = os.getenv("PRELOAD_APP", "false").lower() == "true"
+
+    # species embeddings shared by all workers on a node through one
+    # memory-mapped file ("" = each process fetches per request);
+    # republished by one worker when older than EMBEDDING_REFRESH_SECONDS
+    EMBEDDING_STORE_PATH: str = os.getenv("EMBEDDING_STORE_PATH", "")
+    EMBEDDING_REFRESH_SECONDS: float = float(os.getenv("EMBEDDING_REFRESH_SECONDS", "3600"))
+
+    # startup warm-up: run the identify pipeline on built-in synthetic
+    # scenes until the per-round p50 settles; /health/ready answers 503
+    # until it finishes. Only the first embedding is a real inference call
+    WARMUP_ENABLED: bool = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_MIN_ROUNDS: int = int(os.getenv("WARMUP_MIN_ROUNDS", "3"))
+    WARMUP_MAX_ROUNDS: int = int(os.getenv("WARMUP_MAX_ROUNDS", "8"))
+    WARMUP_STEADY_TOLERANCE: float = float(os.getenv("WARMUP_STEADY_TOLERANCE", "0.15"))
+    WARMUP_TIMEOUT_SECONDS: float = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "60"))
+
+    # admission control for /identify (services/admission.py): at most
+    # ADMISSION_MAX_CONCURRENT images in the pipeline (a batch takes one
+    # slot per image, held from decode on); once the wait queue has
+    # not drained for ADMISSION_INTERVAL_MS, waiters get only
+    # ADMISSION_TARGET_MS before a 503 + Retry-After. A pose mode in
+    # ADMISSION_DEGRADE_POSE_MODE (e.g. "pyramid") is used for requests
+    # admitted while overloaded
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_CONCURRENT: int = int(os.getenv("ADMISSION_MAX_CONCURRENT", str(os.cpu_count() or 2)))
+    ADMISSION_MAX_QUEUE: int = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_TARGET_MS: float = float(os.getenv("ADMISSION_TARGET_MS", "100"))
+    ADMISSION_INTERVAL_MS: float = float(os.getenv("ADMISSION_INTERVAL_MS", "1000"))
+    ADMISSION_DEGRADE_POSE_MODE: str = os.getenv("ADMISSION_DEGRADE_POSE_MODE", "").lower()
+
+    # pose segmentation: "full" or "pyramid" (score on a downsampled
+    # level, refine the winning cluster at full resolution)
+    POSE_MODE: str = os.getenv("POSE_MODE", "full").lower()
+    POSE_PYRAMID_LEVELS: int = int(os.getenv("POSE_PYRAMID_LEVELS", "1"))
+
+    # parity shadow mode: re-run a sample of identify requests with another
+    # pose mode (e.g. "reference") in the background and diff the traits
+    SHADOW_POSE_MODE: str = os.getenv("SHADOW_POSE_MODE", "").lower()
+    SHADOW_SAMPLE_RATE: float = float(os.getenv("SHADOW_SAMPLE_RATE", "0.01"))
+
+    # debug overlays (DEBUG=true) served at /debug/{id}: a local SQLite
+    # file shared by every worker on the node, like the job queue
+    DEBUG_STORE_PATH: str = os.getenv("DEBUG_STORE_PATH", "/tmp/calyx_debug.sqlite3")
+    DEBUG_STORE_MAX_ITEMS: int = int(os.getenv("DEBUG_STORE_MAX_ITEMS", "64"))
+    DEBUG_STORE_MAX_BYTES: int = int(os.getenv("DEBUG_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+    DEBUG_STORE_TTL_SECONDS: float = float(os.getenv("DEBUG_STORE_TTL_SECONDS", "600"))
+    DEBUG_RENDER_QUEUE: int = int(os.getenv("DEBUG_RENDER_QUEUE", "16"))
+    DEBUG_WAIT_SECONDS: float = float(os.getenv("DEBUG_WAIT_SECONDS", "2"))
+
+    # identify every flower cluster (up to MAX_CLUSTERS) instead of only the top one
+    MULTI_FLOWER: bool = os.getenv("MULTI_FLOWER", "false").lower() == "true"
+
+    # adds per-stage timings to /identify responses as a Server-Timing header
+    SERVER_TIMING: bool = os.getenv("SERVER_TIMING", "false").lower() == "true"
+
 
 settings = Settings()
\ No newline at end of file
@@ -1,15 +1,31 @@
 # backend/database.py
+import asyncio
+import json
 import os
-from typing import Any, Dict, List, Optional, cast
-from unittest import result
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, cast
 
 import numpy as np
-from supabase import Client, create_client
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+    from backend.services.embedding_store import SharedEmbeddings
 
 JSONDict = Dict[str, Any]
 
+# page size when pulling every species embedding for the shared store
+EMBEDDING_PAGE_SIZE = 1000
+
+# identification_cache rows are refreshed to this on every (re)write
+CACHE_TTL = timedelta(days=30)
+
 
 class SupabaseClient:
+    # node-wide shared matrix (EMBEDDING_STORE_PATH), attached at startup;
+    # without it refinement fetches candidate embeddings per request
+    embeddings: Optional["SharedEmbeddings"] = None
+
     def __init__(self):
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
@@ -17,18 +33,41 @@ class SupabaseClient:
         if not url or not key:
             raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
 
-        self.client: Client = create_client(url, key)
+        # supabase pulls in httpx, postgrest, realtime, ...; only pay for
+        # it when a real client is built (LocalSupabaseClient skips this)
+        from supabase import create_client
+
+        self.client: "Client" = create_client(url, key)
         self._connected = True
         
 
     def is_connected(self) -> bool:
         return self._connected
+
+    def close(self) -> None:
+        """Closes the pooled HTTP connections (short-lived clients, e.g. in a pre-fork master)."""
+
+        postgrest = getattr(self.client, "postgrest", None)
+        if postgrest is not None:
+            postgrest.aclose()
     
     def _species_table(self):
         return self.client.table("species")
 
+    async def get_species_count(self) -> int:
+        try:
+            result = self.client.table("species").select("id", count=cast(Any, "exact")).execute()
+            return int(result.count or 0)
+        except Exception as e:
+            print(f"Error getting species count: {e}")
+            return 0
+
     async def rpc(self, function_name: str, params: dict) -> List[JSONDict]:
-        response = self.client.rpc(function_name, params).execute()
+        # the supabase client is synchronous; run it on a thread so
+        # concurrent pipeline stages are not blocked behind the RPC
+        response = await asyncio.to_thread(
+            self.client.rpc(function_name, params).execute
+        )
 
         data = response.data
         if not isinstance(data, list):
@@ -70,36 +109,111 @@ class SupabaseClient:
             if not candidate_ids:
                 return []
 
+            return await asyncio.to_thread(self._refine, candidate_ids, embedding)
+        except Exception as e:
+            print(f"Error refining with embedding: {e}")
+            return candidates
+
+    def _refine(self, candidate_ids: List[str], embedding: List[float]) -> List[JSONDict]:
+        """
+        Blocking. Scores from the shared matrix where it has the species;
+        the rest (no matrix attached, or species newer than the attached
+        generation) fetch their embeddings per row as before.
+        """
+
+        scored: List[JSONDict] = []
+        missing = candidate_ids
+
+        if self.embeddings is not None:
+            similarities = self.embeddings.similarities(candidate_ids, embedding)
+            if similarities is not None:
+                scores = {i: score for i, score in zip(candidate_ids, similarities) if score is not None}
+                missing = [i for i in candidate_ids if i not in scores]
+                if scores:
+                    scored.extend(self._refine_from_shared(scores))
+
+        if missing:
+            scored.extend(self._refine_from_rows(missing, embedding))
+
+        scored.sort(key=lambda x: float(x.get("confidence", 0.0)), reverse=True)
+        return scored
+
+    def _refine_from_shared(self, scores: Dict[str, float]) -> List[JSONDict]:
+        # vectors come from the shared matrix, so only metadata is fetched
+        result = (
+            self.client.table("species")
+            .select("id, scientific_name, common_names, primary_image_url")
+            .in_("id", list(scores))
+            .execute()
+        )
+
+        scored: List[JSONDict] = []
+        for species in cast(List[JSONDict], result.data or []):
+            species["confidence"] = scores[species["id"]]
+            scored.append(species)
+
+        return scored
+
+    def _refine_from_rows(self, candidate_ids: List[str], embedding: List[float]) -> List[JSONDict]:
+        result = (
+            self.client.table("species")
+            .select("id, scientific_name, common_names, primary_image_url, embedding")
+            .in_("id", candidate_ids)
+            .execute()
+        )
+
+        rows = cast(List[JSONDict], result.data or [])
+        query_vec = np.array(embedding, dtype=float)
+
+        scored: List[JSONDict] = []
+        for species in rows:
+            emb = species.get("embedding")
+            # pgvector columns come back as "[0.1,0.2,...]" strings
+            if isinstance(emb, str):
+                emb = json.loads(emb)
+            if not emb:
+                continue
+
+            species_vec = np.array(emb, dtype=float)
+            denom = float(np.linalg.norm(query_vec) * np.linalg.norm(species_vec))
+            if denom == 0:
+                continue
+
+            similarity = float(np.dot(query_vec, species_vec) / denom)
+            species["confidence"] = similarity
+            scored.append(species)
+
+        return scored
+
+    def fetch_embeddings(self) -> Tuple[List[str], List[List[float]]]:
+        """Blocking: every species id with its embedding, paged, for the shared store."""
+
+        ids: List[str] = []
+        vectors: List[List[float]] = []
+
+        offset = 0
+        while True:
             result = (
                 self.client.table("species")
-                .select("id, scientific_name, common_names, primary_image_url, embedding")
-                .in_("id", candidate_ids)
+                .select("id, embedding")
+                .order("id")
+                .range(offset, offset + EMBEDDING_PAGE_SIZE - 1)
                 .execute()
             )
-
             rows = cast(List[JSONDict], result.data or [])
-            query_vec = np.array(embedding, dtype=float)
 
-            scored: List[JSONDict] = []
-            for species in rows:
-                emb = species.get("embedding")
-                if not emb:
-                    continue
+            for row in rows:
+                emb = row.get("embedding")
+                # pgvector columns come back as "[0.1,0.2,...]" strings
+                if isinstance(emb, str):
+                    emb = json.loads(emb)
+                if emb:
+                    ids.append(row["id"])
+                    vectors.append(emb)
 
-                species_vec = np.array(emb, dtype=float)
-                denom = float(np.linalg.norm(query_vec) * np.linalg.norm(species_vec))
-                if denom == 0:
-                    continue
-
-                similarity = float(np.dot(query_vec, species_vec) / denom)
-                species["confidence"] = similarity
-                scored.append(species)
-
-            scored.sort(key=lambda x: float(x.get("confidence", 0.0)), reverse=True)
-            return scored
-        except Exception as e:
-            print(f"Error refining with embedding: {e}")
-            return candidates
+            if len(rows) < EMBEDDING_PAGE_SIZE:
+                return ids, vectors
+            offset += EMBEDDING_PAGE_SIZE
 
     async def text_search(self, query: str, limit: int = 20) -> List[JSONDict]:
         try:
@@ -159,19 +273,24 @@ class SupabaseClient:
 
     async def get_cached_identification(self, image_hash: str) -> Optional[JSONDict]:
         try:
-            result = (
+            # newest row wins: tables written before the upsert may hold
+            # several rows for one hash, which .single() would reject
+            result = await asyncio.to_thread(
                 self.client.table("identification_cache")
                 .select("*, species(*)")
                 .eq("image_hash", image_hash)
                 .gt("expires_at", "now()")
-                .single()
-                .execute()
+                .order("created_at", desc=True)
+                .limit(1)
+                .execute
             )
 
-            data = cast(Optional[JSONDict], result.data)
-            if not data:
+            rows = cast(List[JSONDict], result.data or [])
+            if not rows:
                 return None
 
+            data = rows[0]
+
             species = cast(JSONDict, data.get("species") or {})
 
             return {
@@ -194,38 +313,48 @@ class SupabaseClient:
         traits: Dict[str, Any],
         method: str,
     ) -> None:
+        # one row per hash (unique index on image_hash, from
+        # database/migrations/001): concurrent misses and duplicate images
+        # in a batch overwrite instead of piling up
         try:
-            self.client.table("identification_cache").insert(
-                {
-                    "image_hash": image_hash,
-                    "species_id": species_id,
-                    "confidence": confidence,
-                    "traits_extracted": traits,
-                    "method": method,
-                }
-            ).execute()
+            await asyncio.to_thread(
+                self.client.table("identification_cache").upsert(
+                    {
+                        "image_hash": image_hash,
+                        "species_id": species_id,
+                        "confidence": confidence,
+                        "traits_extracted": traits,
+                        "method": method,
+                        "expires_at": (datetime.now(timezone.utc) + CACHE_TTL).isoformat(),
+                    },
+                    on_conflict="image_hash",
+                ).execute
+            )
         except Exception as e:
             print(f"Error caching identification: {e}")
 
     async def increment_cache_hit(self, cache_id: str) -> None:
         try:
-            result = (
-                self.client.table("identification_cache")
-                .select("hit_count")
-                .eq("id", cache_id)
-                .single()
-                .execute()
-            )
-
-            data = cast(Optional[JSONDict], result.data)
-            if not data:
-                return
-
-            current = int(data.get("hit_count") or 0)
-            self.client.table("identification_cache").update({"hit_count": current + 1}).eq("id", cache_id).execute()
+            await asyncio.to_thread(self._increment_cache_hit, cache_id)
         except Exception as e:
             print(f"Error incrementing cache hit: {e}")
 
+    def _increment_cache_hit(self, cache_id: str) -> None:
+        result = (
+            self.client.table("identification_cache")
+            .select("hit_count")
+            .eq("id", cache_id)
+            .single()
+            .execute()
+        )
+
+        data = cast(Optional[JSONDict], result.data)
+        if not data:
+            return
+
+        current = int(data.get("hit_count") or 0)
+        self.client.table("identification_cache").update({"hit_count": current + 1}).eq("id", cache_id).execute()
+
     async def save_feedback(
         self,
         identification_id: str,
@@ -0,0 +1,19 @@
+-- backend/database/migrations/001_identification_cache_unique_image_hash.sql
+--
+-- SupabaseClient.cache_identification upserts with
+-- on_conflict=image_hash; PostgREST rejects that unless image_hash
+-- carries a unique constraint, and the error is swallowed, so without
+-- this index the identification cache never fills.
+
+begin;
+
+-- older tables may hold several rows per hash: keep the newest
+delete from public.identification_cache c
+using public.identification_cache newer
+where c.image_hash = newer.image_hash
+  and (c.created_at, c.id) < (newer.created_at, newer.id);
+
+create unique index if not exists identification_cache_image_hash_key
+    on public.identification_cache (image_hash);
+
+commit;
@@ -0,0 +1,21 @@
+-- backend/database/migrations/002_search_by_traits_batch.sql
+--
+-- Trait search for a whole /identify/batch in one round trip: runs
+-- search_by_traits once per element of `input_traits` (a JSON array of
+-- trait objects) and returns one row per element with its results,
+-- in search_by_traits' own order.
+
+create or replace function public.search_by_traits_batch(input_traits jsonb)
+returns table (query_index int, results jsonb)
+language sql
+stable
+as $$
+    select
+        (q.idx - 1)::int as query_index,
+        coalesce(
+            (select jsonb_agg(to_jsonb(s)) from public.search_by_traits(q.traits) s),
+            '[]'::jsonb
+        ) as results
+    from jsonb_array_elements(input_traits) with ordinality as q(traits, idx)
+    order by q.idx;
+$$;
@@ -1,11 +1,20 @@
-from backend.database import SupabaseClient
-from backend.vision import VisionModel
-from backend.main_state import db, vision
+from typing import TYPE_CHECKING
 
+from backend import main_state
 
-def get_db() -> SupabaseClient:
-    return db
+if TYPE_CHECKING:
+    from backend.database import SupabaseClient
+    from backend.services.job_queue import JobQueue
+    from backend.vision import VisionModel
 
 
-def get_vision() -> VisionModel:
-    return vision
\ No newline at end of file
+def get_db() -> "SupabaseClient":
+    return main_state.get_db()
+
+
+def get_vision() -> "VisionModel":
+    return main_state.get_vision()
+
+
+def get_job_queue() -> "JobQueue":
+    return main_state.get_job_queue()
@@ -0,0 +1,627 @@
+# backend/local_database.py
+import copy
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend.database import CACHE_TTL, JSONDict, SupabaseClient
+
+
+# =========================
+# CONFIG
+# =========================
+
+EMBEDDING_DIM = 384
+
+# rows returned by the search_by_traits / search_by_embedding RPCs
+TRAIT_SEARCH_LIMIT = 50
+EMBEDDING_SEARCH_LIMIT = 20
+
+# petal counts at or above this are stored as "many" in the seed data
+MANY_PETALS = 20
+
+# unique indexes the Supabase project has (database/migrations); upserts
+# may only name these as on_conflict, inserts may not duplicate them
+UNIQUE_KEYS: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "species": (("id",),),
+    "identification_cache": (("id",), ("image_hash",)),
+    "identification_feedback": (("id",),),
+}
+
+
+class LocalAPIError(Exception):
+    """Raised where PostgREST would answer with an error response."""
+
+
+# =========================
+# FAULT INJECTION
+# =========================
+
+class FaultInjector:
+    """
+    Adds latency, jitter and random failures to every executed query so
+    load tests see something closer to a remote database.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = max(latency_ms, 0.0)
+        self.jitter_ms = max(jitter_ms, 0.0)
+        self.error_rate = min(max(error_rate, 0.0), 1.0)
+        self._rng = random.Random(seed)
+        self._lock = Lock()
+
+    def apply(self, operation: str) -> None:
+        with self._lock:
+            delay = self.latency_ms + self._rng.uniform(0.0, self.jitter_ms)
+            fail = self._rng.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if fail:
+            raise LocalAPIError(f"Injected failure in {operation}")
+
+
+# =========================
+# SEED DATA
+# =========================
+
+def seed_embedding(species_id: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Deterministic unit vector per species so vector search is repeatable."""
+
+    seed = int(hashlib.sha256(species_id.encode("utf-8")).hexdigest()[:16], 16)
+    vec = np.random.default_rng(seed).standard_normal(dim)
+    vec /= np.linalg.norm(vec)
+    return vec.astype(float).tolist()
+
+
+def load_seed(path: str) -> List[JSONDict]:
+    with open(path, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+
+    rows = payload.get("species", []) if isinstance(payload, dict) else payload
+
+    species: List[JSONDict] = []
+    for row in rows:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        if not row.get("embedding"):
+            row["embedding"] = seed_embedding(row["id"])
+        species.append(row)
+
+    return species
+
+
+# =========================
+# QUERY BUILDER
+# =========================
+
+Row = Dict[str, Any]
+Predicate = Callable[[Row], bool]
+
+
+class LocalResponse:
+    __slots__ = ("data", "count")
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if value == "now()":
+        return datetime.now(timezone.utc)
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+
+def _greater(left: Any, right: Any) -> bool:
+    if left is None:
+        return False
+
+    left_time, right_time = _parse_time(left), _parse_time(right)
+    if left_time is not None and right_time is not None:
+        return left_time > right_time
+
+    try:
+        return left > right
+    except TypeError:
+        return False
+
+
+def _contains(haystack: Any, needle: Any) -> bool:
+    """Postgres @> for the jsonb / array shapes the app queries."""
+
+    if isinstance(needle, dict):
+        if not isinstance(haystack, dict):
+            return False
+        return all(_contains(haystack.get(k), v) for k, v in needle.items())
+
+    if isinstance(needle, list):
+        if isinstance(haystack, str):
+            haystack = [haystack]
+        if not isinstance(haystack, list):
+            return False
+        return all(item in haystack for item in needle)
+
+    if isinstance(haystack, list):
+        return needle in haystack
+
+    return haystack == needle
+
+
+def _ilike(value: Any, pattern: str) -> bool:
+    if value is None:
+        return False
+    regex = ".*".join(re.escape(part) for part in pattern.split("%"))
+    return re.fullmatch(regex, str(value), flags=re.IGNORECASE | re.DOTALL) is not None
+
+
+def _split_top_level(expr: str) -> List[str]:
+    parts: List[str] = []
+    depth = 0
+    current = ""
+
+    for ch in expr:
+        if ch in "({":
+            depth += 1
+        elif ch in ")}" and depth:
+            depth -= 1
+
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _or_condition(condition: str) -> Predicate:
+    column, op, value = condition.strip().split(".", 2)
+
+    if op == "ilike":
+        return lambda row: _ilike(row.get(column), value)
+
+    if op == "eq":
+        return lambda row: str(row.get(column)) == value
+
+    if op == "cs":
+        items = [v.strip().strip('"') for v in value.strip("{}").split(",") if v.strip()]
+        return lambda row: _contains(row.get(column), items)
+
+    raise LocalAPIError(f"Unsupported filter operator in or(): {op}")
+
+
+class LocalQuery:
+    """
+    The subset of the postgrest-py query builder used by SupabaseClient:
+    select / eq / gt / in_ / or_ / contains / order / range / limit /
+    single, plus insert, upsert and update.
+    """
+
+    def __init__(self, db: "LocalDatabase", table: str):
+        self._db = db
+        self._table = table
+        self._columns: List[str] = ["*"]
+        self._embeds: List[str] = []
+        self._count = False
+        self._filters: List[Predicate] = []
+        self._order: Optional[Tuple[str, bool]] = None
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._single = False
+        self._insert: Optional[List[Row]] = None
+        self._on_conflict: List[str] = []
+        self._update: Optional[Row] = None
+
+    # ------------------------
+    # Builders
+    # ------------------------
+
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "LocalQuery":
+        self._columns = []
+        self._embeds = []
+        for part in _split_top_level(columns):
+            part = part.strip()
+            match = re.fullmatch(r"(\w+)\(\*\)", part)
+            if match:
+                self._embeds.append(match.group(1))
+            elif part:
+                self._columns.append(part)
+        self._count = count == "exact"
+        return self
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column: str, value: Any) -> "LocalQuery":
+        self._filters.append(lambda row: _greater(row.get(column), value))
+        return self
+
+    def in_(self, column: str, values: List[Any]) -> "LocalQuery":
+        wanted = set(values)
+        self._filters.append(lambda row: row.get(column) in wanted)
+        return self
+
+    def or_(self, expr: str) -> "LocalQuery":
+        conditions = [_or_condition(c) for c in _split_top_level(expr)]
+        self._filters.append(lambda row: any(cond(row) for cond in conditions))
+        return self
+
+    def contains(self, column: str, value: Any) -> "LocalQuery":
+        self._filters.append(lambda row: _contains(row.get(column), value))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "LocalQuery":
+        self._order = (column, desc)
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    def limit(self, size: int) -> "LocalQuery":
+        self._limit = size
+        return self
+
+    def single(self) -> "LocalQuery":
+        self._single = True
+        return self
+
+    def insert(self, values: Any) -> "LocalQuery":
+        self._insert = values if isinstance(values, list) else [values]
+        return self
+
+    def upsert(self, values: Any, on_conflict: str = "") -> "LocalQuery":
+        self._insert = values if isinstance(values, list) else [values]
+        self._on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()]
+        return self
+
+    def update(self, values: Row) -> "LocalQuery":
+        self._update = dict(values)
+        return self
+
+    # ------------------------
+    # Execution
+    # ------------------------
+
+    def execute(self) -> LocalResponse:
+        self._db.faults.apply(self._table)
+
+        with self._db.lock:
+            if self._insert is not None:
+                rows = [self._db.upsert_row(self._table, row, self._on_conflict) for row in self._insert]
+                return LocalResponse(copy.deepcopy(rows))
+
+            matched = [row for row in self._db.rows(self._table) if all(f(row) for f in self._filters)]
+
+            if self._update is not None:
+                for row in matched:
+                    row.update(self._update)
+                return LocalResponse(copy.deepcopy(matched))
+
+            total = len(matched)
+
+            if self._order is not None:
+                column, desc = self._order
+                present = [r for r in matched if r.get(column) is not None]
+                missing = [r for r in matched if r.get(column) is None]
+                present.sort(key=lambda r: r[column], reverse=desc)
+                # postgres puts NULLs first on DESC, last on ASC
+                matched = missing + present if desc else present + missing
+
+            end = None if self._limit is None else self._offset + self._limit
+            matched = matched[self._offset:end]
+
+            data = [self._project(row) for row in matched]
+
+        if self._single:
+            if len(data) != 1:
+                raise LocalAPIError(f"JSON object requested, multiple (or no) rows returned ({len(data)})")
+            return LocalResponse(data[0], total if self._count else None)
+
+        return LocalResponse(data, total if self._count else None)
+
+    def _project(self, row: Row) -> Row:
+        if "*" in self._columns:
+            out = copy.deepcopy(row)
+        else:
+            out = {col: copy.deepcopy(row.get(col)) for col in self._columns}
+
+        for embed in self._embeds:
+            target = self._db.find(embed, row.get(f"{embed}_id"))
+            out[embed] = copy.deepcopy(target)
+
+        return out
+
+
+class LocalRpc:
+    __slots__ = ("_db", "_name", "_params")
+
+    def __init__(self, db: "LocalDatabase", name: str, params: Dict[str, Any]):
+        self._db = db
+        self._name = name
+        self._params = params
+
+    def execute(self) -> LocalResponse:
+        self._db.faults.apply(f"rpc:{self._name}")
+
+        handler = RPC_HANDLERS.get(self._name)
+        if handler is None:
+            raise LocalAPIError(f"Could not find the function public.{self._name}")
+
+        with self._db.lock:
+            return LocalResponse(handler(self._db, **self._params))
+
+
+# =========================
+# STORE
+# =========================
+
+class LocalDatabase:
+    """
+    In-memory tables plus the app's RPCs, exposed through the same
+    `table()` / `rpc()` entry points as the supabase Client.
+    """
+
+    def __init__(self, species: List[JSONDict], faults: Optional[FaultInjector] = None):
+        self.tables: Dict[str, List[Row]] = {
+            "species": [dict(row) for row in species],
+            "identification_cache": [],
+            "identification_feedback": [],
+        }
+        self.faults = faults or FaultInjector()
+        self.lock = Lock()
+
+        self._embedding_ids = [row["id"] for row in self.tables["species"]]
+        matrix = np.array([row["embedding"] for row in self.tables["species"]], dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True) if len(matrix) else 1.0
+        self._embeddings = matrix / np.maximum(norms, 1e-12)
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    def rows(self, name: str) -> List[Row]:
+        if name not in self.tables:
+            raise LocalAPIError(f"relation \"public.{name}\" does not exist")
+        return self.tables[name]
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> LocalRpc:
+        return LocalRpc(self, name, params or {})
+
+    def find(self, table: str, row_id: Any) -> Optional[Row]:
+        for row in self.tables.get(table, []):
+            if row.get("id") == row_id:
+                return row
+        return None
+
+    def insert_row(self, table: str, values: Row) -> Row:
+        now = datetime.now(timezone.utc)
+
+        row = dict(values)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", now.isoformat())
+
+        if table == "identification_cache":
+            row.setdefault("expires_at", (now + CACHE_TTL).isoformat())
+            row.setdefault("hit_count", 0)
+
+        rows = self.rows(table)
+        for key in UNIQUE_KEYS.get(table, ()):
+            # NULLs never conflict, as in postgres
+            if any(row.get(col) is None for col in key):
+                continue
+            if any(all(r.get(col) == row.get(col) for col in key) for r in rows):
+                raise LocalAPIError(
+                    f"duplicate key value violates unique constraint on {table} ({', '.join(key)})"
+                )
+
+        rows.append(row)
+        return row
+
+    def upsert_row(self, table: str, values: Row, on_conflict: List[str]) -> Row:
+        # plain insert when no conflict columns are given
+        if on_conflict:
+            if tuple(on_conflict) not in UNIQUE_KEYS.get(table, ()):
+                # what PostgREST answers without a matching unique index
+                raise LocalAPIError(
+                    "there is no unique or exclusion constraint matching the ON CONFLICT specification"
+                )
+
+            for row in self.rows(table):
+                if all(row.get(col) == values.get(col) for col in on_conflict):
+                    row.update(values)
+                    return row
+
+        return self.insert_row(table, values)
+
+    def similar(self, query_embedding: List[float], count: int) -> List[Tuple[Row, float]]:
+        if not len(self._embeddings):
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0 or query.shape[0] != self._embeddings.shape[1]:
+            return []
+
+        scores = self._embeddings @ (query / norm)
+        order = np.argsort(-scores)[:count]
+        return [(self.find("species", self._embedding_ids[i]), float(scores[i])) for i in order]
+
+
+# =========================
+# RPCS
+# =========================
+
+TRAIT_FIELDS = (
+    "petal_count",
+    "petal_shape_outer",
+    "petal_shape_inner",
+    "petal_overlap",
+    "petal_margin",
+    "bloom_openness",
+)
+
+# species columns returned by the search RPCs (no embedding)
+SPECIES_COLUMNS = (
+    "id",
+    "scientific_name",
+    "common_names",
+    "family",
+    "primary_image_url",
+    "thumbnail_url",
+    "traits",
+)
+
+
+def _trait_matches(field: str, wanted: Any, actual: Any) -> bool:
+    if actual is None:
+        return False
+
+    if field == "petal_count":
+        try:
+            wanted_n, actual_n = int(wanted), int(actual)
+        except (TypeError, ValueError):
+            return False
+        if wanted_n >= MANY_PETALS and actual_n >= MANY_PETALS:
+            return True
+        return abs(wanted_n - actual_n) <= 1
+
+    wanted_set = {str(v).lower() for v in (wanted if isinstance(wanted, list) else [wanted])}
+    actual_set = {str(v).lower() for v in (actual if isinstance(actual, list) else [actual])}
+    return bool(wanted_set & actual_set)
+
+
+def _species_result(row: Row) -> Row:
+    out = {col: copy.deepcopy(row.get(col)) for col in SPECIES_COLUMNS}
+    # flattened trait columns, as the SQL function returns them
+    for field, value in (row.get("traits") or {}).items():
+        out.setdefault(field, copy.deepcopy(value))
+    return out
+
+
+def _rpc_search_by_traits(db: LocalDatabase, input_traits: Optional[Dict[str, Any]] = None) -> List[Row]:
+    """
+    Species agreeing with at least half of the non-null input traits,
+    best agreement first.
+    """
+
+    wanted = {k: v for k, v in (input_traits or {}).items() if k in TRAIT_FIELDS and v is not None}
+    if not wanted:
+        return []
+
+    needed = (len(wanted) + 1) // 2
+
+    scored: List[Tuple[int, str, Row]] = []
+    for row in db.rows("species"):
+        traits = row.get("traits") or {}
+        hits = sum(_trait_matches(k, v, traits.get(k)) for k, v in wanted.items())
+        if hits >= needed:
+            scored.append((hits, str(row.get("scientific_name") or ""), row))
+
+    scored.sort(key=lambda item: (-item[0], item[1]))
+
+    results: List[Row] = []
+    for hits, _, row in scored[:TRAIT_SEARCH_LIMIT]:
+        result = _species_result(row)
+        result["trait_matches"] = hits
+        results.append(result)
+    return results
+
+
+def _rpc_search_by_traits_batch(db: LocalDatabase, input_traits: Optional[List[Dict[str, Any]]] = None) -> List[Row]:
+    """One {query_index, results} row per trait object, like the SQL function."""
+
+    return [
+        {"query_index": i, "results": _rpc_search_by_traits(db, traits)}
+        for i, traits in enumerate(input_traits or [])
+    ]
+
+
+def _rpc_search_by_embedding(db: LocalDatabase, query_embedding: Optional[List[float]] = None) -> List[Row]:
+    results: List[Row] = []
+    for row, similarity in db.similar(query_embedding or [], EMBEDDING_SEARCH_LIMIT):
+        result = _species_result(row)
+        result["confidence"] = similarity
+        results.append(result)
+    return results
+
+
+def _rpc_match_species(
+    db: LocalDatabase,
+    query_embedding: Optional[List[float]] = None,
+    match_threshold: float = 0.5,
+    match_count: int = 5,
+) -> List[Row]:
+    return [
+        {
+            "species_id": row.get("id"),
+            "scientific_name": row.get("scientific_name"),
+            "common_names": copy.deepcopy(row.get("common_names")),
+            "similarity": similarity,
+        }
+        for row, similarity in db.similar(query_embedding or [], match_count)
+        if similarity > match_threshold
+    ]
+
+
+RPC_HANDLERS: Dict[str, Callable[..., List[Row]]] = {
+    "search_by_traits": _rpc_search_by_traits,
+    "search_by_traits_batch": _rpc_search_by_traits_batch,
+    "search_by_embedding": _rpc_search_by_embedding,
+    "match_species": _rpc_match_species,
+}
+
+
+# =========================
+# CLIENT
+# =========================
+
+class LocalSupabaseClient(SupabaseClient):
+    """
+    SupabaseClient backed by LocalDatabase instead of a Supabase project.
+
+    Every query method is inherited unchanged, so the local backend runs
+    the same code paths as production; only the transport differs.
+    Selected with DATABASE_BACKEND=local.
+    """
+
+    def __init__(
+        self,
+        seed_path: Optional[str] = None,
+        latency_ms: Optional[float] = None,
+        jitter_ms: Optional[float] = None,
+        error_rate: Optional[float] = None,
+    ):
+        faults = FaultInjector(
+            latency_ms=settings.LOCAL_DB_LATENCY_MS if latency_ms is None else latency_ms,
+            jitter_ms=settings.LOCAL_DB_JITTER_MS if jitter_ms is None else jitter_ms,
+            error_rate=settings.LOCAL_DB_ERROR_RATE if error_rate is None else error_rate,
+            seed=settings.LOCAL_DB_RANDOM_SEED,
+        )
+        species = load_seed(seed_path or settings.LOCAL_DB_SEED_PATH)
+
+        self.client: Any = LocalDatabase(species, faults)
+        self._connected = True
+
+        print(f"🗄️ Local database loaded ({len(species)} species)")
@@ -1,9 +1,8 @@
-import os
+import asyncio
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -11,15 +10,21 @@ from slowapi.util import get_remote_address
 
 from backend.api.routes import (
     catalogue,
+    debug,
     feedback,
     health,
     identify,
+    metrics,
     search,
     species,
 )
 
+from backend import main_state
 from backend.config import settings
-from backend.main_state import vision
+from backend.services.admission import AdmissionController, Overloaded
+from backend.services.debug_store import debug_store
+from backend.services.warmup import run_warmup
+from backend.upload_limit import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
 
 
 # 🔥 CREATE APP
@@ -33,7 +38,19 @@ origins = settings.CORS_ORIGINS
 print("✅ CORS origins:", origins)
 
 
+# 🔥 UPLOAD SIZE LIMITS (enforced while the body streams in)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/v1/identify": settings.MAX_IMAGE_BYTES + MULTIPART_OVERHEAD_BYTES,
+        "/api/v1/identify/batch": settings.MAX_BATCH_IMAGES * (settings.MAX_IMAGE_BYTES + MULTIPART_OVERHEAD_BYTES),
+        "/api/v1/identify/jobs": settings.MAX_IMAGE_BYTES + MULTIPART_OVERHEAD_BYTES,
+    },
+)
+
 # ADD CORS (CORRECTLY)
+# added last so it is outermost: early rejections from the middleware
+# above (413) still carry the CORS headers browsers need
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -42,12 +59,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 🔥 DEBUG IMAGE FOLDER
-DEBUG_DIR = "/tmp/calyx_debug"
-os.makedirs(DEBUG_DIR, exist_ok=True)
+# 🔥 ADMISSION CONTROL
+# /identify and /identify/batch take a slot per image around pipeline
+# work, after the upload has been read; see services/admission.py
+app.state.identify_admission = (
+    AdmissionController(
+        "identify",
+        max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        target_seconds=settings.ADMISSION_TARGET_MS / 1000,
+        interval_seconds=settings.ADMISSION_INTERVAL_MS / 1000,
+    )
+    if settings.ADMISSION_ENABLED else None
+)
 
-app.mount("/debug", StaticFiles(directory=DEBUG_DIR), name="debug")
 
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server overloaded, retry shortly", "reason": exc.decision},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 # 🔥 RATE LIMITING
 def rate_limit_key(request: Request) -> str:
@@ -67,12 +100,58 @@ async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
 # 🔥 STARTUP
 @app.on_event("startup")
 async def startup_event():
+    # clients are built here, not at import, so a missing env var fails
+    # startup with a clear error instead of breaking `import backend.main`
+    await asyncio.to_thread(main_state.init_state)
+    db = main_state.get_db()
+    vision = main_state.get_vision()
+
     await vision.load_model()
     print("✅ Vision model loaded")
 
+    app.state.embedding_sync = None
+    if settings.EMBEDDING_STORE_PATH:
+        from backend.services.embedding_store import sync_embeddings
+
+        # already mapped when a preloading master published it before forking
+        db.embeddings = main_state.get_embeddings()
+        app.state.embedding_sync = asyncio.create_task(
+            sync_embeddings(db, db.embeddings, settings.EMBEDDING_REFRESH_SECONDS)
+        )
+
+    from backend.services.job_queue import JobWorkers
+
+    async def _run_job(payload, use_cache):
+        from backend.services.identify_service import run_identify_job
+
+        return await run_identify_job(payload, use_cache, db=db, vision=vision)
+
+    app.state.job_workers = JobWorkers(
+        main_state.get_job_queue(),
+        _run_job,
+        concurrency=settings.JOB_WORKERS,
+    )
+    app.state.job_workers.start()
+    print(f"✅ {settings.JOB_WORKERS} identify job workers started")
+
+    # readiness (/health/ready) flips once this finishes; liveness does not wait
+    app.state.warmup = asyncio.create_task(run_warmup(db, vision))
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.warmup.cancel()
+    if app.state.embedding_sync is not None:
+        app.state.embedding_sync.cancel()
+    await app.state.job_workers.stop()
+    await debug_store.close()
+    main_state.get_job_queue().close()
+
 
 # 🔥 ROUTERS
 app.include_router(health.router)
+app.include_router(metrics.router)
+app.include_router(debug.router)
 app.include_router(identify.router, prefix="/api/v1")
 app.include_router(search.router, prefix="/api/v1")
 app.include_router(species.router, prefix="/api/v1")
@@ -1,5 +1,124 @@
-from backend.database import SupabaseClient
-from backend.vision import VisionModel
+# backend/main_state.py
+"""
+Process-wide clients, built on first use (normally by the startup
+handler) rather than at import time. Importing this module stays cheap
+and does not need SUPABASE_URL / HF_TOKEN to be set.
+"""
 
-db = SupabaseClient()
-vision = VisionModel()
\ No newline at end of file
+from threading import Lock
+from typing import TYPE_CHECKING, Optional
+
+from backend.config import settings
+
+if TYPE_CHECKING:
+    from backend.database import SupabaseClient
+    from backend.services.embedding_store import SharedEmbeddings
+    from backend.services.job_queue import JobQueue
+    from backend.vision import VisionModel
+
+
+_lock = Lock()
+
+_db: Optional["SupabaseClient"] = None
+_vision: Optional["VisionModel"] = None
+_job_queue: Optional["JobQueue"] = None
+_embeddings: Optional["SharedEmbeddings"] = None
+
+
+def _build_db() -> "SupabaseClient":
+    if settings.DATABASE_BACKEND == "local":
+        from backend.local_database import LocalSupabaseClient
+
+        return LocalSupabaseClient()
+
+    from backend.database import SupabaseClient
+
+    return SupabaseClient()
+
+
+def _build_vision() -> "VisionModel":
+    if settings.VISION_BACKEND == "stub":
+        from backend.stub_vision import StubVisionModel
+
+        return StubVisionModel()
+
+    from backend.vision import VisionModel
+
+    return VisionModel()
+
+
+def init_shared_state() -> None:
+    """
+    Builds only the clients that hold no sockets or file handles and so
+    can be built once in a pre-fork master and inherited by workers:
+    the vision model and, with the local backend, the in-memory species
+    table. The Supabase client and the job queue's sqlite connection
+    are left for each worker's init_state().
+    """
+
+    global _db, _vision
+
+    with _lock:
+        if _db is None and settings.DATABASE_BACKEND == "local":
+            _db = _build_db()
+        if _vision is None:
+            _vision = _build_vision()
+
+
+def init_state() -> None:
+    """Builds any client that does not exist yet; safe to call repeatedly."""
+
+    global _db, _vision, _job_queue
+
+    with _lock:
+        if _db is None:
+            _db = _build_db()
+        if _vision is None:
+            _vision = _build_vision()
+        if _job_queue is None:
+            from backend.services.job_queue import JobQueue
+
+            _job_queue = JobQueue(
+                settings.JOB_QUEUE_PATH,
+                lease_seconds=settings.JOB_LEASE_SECONDS,
+                dedup_ttl_seconds=settings.JOB_DEDUP_TTL_SECONDS,
+                retention_seconds=settings.JOB_RETENTION_SECONDS,
+            )
+
+
+def get_db() -> "SupabaseClient":
+    if _db is None:
+        init_state()
+    return _db
+
+
+def get_vision() -> "VisionModel":
+    if _vision is None:
+        init_state()
+    return _vision
+
+
+def get_embeddings() -> Optional["SharedEmbeddings"]:
+    """
+    This process's handle on the node-wide embedding matrix, None
+    without EMBEDDING_STORE_PATH. A handle mapped by a pre-fork master
+    is inherited (read-only pages) by every worker.
+    """
+
+    global _embeddings
+
+    if not settings.EMBEDDING_STORE_PATH:
+        return None
+
+    with _lock:
+        if _embeddings is None:
+            from backend.services.embedding_store import SharedEmbeddings
+
+            _embeddings = SharedEmbeddings(settings.EMBEDDING_STORE_PATH)
+        return _embeddings
+
+
+def get_job_queue() -> "JobQueue":
+    if _job_queue is None:
+        init_state()
+    return _job_queue
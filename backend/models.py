@@ -48,6 +48,20 @@ class GrowingInfo(BaseModel):
         return v or []
 
 
+class FlowerIdentification(BaseModel):
+    """One flower of a multi-flower image (MULTI_FLOWER mode)."""
+    cluster_id: int
+    centre: List[int]
+    species_id: Optional[str] = None
+    scientific_name: str
+    common_names: List[str]
+    confidence: float
+    primary_image_url: Optional[str] = None
+    method: Optional[str] = None
+    traits_extracted: Optional[dict] = None
+    alternatives: Optional[list] = None
+
+
 class IdentificationResponse(BaseModel):
     species_id: Optional[str] = None
     scientific_name: str
@@ -59,6 +73,8 @@ class IdentificationResponse(BaseModel):
     traits_extracted: Optional[dict] = None
     alternatives: Optional[list] = None
     response_time_ms: Optional[int] = None
+    # multi-flower mode: one entry per detected flower, primary first
+    flowers: Optional[List[FlowerIdentification]] = None
 
 
 class SearchResponse(BaseModel):
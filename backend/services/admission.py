@@ -0,0 +1,211 @@
+# backend/services/admission.py
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from backend.config import settings
+from backend.services.metrics import counter, gauge, histogram
+
+
+DEGRADED_HEADER = "X-Calyx-Degraded"
+
+DECISION_ADMITTED = "admitted"
+DECISION_DEGRADED = "degraded"
+DECISION_SHED_QUEUE_FULL = "shed_queue_full"
+DECISION_SHED_TIMEOUT = "shed_timeout"
+
+# service-time EWMA weight for the Retry-After estimate
+SERVICE_EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    def __init__(self, decision: str, retry_after: int):
+        super().__init__(decision)
+        self.decision = decision
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Concurrency limit with a CoDel-style bound on queueing delay.
+
+    At most `max_concurrent` pipelines run; the rest wait for a slot.
+    While the queue keeps draining (it was empty at some point in the
+    last `interval`) a waiter may queue for up to `interval`. Once it
+    has stood non-empty for a whole interval the server is overloaded
+    and waiters are only allowed `target` before being shed, so the
+    queue drains back to short, fast failures instead of every request
+    slowing down together. Under overload admitted requests can also
+    be flagged to run in a cheaper mode.
+
+    Callers take a slot around pipeline work only (after the upload
+    has been read), one per image, so a batch counts as many requests.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent: int,
+        max_queue: int,
+        target_seconds: float,
+        interval_seconds: float,
+    ):
+        self.name = name
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max(max_queue, 0)
+        self.target = target_seconds
+        self.interval = interval_seconds
+
+        self._inflight = 0
+        self._waiters: List[asyncio.Future] = []
+        self._last_empty = time.monotonic()
+        self._service_ewma = 0.0
+
+        labels = {"route": name}
+        self._delay = histogram(
+            "calyx_admission_queue_delay_seconds",
+            labels,
+            "Time admitted requests waited for a pipeline slot",
+        )
+        self._inflight_gauge = gauge("calyx_admission_inflight", labels, "Requests holding a pipeline slot")
+        self._queued_gauge = gauge("calyx_admission_queued", labels, "Requests waiting for a pipeline slot")
+        self._overloaded_gauge = gauge(
+            "calyx_admission_overloaded",
+            labels,
+            "1 while the admission queue has not drained for a full interval",
+        )
+
+    # =========================
+    # STATE
+    # =========================
+
+    def overloaded(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if not self._waiters:
+            self._last_empty = now
+            return False
+        return now - self._last_empty >= self.interval
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue should have drained, at least 1."""
+
+        service = self._service_ewma or self.target
+        backlog = (len(self._waiters) + self._inflight) / self.max_concurrent
+        return max(1, min(math.ceil(backlog * service), 30))
+
+    def record(self, decision: str) -> None:
+        counter(
+            "calyx_admission_decisions_total",
+            {"route": self.name, "decision": decision},
+            "Admission control outcomes for pipeline requests",
+        ).inc()
+
+    def _publish(self) -> None:
+        self._inflight_gauge.set(self._inflight)
+        self._queued_gauge.set(len(self._waiters))
+        self._overloaded_gauge.set(1 if self.overloaded() else 0)
+
+    # =========================
+    # SLOTS
+    # =========================
+
+    async def acquire(self) -> bool:
+        """
+        Waits for a slot. Returns True when the server was overloaded
+        at admission (callers may degrade); raises Overloaded when shed.
+        Admitted requests are recorded by the caller, which knows
+        whether it degraded them.
+        """
+
+        now = time.monotonic()
+
+        if self._inflight < self.max_concurrent and not self._waiters:
+            self._inflight += 1
+            self._last_empty = now
+            self._delay.observe(0.0)
+            self._publish()
+            return False
+
+        if len(self._waiters) >= self.max_queue:
+            self.record(DECISION_SHED_QUEUE_FULL)
+            raise Overloaded(DECISION_SHED_QUEUE_FULL, self.retry_after())
+
+        overloaded = self.overloaded(now)
+        timeout = self.target if overloaded else self.interval
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # slot handed over just as the timeout fired; give it back
+                self._release_slot()
+            self.record(DECISION_SHED_TIMEOUT)
+            raise Overloaded(DECISION_SHED_TIMEOUT, self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            if not self._waiters:
+                self._last_empty = time.monotonic()
+            self._publish()
+
+        self._delay.observe(time.monotonic() - now)
+        return overloaded or self.overloaded()
+
+    def release(self, service_seconds: float) -> None:
+        self._service_ewma = (
+            service_seconds if not self._service_ewma
+            else (1 - SERVICE_EWMA_ALPHA) * self._service_ewma + SERVICE_EWMA_ALPHA * service_seconds
+        )
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        # hand the slot straight to the oldest waiter still waiting
+        while self._waiters:
+            waiter = self._waiters.pop(0)
+            if not waiter.done():
+                waiter.set_result(None)
+                self._publish()
+                return
+
+        self._inflight -= 1
+        self._publish()
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[str]:
+        """
+        Holds a slot for the body. Yields the pose mode the work was
+        degraded to, "" when it runs normally. With
+        ADMISSION_DEGRADE_POSE_MODE set, work admitted while overloaded
+        runs pose extraction in that cheaper mode. Raises Overloaded
+        when shed.
+        """
+
+        overloaded = await self.acquire()
+
+        degrade_mode = settings.ADMISSION_DEGRADE_POSE_MODE if overloaded else ""
+        self.record(DECISION_DEGRADED if degrade_mode else DECISION_ADMITTED)
+
+        token = None
+        if degrade_mode:
+            # the pipeline is loaded by now; importing it here keeps app import light
+            from backend.services.pose_extractor import pose_mode_override
+
+            token = pose_mode_override.set(degrade_mode)
+
+        start = time.monotonic()
+        try:
+            yield degrade_mode
+        finally:
+            self.release(time.monotonic() - start)
+            if token is not None:
+                pose_mode_override.reset(token)
@@ -0,0 +1,85 @@
+# backend/services/batching.py
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects single-item calls from concurrent per-image pipelines and
+    runs them as one batch call.
+
+    A batch is flushed as soon as every still-expected caller has
+    submitted, or after `max_wait` seconds so stragglers never stall
+    the rest. Callers that will never submit (e.g. their image failed
+    to decode) must call `discard()` so the batch is not held up.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[T]], Awaitable[List[R]]],
+        expected: int,
+        max_wait: float = 0.05,
+    ):
+        self._run_batch = run_batch
+        self._remaining = expected
+        self._max_wait = max_wait
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+
+    async def submit(self, item: T) -> R:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self._remaining:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._max_wait, self._flush)
+
+        return await future
+
+    def discard(self) -> None:
+        self._remaining -= 1
+
+        if self._pending and len(self._pending) >= self._remaining:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self._remaining -= len(batch)
+
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            results: List[Any] = await self._run_batch([item for item, _ in batch])
+
+            # results pair with items by position; a short or long list
+            # cannot be matched up, so fail the whole batch
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch call returned {len(results)} results for {len(batch)} items")
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # cancelled mid-call: never leave a caller waiting
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
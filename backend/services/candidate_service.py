@@ -1,6 +1,10 @@
+import asyncio
+import json
 import math
 from typing import Any, Dict, List, Tuple
 
+from backend.services.metrics import span
+
 JSONDict = Dict[str, Any]
 
 WEIGHTS = {
@@ -216,11 +220,10 @@ def rank_candidates(candidates: List[JSONDict], traits: Dict[str, Any]) -> List[
     return ranked
 
 
-async def resolve_candidates(
+async def search_trait_candidates(
     db,
     traits: Dict[str, Any],
-    embedding: List[float],
-) -> Tuple[List[JSONDict], str, bool, Dict[str, Any]]:
+) -> List[JSONDict]:
 
     print("\n================ TRAIT PIPELINE DEBUG ================")
 
@@ -238,20 +241,76 @@ async def resolve_candidates(
 
     print("=====================================================\n")
 
-    # 1. Trait search
-    candidates = await db.rpc(
-        "search_by_traits",
-        {"input_traits": flat_traits}
-    )
+    with span("search_by_traits"):
+        return await db.rpc(
+            "search_by_traits",
+            {"input_traits": flat_traits}
+        )
+
+
+async def search_trait_candidates_batch(
+    db,
+    traits_list: List[Dict[str, Any]],
+) -> List[List[JSONDict]]:
+    """
+    Trait search for many images at once. Photos from one survey mostly
+    flatten to a handful of distinct trait rows, so each distinct row is
+    sent once, all of them in a single search_by_traits_batch call, and
+    the results are fanned back out.
+    """
+
+    keys = [
+        json.dumps(_flatten_traits_for_db(traits), sort_keys=True, default=str)
+        for traits in traits_list
+    ]
+
+    unique = list(dict.fromkeys(keys))
+
+    with span("search_by_traits_batch"):
+        try:
+            rows = await db.rpc(
+                "search_by_traits_batch",
+                {"input_traits": [json.loads(key) for key in unique]}
+            )
+            results: List[List[JSONDict]] = [[] for _ in unique]
+            for row in rows:
+                results[int(row["query_index"])] = list(row.get("results") or [])
+        except Exception as e:
+            # databases without migrations/002 yet: one call per row
+            print(f"⚠️ search_by_traits_batch failed ({e}); searching per trait row")
+            results = await asyncio.gather(*[
+                db.rpc("search_by_traits", {"input_traits": json.loads(key)})
+                for key in unique
+            ])
+
+    by_key = dict(zip(unique, results))
+
+    # copies: ranking mutates nothing, but callers own their lists
+    return [list(by_key[key]) for key in keys]
+
+
+async def resolve_candidates(
+    db,
+    traits: Dict[str, Any],
+    embedding: List[float],
+    candidates: List[JSONDict] | None = None,
+) -> Tuple[List[JSONDict], str, bool, Dict[str, Any]]:
+
+    # 1. Trait search (skipped when the caller already prefetched it)
+    if candidates is None:
+        candidates = await search_trait_candidates(db, traits)
+
+    flat_traits = _flatten_traits_for_db(traits)
 
     if not candidates:
         print("[NO TRAIT MATCHES] → falling back to embedding")
 
         if embedding:
-            fallback = await db.rpc(
-                "search_by_embedding",
-                {"query_embedding": embedding}
-            )
+            with span("search_by_embedding"):
+                fallback = await db.rpc(
+                    "search_by_embedding",
+                    {"query_embedding": embedding}
+                )
             return fallback[:20], "vector_shortlist", False, traits
 
         return [], "no_match", False, traits
@@ -280,7 +339,8 @@ async def resolve_candidates(
     print("=========================================\n")
 
     if embedding:
-        refined = await db.refine_with_embedding(ranked, embedding)
+        with span("refine_with_embedding"):
+            refined = await db.refine_with_embedding(ranked, embedding)
 
         if refined:
             if len(refined) == 1:
@@ -5,6 +5,8 @@ import colorsys
 import numpy as np
 from PIL import Image
 
+from backend.services.geometry_fields import ring_masks
+
 
 COLOR_RANGES = [
     {"label": "red", "hue_ranges": [(0, 12), (345, 360)], "min_sat": 0.20, "min_val": 0.15},
@@ -103,20 +105,9 @@ def _collapse_to_family(label: str) -> str:
 
 
 def _region_masks(h: int, w: int, centre_point: tuple[float, float] | None = None):
-    yy, xx = np.mgrid[0:h, 0:w]
-
-    if centre_point is None:
-        cx, cy = w / 2.0, h / 2.0
-    else:
-        cx, cy = centre_point
-
-    dist = np.sqrt((xx - cx) ** 2 + (yy - cy) ** 2)
-    dist = dist / (np.max(dist) + 1e-6)
-
-    inner = dist <= 0.24
-    outer = (dist > 0.24) & (dist <= 0.82)
-
-    return inner, outer
+    # default-centre masks are cached and read-only; off-centre ones are
+    # sliced from a shared per-size canvas
+    return ring_masks(h, w, centre=centre_point, inner=0.24, outer=0.82)
 
 
 def _filter_pixels_for_region(
@@ -159,8 +150,8 @@ def _filter_pixels_for_region(
 
     return filtered_rgb, filtered_hsv
 
-def estimate_color_blending(arr:np.ndarray) -> str:
-    #assume arr is RGB float [0-1]
+def estimate_color_blending(arr: np.ndarray) -> str:
+    # arr is RGB float [0-1]
     diff = np.abs(np.diff(arr, axis=1)).mean() + np.abs(np.diff(arr, axis=0)).mean()
 
     if diff < 0.05:
@@ -236,14 +227,36 @@ def extract_color_traits(
 ) -> Dict[str, Any]:
 
     pose_traits = pose_traits or {}
-    image_metadata = image_metadata or {}
 
-    centre_point = pose_traits.get("centre_point")
+    rgb = np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0
+    h, w, _ = rgb.shape
+
+    hsv = _to_hsv_pixels(img).reshape(h, w, 3)
+
+    return compute_color_traits(
+        rgb,
+        hsv,
+        centre_point=pose_traits.get("centre_point"),
+        image_metadata=image_metadata,
+    )
+
+
+def compute_color_traits(
+    rgb: np.ndarray,
+    hsv: np.ndarray,
+    centre_point: tuple[float, float] | None = None,
+    image_metadata: Dict[str, Any] | None = None
+) -> Dict[str, Any]:
+    """
+    Colour traits from precomputed RGB (0-1) and HSV (hue degrees,
+    sat/val 0-1) planes, e.g. one flower's window of the shared planes.
+    """
+
+    image_metadata = image_metadata or {}
 
     std_val = float(image_metadata.get("vibrance", 0.0))
     entropy_val = float(image_metadata.get("entropy", 0.0))
 
-    rgb = np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0
     h, w, _ = rgb.shape
 
     # fallback safety
@@ -256,8 +269,6 @@ def extract_color_traits(
         prob = hist / (hist.sum() + 1e-6)
         entropy_val = float(-np.sum(prob * np.log2(prob + 1e-9)))
 
-    hsv = _to_hsv_pixels(img).reshape(h, w, 3)
-
     inner_mask, outer_mask = _region_masks(h, w, centre_point=centre_point)
 
     inner_rgb = rgb[inner_mask]
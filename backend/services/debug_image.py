@@ -2,8 +2,8 @@ from PIL import Image, ImageDraw
 from typing import Dict, Any
 from fastapi import Request
 
+import io
 import uuid
-from pathlib import Path
 
 import numpy as np
 
@@ -12,8 +12,6 @@ import numpy as np
 # CONFIG
 # =========================
 
-DEBUG_DIR = Path("/tmp/calyx_debug")
-
 BLUE = (0, 180, 255)
 
 
@@ -124,27 +122,26 @@ def generate_debug_image(
 
 
 # =========================
-# SAVE IMAGE
+# ENCODE IMAGE
 # =========================
 
-def save_debug_image(image: Image.Image) -> str:
+def new_debug_filename() -> str:
+    return f"{uuid.uuid4().hex}.jpg"
 
-    DEBUG_DIR.mkdir(
-        parents=True,
-        exist_ok=True
-    )
 
-    filename = f"{uuid.uuid4().hex}.jpg"
+def encode_debug_image(
+    image: Image.Image
+) -> bytes:
 
-    filepath = DEBUG_DIR / filename
+    buffer = io.BytesIO()
 
     image.save(
-        filepath,
+        buffer,
         "JPEG",
         quality=95
     )
 
-    return filename
+    return buffer.getvalue()
 
 
 # =========================
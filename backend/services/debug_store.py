@@ -0,0 +1,305 @@
+# backend/services/debug_store.py
+import asyncio
+import os
+import sqlite3
+import time
+from threading import Lock
+from typing import Callable, List, Optional, Tuple
+
+from backend.config import settings
+from backend.services.metrics import counter, gauge
+
+
+ARTIFACT_READY = "ready"
+ARTIFACT_PENDING = "pending"
+ARTIFACT_MISSING = "missing"
+
+# readers of a key another worker is rendering re-check this often
+POLL_INTERVAL_SECONDS = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS debug_artifacts (
+    key TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    data BLOB,
+    size INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_debug_artifacts_status ON debug_artifacts (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_debug_artifacts_used ON debug_artifacts (status, used_at);
+"""
+
+_artifact_count = gauge("calyx_debug_artifacts", help_text="Debug artifacts held in the store")
+_artifact_bytes = gauge("calyx_debug_artifact_bytes", help_text="Encoded size of held debug artifacts")
+_evicted = counter("calyx_debug_artifacts_evicted_total", help_text="Debug artifacts dropped by TTL or LRU")
+_dropped = counter("calyx_debug_renders_dropped_total", help_text="Debug renders skipped because the queue was full")
+
+
+class DebugArtifactStore:
+    """
+    Size- and TTL-bounded store for debug overlays on a local SQLite
+    file, so every worker process on the node serves every URL.
+
+    A key is reserved when its URL is handed out; the render runs
+    later on a background worker of the process that reserved it.
+    Readers of a reserved key, in any process, poll until it lands.
+    Oldest-used artifacts are evicted first once the item or byte
+    budget is exceeded, and anything older than the TTL (including
+    reservations that never got rendered) is dropped. Outstanding
+    reservations are capped too (`max_pending`, default max_items +
+    queue_size); the oldest is given up first.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_items: int,
+        max_bytes: int,
+        ttl_seconds: float,
+        queue_size: int = 16,
+        workers: int = 1,
+        max_pending: Optional[int] = None,
+    ):
+        self.path = path
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.queue_size = queue_size
+        self.workers = workers
+        self.max_pending = max_pending if max_pending is not None else max_items + queue_size
+
+        # opened on first use, per process: the module is imported by the
+        # gunicorn master before it forks
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._lock = Lock()
+
+        # created on first use so the store can be built before the loop runs
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _db(self) -> sqlite3.Connection:
+        # caller holds the lock
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._pid = os.getpid()
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    # =========================
+    # PRODUCER SIDE
+    # =========================
+
+    def reserve(self, key: str) -> None:
+        now = time.time()
+
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                self._expire(db, now)
+
+                # oldest first: readers of a given-up key see it as missing
+                pending = db.execute(
+                    "SELECT COUNT(*) FROM debug_artifacts WHERE status = ?",
+                    (ARTIFACT_PENDING,),
+                ).fetchone()[0]
+                excess = pending - self.max_pending + 1
+                if excess > 0:
+                    db.execute(
+                        "DELETE FROM debug_artifacts WHERE key IN ("
+                        "SELECT key FROM debug_artifacts WHERE status = ? ORDER BY created_at LIMIT ?)",
+                        (ARTIFACT_PENDING, excess),
+                    )
+                    _evicted.inc(excess)
+
+                db.execute(
+                    "INSERT OR REPLACE INTO debug_artifacts (key, status, data, size, created_at, used_at) "
+                    "VALUES (?, ?, NULL, 0, ?, ?)",
+                    (key, ARTIFACT_PENDING, now, now),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def release(self, key: str) -> None:
+        """Gives up a reservation that will never be submitted (the pipeline failed)."""
+
+        with self._lock:
+            self._db().execute(
+                "DELETE FROM debug_artifacts WHERE key = ? AND status = ?",
+                (key, ARTIFACT_PENDING),
+            )
+
+    def submit(self, key: str, render: Callable[[], Optional[bytes]]) -> bool:
+        """Queues `render` (run on a worker thread) to fill `key`."""
+
+        self._ensure_workers()
+
+        if self._status(key) != ARTIFACT_PENDING:
+            self.reserve(key)
+
+        try:
+            self._queue.put_nowait((key, render))
+        except asyncio.QueueFull:
+            _dropped.inc()
+            self.release(key)
+            return False
+
+        return True
+
+    # =========================
+    # READER SIDE
+    # =========================
+
+    async def get(self, key: str, wait: float = 0.0) -> Tuple[str, Optional[bytes]]:
+        deadline = time.monotonic() + wait
+
+        while True:
+            status, data = await asyncio.to_thread(self._read, key)
+            if status != ARTIFACT_PENDING:
+                return status, data
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return ARTIFACT_PENDING, None
+
+            await asyncio.sleep(min(POLL_INTERVAL_SECONDS, remaining))
+
+    def _read(self, key: str) -> Tuple[str, Optional[bytes]]:
+        now = time.time()
+
+        with self._lock:
+            db = self._db()
+            row = db.execute(
+                "SELECT status, data FROM debug_artifacts WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+
+            if row is None:
+                return ARTIFACT_MISSING, None
+
+            if row[0] != ARTIFACT_READY:
+                return ARTIFACT_PENDING, None
+
+            db.execute("UPDATE debug_artifacts SET used_at = ? WHERE key = ?", (now, key))
+            return ARTIFACT_READY, row[1]
+
+    def _status(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db().execute(
+                "SELECT status FROM debug_artifacts WHERE key = ?",
+                (key,),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    # =========================
+    # WORKERS
+    # =========================
+
+    def _ensure_workers(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+
+        if not self._tasks:
+            self._tasks = [
+                asyncio.ensure_future(self._work())
+                for _ in range(self.workers)
+            ]
+
+    async def _work(self) -> None:
+        while True:
+            key, render = await self._queue.get()
+
+            try:
+                data = await asyncio.to_thread(render)
+            except Exception as e:
+                print(f"❌ DEBUG IMAGE FAILED: {e}")
+                data = None
+
+            try:
+                if data is not None:
+                    await asyncio.to_thread(self._put, key, data)
+                else:
+                    self.release(key)
+            except sqlite3.Error as e:
+                print(f"❌ DEBUG IMAGE NOT STORED: {e}")
+
+            self._queue.task_done()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+    # =========================
+    # BOOKKEEPING
+    # =========================
+
+    def _put(self, key: str, data: bytes) -> None:
+        now = time.time()
+
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # a reservation given up meanwhile stays gone
+                db.execute(
+                    "UPDATE debug_artifacts SET status = ?, data = ?, size = ?, used_at = ? "
+                    "WHERE key = ? AND status = ?",
+                    (ARTIFACT_READY, data, len(data), now, key, ARTIFACT_PENDING),
+                )
+                self._expire(db, now)
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+    def _expire(self, db: sqlite3.Connection, now: float) -> None:
+        # caller holds the lock, inside a transaction
+        _evicted.inc(db.execute(
+            "DELETE FROM debug_artifacts WHERE created_at < ?",
+            (now - self.ttl_seconds,),
+        ).rowcount)
+
+        # least recently used first
+        ready = db.execute(
+            "SELECT key, size FROM debug_artifacts WHERE status = ? ORDER BY used_at DESC",
+            (ARTIFACT_READY,),
+        ).fetchall()
+
+        kept = 0
+        kept_bytes = 0
+        for key, size in ready:
+            if kept >= self.max_items or kept_bytes + size > self.max_bytes:
+                break
+            kept += 1
+            kept_bytes += size
+
+        dropped = [(key,) for key, _ in ready[kept:]]
+
+        if dropped:
+            db.executemany("DELETE FROM debug_artifacts WHERE key = ?", dropped)
+            _evicted.inc(len(dropped))
+
+        _artifact_count.set(kept)
+        _artifact_bytes.set(kept_bytes)
+
+
+debug_store = DebugArtifactStore(
+    path=settings.DEBUG_STORE_PATH,
+    max_items=settings.DEBUG_STORE_MAX_ITEMS,
+    max_bytes=settings.DEBUG_STORE_MAX_BYTES,
+    ttl_seconds=settings.DEBUG_STORE_TTL_SECONDS,
+    queue_size=settings.DEBUG_RENDER_QUEUE,
+)
@@ -0,0 +1,290 @@
+# backend/services/embedding_store.py
+"""
+Species embedding matrix shared by every worker on a node through one
+memory-mapped file.
+
+One process publishes (ids sorted, rows L2-normalised, float32) to a
+temp file and os.replace()s it over EMBEDDING_STORE_PATH, bumping the
+generation in the header. Readers np.memmap the file read-only, so the
+page cache holds a single copy however many workers attach; a reader
+that still maps the previous generation keeps a valid view of the old
+inode until it notices the swap and re-attaches.
+
+Layout (little-endian, sections 64-byte aligned):
+
+    header   magic, format version, generation, count, dim, id width
+    ids      count x S<id width>, sorted (np.searchsorted is the id map)
+    matrix   count x dim float32
+"""
+
+import asyncio
+import fcntl
+import os
+import struct
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.metrics import counter, gauge
+
+
+MAGIC = b"CALYXEMB"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sIQQII")
+ALIGN = 64
+
+# how often a reader stats the file for a newer generation
+CHECK_INTERVAL_SECONDS = 1.0
+
+_generation = gauge("calyx_embedding_store_generation", help_text="Generation of the attached shared embedding matrix")
+_rows = gauge("calyx_embedding_store_rows", help_text="Species rows in the attached shared embedding matrix")
+_published = counter("calyx_embedding_store_publishes_total", help_text="Embedding matrices published by this process")
+_attached = counter("calyx_embedding_store_attaches_total", help_text="Times this process mapped a new generation")
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+# =========================
+# FILE FORMAT
+# =========================
+
+@dataclass(frozen=True)
+class EmbeddingMatrix:
+    """One mapped generation. `ids` and `matrix` are read-only views of the file."""
+
+    generation: int
+    ids: np.ndarray
+    matrix: np.ndarray
+    inode: Tuple[int, int]
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def rows(self, species_ids: Sequence[str]) -> np.ndarray:
+        """Row index per id, -1 where the id is not in this generation."""
+
+        if not len(self) or not species_ids:
+            return np.full(len(species_ids), -1, dtype=np.int64)
+
+        encoded = [str(i).encode() for i in species_ids]
+        # longer than any stored id: would truncate into a false match
+        fits = np.array([len(k) <= self.ids.dtype.itemsize for k in encoded])
+
+        keys = np.array(encoded, dtype=self.ids.dtype)
+        pos = np.minimum(np.searchsorted(self.ids, keys), len(self) - 1)
+        return np.where(fits & (self.ids[pos] == keys), pos, -1)
+
+
+def read_generation(path: str) -> int:
+    """Generation of the file at `path`, 0 when there is none (or it is unreadable)."""
+
+    try:
+        with open(path, "rb") as f:
+            magic, version, generation, _, _, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return 0
+
+    return generation if magic == MAGIC and version == FORMAT_VERSION else 0
+
+
+def publish(path: str, species_ids: Iterable[str], vectors: Iterable[Sequence[float]]) -> int:
+    """
+    Writes a new generation and swaps it in atomically. Rows are
+    normalised here so readers only need a dot product; species with
+    no or an all-zero vector are left out, like refinement skips them.
+    Returns the new generation.
+    """
+
+    pairs = []
+    for species_id, vector in zip(species_ids, vectors):
+        if vector is None or not len(vector):
+            continue
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm > 0:
+            pairs.append((str(species_id).encode(), vec / norm))
+    pairs.sort(key=lambda p: p[0])
+
+    ids = np.array([p[0] for p in pairs], dtype=f"S{max((len(p[0]) for p in pairs), default=1)}")
+    matrix = (
+        np.stack([p[1] for p in pairs]).astype(np.float32)
+        if pairs else np.empty((0, 0), dtype=np.float32)
+    )
+
+    generation = read_generation(path) + 1
+    ids_offset = _aligned(HEADER.size)
+    matrix_offset = _aligned(ids_offset + ids.nbytes)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation, len(pairs), matrix.shape[1], ids.dtype.itemsize))
+        f.seek(ids_offset)
+        f.write(ids.tobytes())
+        f.seek(matrix_offset)
+        f.write(np.ascontiguousarray(matrix).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp, path)
+    _published.inc()
+    return generation
+
+
+def attach(path: str) -> EmbeddingMatrix:
+    """Maps the current file read-only; no copy of the matrix is made."""
+
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        magic, version, generation, count, dim, id_width = HEADER.unpack(f.read(HEADER.size))
+
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} embedding store")
+
+        ids_offset = _aligned(HEADER.size)
+        matrix_offset = _aligned(ids_offset + count * id_width)
+
+        if count == 0:
+            ids = np.empty(0, dtype=f"S{max(id_width, 1)}")
+            matrix = np.empty((0, dim), dtype=np.float32)
+        else:
+            # the maps stay valid after os.replace swaps a newer file in
+            ids = np.memmap(f, dtype=f"S{id_width}", mode="r", offset=ids_offset, shape=(count,))
+            matrix = np.memmap(f, dtype=np.float32, mode="r", offset=matrix_offset, shape=(count, dim))
+
+    return EmbeddingMatrix(generation=generation, ids=ids, matrix=matrix, inode=(st.st_ino, st.st_mtime_ns))
+
+
+# =========================
+# READER
+# =========================
+
+class SharedEmbeddings:
+    """
+    A process's handle on the shared matrix. `current()` re-attaches
+    when another process has published a newer generation, checking
+    the file at most once per CHECK_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._matrix: Optional[EmbeddingMatrix] = None
+        self._checked_at = 0.0
+        self._lock = Lock()
+
+    def current(self, force: bool = False) -> Optional[EmbeddingMatrix]:
+        now = time.monotonic()
+        if not force and now - self._checked_at < CHECK_INTERVAL_SECONDS:
+            return self._matrix
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return self._matrix
+
+            if self._matrix is None or self._matrix.inode != (st.st_ino, st.st_mtime_ns):
+                try:
+                    self._matrix = attach(self.path)
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ Embedding store not attached: {e}")
+                    return self._matrix
+
+                _attached.inc()
+                _generation.set(self._matrix.generation)
+                _rows.set(len(self._matrix))
+
+        return self._matrix
+
+    def similarities(self, species_ids: Sequence[str], query: Sequence[float]) -> Optional[List[Optional[float]]]:
+        """
+        Cosine similarity of `query` to each species, None for species
+        not in the attached generation. None overall when nothing is
+        attached, so callers fall back to fetching embeddings.
+        """
+
+        matrix = self.current()
+        if matrix is None:
+            return None
+
+        q = np.asarray(query, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm == 0 or q.shape[0] != matrix.matrix.shape[1]:
+            return [None] * len(species_ids)
+
+        rows = matrix.rows(species_ids)
+        found = rows >= 0
+        scores = np.zeros(len(species_ids), dtype=np.float32)
+        if found.any():
+            scores[found] = matrix.matrix[rows[found]] @ (q / norm)
+
+        return [float(score) if ok else None for ok, score in zip(found, scores)]
+
+
+# =========================
+# PUBLISHING
+# =========================
+
+def _age(path: str) -> Optional[float]:
+    try:
+        return time.time() - os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _stale(path: str, max_age: float) -> bool:
+    age = _age(path)
+    return age is None or (max_age > 0 and age >= max_age)
+
+
+def publish_from(path: str, fetch, max_age: float = 0.0) -> Optional[int]:
+    """
+    Blocking: fetches (ids, vectors) with `fetch()` and publishes them
+    if the file is missing or older than `max_age` (0: never stale once
+    written). Returns None when another process holds the publish lock
+    or has just published; readers pick that generation up instead.
+    """
+
+    with open(f"{path}.lock", "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return None
+
+        try:
+            # re-checked under the lock: another worker may have just finished
+            if not _stale(path, max_age):
+                return None
+            ids, vectors = fetch()
+            return publish(path, ids, vectors)
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+async def sync_embeddings(db, store: SharedEmbeddings, refresh_seconds: float) -> None:
+    """
+    Keeps the node's shared matrix fresh: republishes when the file is
+    missing or older than `refresh_seconds` (only one worker wins the
+    lock), then attaches. Runs until cancelled; once when refresh is 0.
+    """
+
+    while True:
+        if _stale(store.path, refresh_seconds):
+            try:
+                generation = await asyncio.to_thread(publish_from, store.path, db.fetch_embeddings, refresh_seconds)
+                if generation is not None:
+                    print(f"✅ Published species embeddings (generation {generation})")
+            except Exception as e:
+                print(f"⚠️ Embedding publish failed: {e}")
+
+        store.current(force=True)
+
+        if refresh_seconds <= 0:
+            return
+        await asyncio.sleep(min(refresh_seconds, 60.0))
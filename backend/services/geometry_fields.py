@@ -0,0 +1,220 @@
+# backend/services/geometry_fields.py
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+# =========================
+# CONFIG
+# =========================
+
+# per-process cap on cached geometry; a 768 x 1024 float32 field is 3 MB,
+# its two bool masks 1.5 MB
+FIELD_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# off-centre masks slice a square squared-distance canvas whose side is
+# the image's longer side rounded up to a multiple of this, so every
+# window shares one of a few canvases (768: 9 MB, 512: 4 MB, 256: 1 MB)
+CANVAS_STEP = 256
+
+
+def _readonly(arr: np.ndarray) -> np.ndarray:
+    arr.flags.writeable = False
+    return arr
+
+
+def _nbytes(value: Any) -> int:
+    if isinstance(value, tuple):
+        return sum(v.nbytes for v in value)
+    return value.nbytes
+
+
+# =========================
+# CACHE
+# =========================
+
+class _FieldCache:
+    """
+    LRU over read-only arrays, bounded by total bytes rather than entry
+    count so a few large working sizes cannot pin hundreds of MB.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # built outside the lock; a racing miss just builds it twice
+        value = build()
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= _nbytes(evicted)
+
+        return value
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_cache = _FieldCache(FIELD_CACHE_MAX_BYTES)
+
+
+# =========================
+# FIELDS
+# =========================
+
+def _distance(h: int, w: int, cx: float, cy: float) -> np.ndarray:
+    """Distance to (cx, cy) divided by its maximum, float64, not cached."""
+
+    # broadcast one row and one column instead of two full mgrid planes
+    dx = np.arange(w, dtype=np.float64) - cx
+    dy = np.arange(h, dtype=np.float64)[:, None] - cy
+    dist = np.sqrt(dx * dx + dy * dy)
+    return dist / (np.max(dist) + 1e-6)
+
+
+def _resolve(h: int, w: int, centre: Optional[Tuple[float, float]]) -> Tuple[float, float, bool]:
+    """(cx, cy, is_default): only the default image centre is cached."""
+
+    default = (w / 2.0, h / 2.0)
+    if centre is None:
+        return default[0], default[1], True
+
+    cx, cy = float(centre[0]), float(centre[1])
+    return cx, cy, (cx, cy) == default
+
+
+def normalized_distance(h: int, w: int, centre: Optional[Tuple[float, float]] = None) -> np.ndarray:
+    """
+    Distance to `centre` (default: image centre) divided by its maximum,
+    float32. Default-centre fields are cached and shared: do not write
+    to the result.
+    """
+
+    cx, cy, cached = _resolve(h, w, centre)
+    if not cached:
+        return _distance(h, w, cx, cy).astype(np.float32)
+
+    return _cache.get(
+        ("distance", h, w),
+        lambda: _readonly(_distance(h, w, cx, cy).astype(np.float32)),
+    )
+
+
+def centre_weight(h: int, w: int) -> np.ndarray:
+    """1 at the image centre falling to ~0 in the corners. Read-only."""
+
+    return _cache.get(
+        ("centre_weight", h, w),
+        lambda: _readonly((1.0 - _distance(h, w, w / 2.0, h / 2.0)).astype(np.float32)),
+    )
+
+
+def _squared_canvas(side: int) -> np.ndarray:
+    """
+    Squared distance to (side - 1, side - 1) on a (2 side - 1) square.
+    The field of any whole-pixel centre in an image up to side x side
+    is a slice of it. Values are integers below 2^24, so float32 holds
+    them exactly.
+    """
+
+    d = np.arange(-(side - 1), side, dtype=np.float32)
+    return d * d + (d * d)[:, None]
+
+
+def _offset_masks(
+    h: int,
+    w: int,
+    cx: float,
+    cy: float,
+    inner: float,
+    outer: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Masks around an arbitrary centre, rounded to the nearest pixel (the
+    0-1000 cluster grid is no finer), from a slice of the shared canvas:
+    a compare per pixel instead of building a distance field.
+    """
+
+    x = min(max(int(round(cx)), 0), w - 1)
+    y = min(max(int(round(cy)), 0), h - 1)
+
+    side = -(-max(h, w) // CANVAS_STEP) * CANVAS_STEP
+
+    canvas = _cache.get(
+        ("canvas", side),
+        lambda: _readonly(_squared_canvas(side)),
+    )
+
+    top = side - 1 - y
+    left = side - 1 - x
+    d2 = canvas[top:top + h, left:left + w]
+
+    # the farthest pixel is a corner; same normalisation as _distance
+    scale = float(np.hypot(max(x, w - 1 - x), max(y, h - 1 - y))) + 1e-6
+    inner2 = (inner * scale) ** 2
+    outer2 = (outer * scale) ** 2
+
+    return d2 <= inner2, (d2 > inner2) & (d2 <= outer2)
+
+
+def ring_masks(
+    h: int,
+    w: int,
+    centre: Optional[Tuple[float, float]] = None,
+    inner: float = 0.24,
+    outer: float = 0.82,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (disc, ring) masks on the normalized distance field. Default-centre
+    masks are cached and read-only; off-centre ones are fresh arrays
+    cut from the shared canvas, with the centre rounded to a pixel.
+    """
+
+    cx, cy, cached = _resolve(h, w, centre)
+
+    if not cached:
+        return _offset_masks(h, w, cx, cy, inner, outer)
+
+    def build() -> Tuple[np.ndarray, np.ndarray]:
+        # thresholded at full precision so masks match the uncached maths
+        dist = _distance(h, w, cx, cy)
+        return (
+            _readonly(dist <= inner),
+            _readonly((dist > inner) & (dist <= outer)),
+        )
+
+    return _cache.get(("masks", h, w, inner, outer), build)
+
+
+def cache_info() -> Dict[str, int]:
+    return _cache.info()
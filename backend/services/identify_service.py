@@ -1,19 +1,42 @@
+import asyncio
 import os
 import time
-from typing import Dict, Any
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 
 from fastapi import Request
 
-from backend.models import IdentificationResponse
-from backend.services.preprocess_service import process_upload
-from backend.services.image_processing_service import prepare_image
+from backend.config import settings
+from backend.models import FlowerIdentification, IdentificationResponse
+from backend.services.preprocess_service import (
+    ALLOWED_MIME_TYPES,
+    MAX_BYTES,
+    RAW_RGB_MIME,
+    ProcessedImage,
+    UploadPayload,
+    decode_upload,
+    read_upload,
+)
+from backend.services.image_processing_service import WORKING_MAX_SIDE, prepare_image
 from backend.services.trait_extractor import extract_traits
-from backend.services.candidate_service import resolve_candidates
+from backend.services.batching import MicroBatcher
+from backend.services.candidate_service import (
+    resolve_candidates,
+    search_trait_candidates,
+    search_trait_candidates_batch,
+)
+from backend.services.pipeline_dag import Stage, run_dag
+from backend.services.metrics import record_stage, span, start_trace
+from backend.services.admission import AdmissionController, Overloaded
+from backend.services.parity import shadow_compare, shadow_sampled
+from backend.services.pose_extractor import pose_mode_override
+from backend.services.debug_store import debug_store
 
 from backend.services.debug_image import (
     generate_debug_image,
-    save_debug_image,
+    encode_debug_image,
     build_debug_url,
+    new_debug_filename,
 )
 from PIL import Image
 import io
@@ -21,77 +44,401 @@ import io
 
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
-DEBUG_IMAGE_DIR = "/tmp/calyx_debug"
-os.makedirs(DEBUG_IMAGE_DIR, exist_ok=True)
 
+# =========================
+# CLIENT HINTS
+# =========================
+
+IMAGE_HASH_HEADER = "X-Image-Hash"
+WORKING_SIZE_HEADER = "X-Calyx-Working-Size"
+
+
+def identify_hints() -> Dict[str, Any]:
+    """
+    What a client needs to upload cheaply: the size the pipeline works
+    at (anything larger is thrown away), the accepted encodings, and how
+    to ask for a cached result by hash before uploading at all.
+    """
+
+    return {
+        "working_max_side": WORKING_MAX_SIDE,
+        "accepted_content_types": sorted(ALLOWED_MIME_TYPES),
+        "max_bytes": MAX_BYTES,
+        "raw_rgb": {
+            "content_type": RAW_RGB_MIME,
+            "layout": "b'CRGB' + uint16 BE width + uint16 BE height + packed RGB8",
+        },
+        "hash": {
+            "algorithm": "sha256",
+            "over": "exact uploaded bytes",
+            "header": IMAGE_HASH_HEADER,
+        },
+    }
+
+
+def _cache_usable(use_cache: bool) -> bool:
+    """
+    identification_cache holds only the primary species, so in
+    multi-flower mode a hit would drop the per-flower results: the
+    cache is neither read nor written there.
+    """
+
+    return use_cache and not settings.MULTI_FLOWER
+
+
+def _response_from_cache(cached: Dict[str, Any], start_time: float) -> IdentificationResponse:
+    return IdentificationResponse(
+        species_id=cached.get("species_id"),
+        scientific_name=cached.get("scientific_name") or "Unknown Flower",
+        common_names=cached.get("common_names") or ["Unknown Flower"],
+        confidence=float(cached.get("confidence") or 0.0),
+        primary_image_url=cached.get("primary_image_url"),
+        method="cache",
+        traits_extracted=cached.get("traits_extracted"),
+        alternatives=[],
+        response_time_ms=int((time.time() - start_time) * 1000),
+    )
+
+
+async def lookup_cached_identification(*, image_hash: str, db, request: Request) -> Optional[IdentificationResponse]:
+    """Hash-only identify: no upload, just the cache."""
 
-async def identify_flower_service(*, image, use_cache, db, vision, request: Request) -> IdentificationResponse:
     start_time = time.time()
 
-    processed = await process_upload(image)
-    prepared = prepare_image(processed.pil_image)
+    trace = start_trace()
+    request.state.trace = trace
+
+    # no cache in multi-flower mode (see _cache_usable): ask for the upload
+    if settings.MULTI_FLOWER:
+        return None
+
+    with span("cache_lookup"):
+        cached = await db.get_cached_identification(image_hash.lower())
+
+    if not cached:
+        return None
+
+    if cached.get("id"):
+        await db.increment_cache_hit(cached["id"])
+
+    return _response_from_cache(cached, start_time)
+
+
+# =========================
+# MULTI-FLOWER
+# =========================
+
+def _flower_identification(
+    flower: Dict[str, Any],
+    candidates: List[Dict[str, Any]],
+    method: str,
+    traits: Dict[str, Any],
+) -> FlowerIdentification:
+    top = candidates[0] if candidates else {}
+
+    return FlowerIdentification(
+        cluster_id=flower["cluster_id"],
+        centre=list(flower["centre"]),
+        species_id=top.get("id"),
+        scientific_name=top.get("scientific_name", "Unknown Flower"),
+        common_names=top.get("common_names", ["Unknown Flower"]),
+        confidence=float(top.get("confidence", 0.0)),
+        primary_image_url=top.get("primary_image_url"),
+        method=method,
+        traits_extracted={k: v for k, v in traits.items() if k != "window"},
+        alternatives=candidates[1:5],
+    )
+
+
+async def _identify_secondary_flowers(
+    flowers: List[Dict[str, Any]],
+    crop: Image.Image,
+    *,
+    db,
+    vision,
+) -> List[FlowerIdentification]:
+    """
+    Every flower after the primary one: crops are embedded in one
+    batch, trait searches go out as one deduplicated round, then each
+    flower's candidates are resolved concurrently.
+    """
+
+    if not flowers:
+        return []
 
-    traits = await extract_traits(
-        prepared.cropped_flower,
-        image_metadata=processed.image_metadata
+    crops = [crop.crop(tuple(f["window"])) for f in flowers]
+
+    async def _embeddings():
+        try:
+            with span("get_embeddings_flowers"):
+                return await vision.get_embeddings(crops)
+        except Exception:
+            return [None] * len(crops)
+
+    embeddings, searches = await asyncio.gather(
+        _embeddings(),
+        search_trait_candidates_batch(db, flowers),
     )
 
-    if processed.image_metadata:
-        traits.update(processed.image_metadata)
+    resolved = await asyncio.gather(*[
+        resolve_candidates(
+            db=db,
+            traits=flower,
+            embedding=embedding or [],
+            candidates=search,
+        )
+        for flower, embedding, search in zip(flowers, embeddings, searches)
+    ])
+
+    return [
+        _flower_identification(flower, ranked, method, flower_traits)
+        for flower, (ranked, method, _, flower_traits) in zip(flowers, resolved)
+    ]
+
+
+def _render_debug_image(img: Image.Image, traits: Dict[str, Any], filename: str) -> Optional[bytes]:
+    """
+    Pose + trait overlay render and encode. Runs on a debug-store
+    worker after the response URL has already been handed out.
+    """
+
+    try:
+        print("\n🧠 ================= DEBUG IMAGE PIPELINE =================")
+
+        print("📍 Stage 1: Pose + Trait Overlay Rendering START")
+
+        debug_img = generate_debug_image(
+            img=img,
+            pose_data=traits,
+            shape_data=traits,
+        )
+
+        print("✅ Stage 1 COMPLETE")
+
+        print("💾 Stage 2: Encoding debug image")
+
+        data = encode_debug_image(debug_img)
+
+        print(f"📁 Stored as: {filename}")
+
+        print("🧠 ================= END DEBUG PIPELINE =================\n")
+
+        return data
+
+    except Exception as e:
+        print(f"❌ DEBUG IMAGE FAILED: {e}")
+        return None
+
+
+def _admitted(admission: Optional[AdmissionController]):
+    # no controller (ADMISSION_ENABLED=false): run undegraded, unqueued
+    return admission.admit() if admission is not None else nullcontext("")
+
+
+async def identify_flower_service(
+    *,
+    image,
+    use_cache,
+    db,
+    vision,
+    request: Request,
+    admission: Optional[AdmissionController] = None,
+) -> IdentificationResponse:
+    """
+    Reading the upload and the cache lookup happen outside admission
+    control; a pipeline slot is only held for decode onwards. The pose
+    mode a request was degraded to is left on request.state.
+    """
+
+    start_time = time.time()
+    use_cache = _cache_usable(use_cache)
+
+    trace = start_trace()
+    request.state.trace = trace
+
+    with span("read_upload"):
+        payload = await read_upload(image)
+
+    if use_cache:
+        with span("cache_lookup"):
+            cached = await db.get_cached_identification(payload.image_hash)
+
+        if cached:
+            if cached.get("id"):
+                await db.increment_cache_hit(cached["id"])
+            return _response_from_cache(cached, start_time)
+
+    async with _admitted(admission) as degraded:
+        request.state.degraded_pose_mode = degraded
+
+        # decode + pixel stats are CPU bound; keep them off the event loop
+        with span("process_upload"):
+            processed = await asyncio.to_thread(decode_upload, payload)
+
+        return await identify_processed_image(
+            processed,
+            use_cache=use_cache,
+            db=db,
+            vision=vision,
+            request=request,
+            start_time=start_time,
+        )
+
+
+async def identify_processed_image(
+    processed: ProcessedImage,
+    *,
+    use_cache: bool,
+    db,
+    vision,
+    request: Optional[Request],
+    start_time: float,
+    embed: Optional[Callable[[Image.Image], Awaitable[List[float]]]] = None,
+    search_traits: Optional[Callable[[Dict[str, Any]], Awaitable[List[Dict[str, Any]]]]] = None,
+) -> IdentificationResponse:
+    """
+    Everything after the upload has been decoded. `embed` and
+    `search_traits` let the batch endpoint route those calls through
+    shared batchers instead of one backend call per image.
+    """
+
+    embed = embed or vision.get_embedding
+    search_traits = search_traits or (lambda traits: search_trait_candidates(db, traits))
+
+    with span("prepare_image"):
+        prepared = await asyncio.to_thread(prepare_image, processed.pil_image, processed.stats)
 
     # =========================
-    # 🔥 DEBUG IMAGE PIPELINE (SINGLE SOURCE OF TRUTH)
+    # STAGE GRAPH
+    #
+    #   prepared ─┬─ traits ─┬─ trait_search ─┐
+    #             │          ├─ debug (bg)    ├─ candidates
+    #             │          └─ flowers       │
+    #             └─ embedding ───────────────┘
+    #
+    # `flowers` identifies the non-primary flowers in multi-flower
+    # mode and is a no-op otherwise. A sampled request also gets a
+    # background `shadow` stage (traits + trait_search) that diffs
+    # the served traits against SHADOW_POSE_MODE.
     # =========================
 
     debug_image_url = None
+    debug_filename = None
 
-    if DEBUG:
+    # no request (background jobs) means nowhere to build the URL from
+    if DEBUG and request is not None:
+        debug_filename = new_debug_filename()
+        debug_image_url = build_debug_url(request, debug_filename)
+        # readers of the URL wait on the reservation until the render lands
+        debug_store.reserve(debug_filename)
+
+    async def traits_stage():
+        traits = await extract_traits(
+            prepared.cropped_flower,
+            image_metadata=processed.image_metadata,
+        )
+
+        if processed.image_metadata:
+            traits.update(processed.image_metadata)
+
+        return traits
+
+    async def embedding_stage():
         try:
-            print("\n🧠 ================= DEBUG IMAGE PIPELINE =================")
+            with span("get_embedding"):
+                return await embed(prepared.cropped_flower)
+        except Exception:
+            return None
 
-            print("📍 Stage 1: Pose + Trait Overlay Rendering START")
+    async def trait_search_stage(traits):
+        return await search_traits(traits)
 
-            debug_img = generate_debug_image(
-                img=prepared.cropped_flower,
-                pose_data=traits,
-                shape_data=traits,
-            )
+    debug_submitted = False
 
-            print("✅ Stage 1 COMPLETE")
+    async def debug_stage(traits):
+        nonlocal debug_submitted
+        debug_submitted = True
+        # hand-off only: rendering and encoding happen on the store's worker
+        debug_store.submit(
+            debug_filename,
+            lambda: _render_debug_image(prepared.cropped_flower, traits, debug_filename),
+        )
 
-            print("💾 Stage 2: Saving debug image")
+    async def flowers_stage(traits):
+        # primary flower rides the main stages; the rest are identified here
+        return await _identify_secondary_flowers(
+            (traits.get("flowers") or [])[1:],
+            prepared.cropped_flower,
+            db=db,
+            vision=vision,
+        )
 
-            filename = save_debug_image(debug_img)
+    async def candidates_stage(traits, embedding, trait_search):
+        return await resolve_candidates(
+            db=db,
+            traits=traits,
+            embedding=embedding if embedding else [],
+            candidates=trait_search,
+        )
 
-            print(f"📁 Saved as: {filename}")
+    stages = [
+        Stage("traits", traits_stage),
+        Stage("embedding", embedding_stage),
+        Stage("trait_search", trait_search_stage, deps=("traits",)),
+        Stage("candidates", candidates_stage, deps=("traits", "embedding", "trait_search")),
+        Stage("flowers", flowers_stage, deps=("traits",)),
+    ]
 
-            print("🌐 Stage 3: Building debug URL")
+    async def cache_store_stage(candidates):
+        ranked, method, _, resolved_traits = candidates
+        if not ranked or not ranked[0].get("id"):
+            return
 
-            debug_image_url = build_debug_url(request, filename)
+        await db.cache_identification(
+            image_hash=processed.image_hash,
+            species_id=ranked[0]["id"],
+            confidence=float(ranked[0].get("confidence") or 0.0),
+            traits=resolved_traits,
+            method=method,
+        )
 
-            print(f"🔗 DEBUG URL: {debug_image_url}")
+    if debug_filename:
+        stages.append(Stage("debug", debug_stage, deps=("traits",), background=True))
 
-            print("🧠 ================= END DEBUG PIPELINE =================\n")
+    async def shadow_stage(traits, trait_search):
+        await shadow_compare(prepared.cropped_flower, traits, trait_search or [])
 
-        except Exception as e:
-            print(f"❌ DEBUG IMAGE FAILED: {e}")
+    # a degraded result (admission control swapped in a cheaper pose
+    # mode) is served once but must not be replayed to later full requests
+    if use_cache and not pose_mode_override.get():
+        stages.append(Stage("cache_store", cache_store_stage, deps=("candidates",), background=True))
+
+    if shadow_sampled():
+        stages.append(Stage("shadow", shadow_stage, deps=("traits", "trait_search"), background=True))
 
-    # =========================
-    # EMBEDDING
-    # =========================
     try:
-        embedding = await vision.get_embedding(prepared.cropped_flower)
-    except Exception:
-        embedding = None
+        results = await run_dag(stages)
+    except BaseException:
+        # the render will never come; free the URL now rather than at the TTL
+        if debug_filename and not debug_submitted:
+            debug_store.release(debug_filename)
+        raise
 
-    candidates, method, exact_match_found, resolved_traits = await resolve_candidates(
-        db=db,
-        traits=traits,
-        embedding=embedding if embedding else []
-    )
+    candidates, method, exact_match_found, resolved_traits = results["candidates"]
+
+    flowers = None
+    detected = resolved_traits.get("flowers") or []
+
+    if detected:
+        flowers = [
+            _flower_identification(detected[0], candidates, method, detected[0]),
+            *results["flowers"],
+        ]
 
     response_time = int((time.time() - start_time) * 1000)
 
+    record_stage("total", time.time() - start_time)
+
     # ❌ NO MATCH
     if not candidates:
         return IdentificationResponse(
@@ -100,11 +447,12 @@ async def identify_flower_service(*, image, use_cache, db, vision, request: Requ
             common_names=["Unknown Flower"],
             confidence=0.0,
             primary_image_url=None,
-            debug_image_url=debug_image_url,  # ✅ WORKS NOW
+            debug_image_url=debug_image_url,
             method=method,
             traits_extracted=resolved_traits,
             alternatives=[],
             response_time_ms=response_time,
+            flowers=flowers,
         )
 
     # ✅ TOP MATCH
@@ -116,9 +464,165 @@ async def identify_flower_service(*, image, use_cache, db, vision, request: Requ
         common_names=top_match.get("common_names", ["Unknown Flower"]),
         confidence=top_match.get("confidence", 0.0),
         primary_image_url=top_match.get("primary_image_url"),
-        debug_image_url=debug_image_url,  # ✅ WORKS NOW
+        debug_image_url=debug_image_url,
         method=method,
         traits_extracted=resolved_traits,
         alternatives=candidates[1:5],  # Include top 5 candidates as alternatives
         response_time_ms=response_time,
-    )
\ No newline at end of file
+        flowers=flowers,
+    )
+
+
+# =========================
+# ASYNC JOBS
+# =========================
+
+async def run_identify_job(payload: UploadPayload, use_cache: bool, *, db, vision) -> Dict[str, Any]:
+    """Job-queue runner: same pipeline as /identify, minus the request."""
+
+    start_time = time.time()
+    use_cache = _cache_usable(use_cache)
+    start_trace()
+
+    if use_cache:
+        cached = await db.get_cached_identification(payload.image_hash)
+        if cached:
+            return _response_from_cache(cached, start_time).model_dump()
+
+    with span("process_upload"):
+        processed = await asyncio.to_thread(decode_upload, payload)
+
+    result = await identify_processed_image(
+        processed,
+        use_cache=use_cache,
+        db=db,
+        vision=vision,
+        request=None,
+        start_time=start_time,
+    )
+
+    return result.model_dump()
+
+
+# =========================
+# BATCH
+# =========================
+
+async def identify_batch_service(
+    *,
+    payloads: List[UploadPayload | Exception],
+    use_cache: bool,
+    db,
+    vision,
+    request: Request,
+    admission: Optional[AdmissionController] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Identifies many uploads at once and yields one record per image in
+    completion order. Decoding fans out over the thread pool, crops go
+    to the embedding backend as one batch, and trait searches are
+    deduplicated into one round of RPCs. Each image's pipeline holds
+    its own admission slot, so a batch of N counts as N requests; a
+    shed image is reported as a 503 record.
+    """
+
+    use_cache = _cache_usable(use_cache)
+    expected = sum(1 for p in payloads if not isinstance(p, Exception))
+
+    embedder = MicroBatcher(vision.get_embeddings, expected=expected)
+    searcher = MicroBatcher(lambda batch: search_trait_candidates_batch(db, batch), expected=expected)
+
+    async def _one(index: int, payload: UploadPayload) -> Dict[str, Any]:
+        start_time = time.time()
+        start_trace()
+
+        # every image must either submit to each batcher or discard from
+        # it, or the others wait out max_wait and batches split
+        submitted: set = set()
+
+        def _tracked(batcher: MicroBatcher):
+            async def submit(item):
+                submitted.add(batcher)
+                return await batcher.submit(item)
+            return submit
+
+        def _discard_unsubmitted() -> None:
+            for batcher in (embedder, searcher):
+                if batcher not in submitted:
+                    submitted.add(batcher)
+                    batcher.discard()
+
+        if use_cache:
+            cached = await db.get_cached_identification(payload.image_hash)
+            if cached:
+                _discard_unsubmitted()
+                return {
+                    "index": index,
+                    "filename": payload.filename,
+                    "image_hash": payload.image_hash,
+                    "result": _response_from_cache(cached, start_time).model_dump(),
+                }
+
+        try:
+            async with _admitted(admission) as degraded:
+                try:
+                    with span("process_upload"):
+                        processed = await asyncio.to_thread(decode_upload, payload)
+
+                    result = await identify_processed_image(
+                        processed,
+                        use_cache=use_cache,
+                        db=db,
+                        vision=vision,
+                        request=request,
+                        start_time=start_time,
+                        embed=_tracked(embedder),
+                        search_traits=_tracked(searcher),
+                    )
+                except Exception as e:
+                    # decode, prepare_image or traits can fail before submitting
+                    _discard_unsubmitted()
+                    return _batch_error(index, payload.filename, e)
+        except Overloaded as e:
+            _discard_unsubmitted()
+            return {
+                "index": index,
+                "filename": payload.filename,
+                "error": "Server overloaded, retry shortly",
+                "reason": e.decision,
+                "status_code": 503,
+                "retry_after": e.retry_after,
+            }
+
+        record = {
+            "index": index,
+            "filename": payload.filename,
+            "image_hash": processed.image_hash,
+            "result": result.model_dump(),
+        }
+        if degraded:
+            record["degraded"] = f"pose={degraded}"
+        return record
+
+    tasks = []
+    for index, payload in enumerate(payloads):
+        if isinstance(payload, Exception):
+            yield _batch_error(index, None, payload)
+            continue
+        tasks.append(asyncio.ensure_future(_one(index, payload)))
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _batch_error(index: int, filename: Optional[str], exc: Exception) -> Dict[str, Any]:
+    return {
+        "index": index,
+        "filename": filename,
+        "error": getattr(exc, "detail", None) or str(exc),
+        "status_code": getattr(exc, "status_code", 500),
+    }
@@ -4,6 +4,13 @@ from typing import Optional
 import numpy as np
 from PIL import Image
 
+from backend.services.geometry_fields import centre_weight
+from backend.services.image_stats import ImageStats
+
+
+# longest side of the working image every extractor runs on
+WORKING_MAX_SIDE = 768
+
 
 @dataclass
 class PreparedImage:
@@ -14,10 +21,15 @@ class PreparedImage:
     width: int
     height: int
 
-def prepare_image(img: Image.Image) -> PreparedImage:
+def prepare_image(img: Image.Image, stats: Optional[ImageStats] = None) -> PreparedImage:
     img = img.convert("RGB")
-    working = _resize_for_processing(img)
-    blur_score = _estimate_blur(working)
+    working = resize_for_processing(img)
+
+    # decode-time stats describe the working image when sizes agree
+    if stats is not None and (stats.width, stats.height) == working.size:
+        blur_score = stats.blur
+    else:
+        blur_score = _estimate_blur(working)
 
 
     crop = _find_flower_like_crop(working)
@@ -34,14 +46,33 @@ def prepare_image(img: Image.Image) -> PreparedImage:
     )
 
 
-def _resize_for_processing(img: Image.Image, max_side: int = 768) -> Image.Image:
-    w, h = img.size
+def working_size(size: tuple[int, int], max_side: int = WORKING_MAX_SIDE) -> tuple[int, int]:
+    w, h = size
     if max(w, h) == 0:
-        return img
-    
+        return size
+
     scale = min(max_side / max(w, h), 1.0)
-    new_size = (int(w * scale), int(h * scale))
-    return img.resize(new_size, Image.Resampling.LANCZOS) 
+    return (int(w * scale), int(h * scale))
+
+
+def resize_for_processing(
+    img: Image.Image,
+    max_side: int = WORKING_MAX_SIDE,
+    original_size: tuple[int, int] | None = None,
+) -> Image.Image:
+    """
+    Resize to the working resolution. `original_size` lets callers that
+    decoded at reduced scale (JPEG draft) still land on exactly the size
+    a full decode would have produced.
+    """
+
+    target = working_size(original_size or img.size, max_side)
+
+    if target == img.size:
+        return img
+
+    # reducing_gap: cheap integer box reduction before the LANCZOS pass
+    return img.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
 
 def _estimate_blur(img: Image.Image) -> float:
     # simple variance-based blur estimate using grayscale edges
@@ -83,12 +114,8 @@ def _find_flower_like_crop(img: Image.Image) -> Optional[Image.Image]:
 
     h, w = sat.shape
 
-    # bias towards center of image
-    yy, xx = np.mgrid[0:h, 0:w]
-    cy, cx = h / 2.0, w / 2.0
-    dist = np.sqrt((xx - cx) ** 2 + (yy - cy) ** 2)
-    dist = dist / (np.max(dist) + 1e-6)
-    center_weight = 1.0 - dist
+    # bias towards center of image (cached per working size)
+    center_weight = centre_weight(h, w)
 
     score = sat * 0.7 + center_weight * 0.3
 
@@ -0,0 +1,84 @@
+# backend/services/image_stats.py
+from dataclasses import dataclass
+
+import numpy as np
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class ImageStats:
+    """
+    Global statistics of the working-size image, computed once at
+    decode time and handed to every consumer instead of rescanning.
+
+    `std` and `entropy` are over the uint8 RGB values (the scale the
+    upload checks and `image_metadata` have always used).
+    """
+
+    width: int
+    height: int
+
+    mean: float
+    std: float
+
+    # 256-bin histogram entropy (bits)
+    entropy: float
+
+    # prepare_image blur score: (var(gx) + var(gy)) / pixels on the L plane
+    blur: float
+
+
+def compute_image_stats(img: Image.Image) -> ImageStats:
+    """
+    One read of the RGB and L planes. Mean, std and entropy all come
+    from a single 256-bin bincount; blur from the L-plane row / column
+    differences.
+    """
+
+    rgb = np.asarray(img.convert("RGB"), dtype=np.uint8)
+    gray = np.asarray(img.convert("L"), dtype=np.float32)
+
+    height, width = gray.shape
+
+    # =========================
+    # HISTOGRAM MOMENTS
+    # =========================
+
+    counts = np.bincount(rgb.reshape(-1), minlength=256).astype(np.float64)
+
+    total = counts.sum()
+    values = np.arange(256, dtype=np.float64)
+
+    mean = float((counts * values).sum() / total)
+    std = float(np.sqrt(max((counts * values ** 2).sum() / total - mean ** 2, 0.0)))
+
+    # same binning as np.histogram(arr, bins=256): edges span the data range
+    present = np.flatnonzero(counts)
+    lo, hi = float(present[0]), float(present[-1])
+
+    if hi > lo:
+        hist = np.histogram(values, bins=256, range=(lo, hi), weights=counts)[0]
+    else:
+        hist = np.zeros(256)
+        hist[0] = total
+
+    prob = hist / (hist.sum() + 1e-6)
+    entropy = float(-np.sum(prob * np.log2(prob + 1e-9)))
+
+    # =========================
+    # GRADIENTS
+    # =========================
+
+    gx = np.diff(gray, axis=1)
+    gy = np.diff(gray, axis=0)
+
+    blur = float((np.var(gx) + np.var(gy)) / (gray.size + 1e-6))
+
+    return ImageStats(
+        width=width,
+        height=height,
+        mean=mean,
+        std=std,
+        entropy=entropy,
+        blur=blur,
+    )
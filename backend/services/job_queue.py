@@ -0,0 +1,361 @@
+# backend/services/job_queue.py
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.services.metrics import gauge, histogram
+from backend.services.preprocess_service import UploadPayload
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# a queued or running job for the same image is reused, and a finished
+# one while it is younger than the dedup TTL
+DEDUP_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED)
+
+# how often an idle queue deletes finished rows past retention
+PRUNE_INTERVAL_SECONDS = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS identify_jobs (
+    id TEXT PRIMARY KEY,
+    image_hash TEXT NOT NULL,
+    status TEXT NOT NULL,
+    filename TEXT,
+    content_type TEXT,
+    image_bytes BLOB,
+    use_cache INTEGER NOT NULL DEFAULT 1,
+    result TEXT,
+    error TEXT,
+    status_code INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_identify_jobs_hash ON identify_jobs (image_hash, status);
+CREATE INDEX IF NOT EXISTS idx_identify_jobs_status ON identify_jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_identify_jobs_finished ON identify_jobs (finished_at);
+"""
+
+_queue_depth = gauge("calyx_job_queue_depth", help_text="Identify jobs waiting for a worker")
+_queue_wait = histogram("calyx_job_queue_wait_seconds", help_text="Time from enqueue to a worker claiming the job")
+_job_latency = histogram("calyx_job_latency_seconds", help_text="Time from enqueue to job completion")
+
+
+class JobQueue:
+    """
+    Durable identify job queue on a local SQLite file.
+
+    Uploads are stored in the row until a worker finishes them, so
+    queued work survives a restart. Several processes may share the
+    file, so a claim is a lease: a job stays `running` for its worker
+    and is only put back on the queue once it has been running longer
+    than `lease_seconds` (its worker died).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = 300.0,
+        dedup_ttl_seconds: float = 600.0,
+        retention_seconds: float = 86400.0,
+    ):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.dedup_ttl_seconds = dedup_ttl_seconds
+        self.retention_seconds = retention_seconds
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = Lock()
+        self._pruned_at = 0.0
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._requeue_expired(time.time())
+
+        self._refresh_depth()
+
+    # =========================
+    # PRODUCER SIDE
+    # =========================
+
+    def enqueue(self, payload: UploadPayload, use_cache: bool = True) -> Tuple[str, bool]:
+        """
+        Returns (job_id, deduplicated). use_cache=False always creates
+        a new job: the caller asked for a fresh result.
+        """
+
+        placeholders = ",".join("?" for _ in DEDUP_STATUSES)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = None
+                if use_cache:
+                    existing = self._conn.execute(
+                        "SELECT id FROM identify_jobs WHERE image_hash = ? AND use_cache = 1 "
+                        f"AND (status IN ({placeholders}) OR (status = ? AND finished_at >= ?)) "
+                        "ORDER BY created_at DESC LIMIT 1",
+                        (payload.image_hash, *DEDUP_STATUSES, JOB_DONE, time.time() - self.dedup_ttl_seconds),
+                    ).fetchone()
+
+                if existing is not None:
+                    self._conn.execute("COMMIT")
+                    return existing["id"], True
+
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO identify_jobs "
+                    "(id, image_hash, status, filename, content_type, image_bytes, use_cache, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        job_id,
+                        payload.image_hash,
+                        JOB_QUEUED,
+                        payload.filename,
+                        payload.content_type,
+                        payload.image_bytes,
+                        int(use_cache),
+                        time.time(),
+                    ),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        self._refresh_depth()
+        return job_id, False
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, image_hash, status, result, error, status_code, "
+                "created_at, started_at, finished_at FROM identify_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def depth(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM identify_jobs WHERE status = ?",
+                (JOB_QUEUED,),
+            ).fetchone()
+        return int(row[0])
+
+    # =========================
+    # WORKER SIDE
+    # =========================
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._requeue_expired(now)
+                row = self._conn.execute(
+                    "SELECT * FROM identify_jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (JOB_QUEUED,),
+                ).fetchone()
+
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    idle = True
+                else:
+                    idle = False
+                    self._conn.execute(
+                        "UPDATE identify_jobs SET status = ?, started_at = ? WHERE id = ?",
+                        (JOB_RUNNING, now, row["id"]),
+                    )
+                    self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        if idle:
+            if now - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+                self.prune(now)
+            return None
+
+        job = dict(row)
+        _queue_wait.observe(now - job["created_at"])
+        self._refresh_depth()
+        return job
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._finish(job_id, JOB_DONE, result=json.dumps(result, default=str))
+
+    def fail(self, job_id: str, error: str, status_code: int = 500) -> None:
+        self._finish(job_id, JOB_FAILED, error=error, status_code=status_code)
+
+    def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[str] = None,
+        error: Optional[str] = None,
+        status_code: Optional[int] = None,
+    ) -> None:
+        now = time.time()
+
+        with self._lock:
+            # the upload is no longer needed once the job has an outcome
+            self._conn.execute(
+                "UPDATE identify_jobs SET status = ?, result = ?, error = ?, status_code = ?, "
+                "finished_at = ?, image_bytes = NULL WHERE id = ?",
+                (status, result, error, status_code, now, job_id),
+            )
+            row = self._conn.execute(
+                "SELECT created_at FROM identify_jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+
+        if row is not None:
+            _job_latency.observe(now - row["created_at"])
+
+    def _requeue_expired(self, now: float) -> None:
+        # caller holds the lock
+        self._conn.execute(
+            "UPDATE identify_jobs SET status = ?, started_at = NULL WHERE status = ? AND started_at < ?",
+            (JOB_QUEUED, JOB_RUNNING, now - self.lease_seconds),
+        )
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Deletes finished jobs older than the retention; returns how many."""
+
+        now = time.time() if now is None else now
+        placeholders = ",".join("?" for _ in FINISHED_STATUSES)
+
+        with self._lock:
+            self._pruned_at = now
+            deleted = self._conn.execute(
+                f"DELETE FROM identify_jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                (*FINISHED_STATUSES, now - self.retention_seconds),
+            ).rowcount
+
+        return deleted
+
+    def _refresh_depth(self) -> None:
+        _queue_depth.set(self.depth())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# =========================
+# WORKER POOL
+# =========================
+
+JobRunner = Callable[[UploadPayload, bool], Awaitable[Dict[str, Any]]]
+
+
+class JobWorkers:
+    """
+    Local asyncio workers draining a JobQueue.
+
+    Enqueues wake an idle worker immediately; otherwise workers re-poll
+    every `poll_interval` seconds so jobs written by another process
+    are picked up too.
+    """
+
+    def __init__(self, queue: JobQueue, runner: JobRunner, concurrency: int = 2, poll_interval: float = 1.0):
+        self.queue = queue
+        self.runner = runner
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        # job id -> (event, long-polls waiting on it); an entry lives only
+        # while someone waits, jobs finished elsewhere never set it
+        self._finished: Dict[str, Tuple[asyncio.Event, int]] = {}
+
+    def start(self) -> None:
+        for _ in range(self.concurrency):
+            self._tasks.append(asyncio.ensure_future(self._work()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def wait_for(self, job_id: str, timeout: float) -> None:
+        """Long-poll helper: returns when the job finishes or on timeout."""
+
+        event, waiters = self._finished.get(job_id, (None, 0))
+        if event is None:
+            event = asyncio.Event()
+        self._finished[job_id] = (event, waiters + 1)
+
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            entry = self._finished.get(job_id)
+            if entry is not None and entry[0] is event:
+                if entry[1] > 1:
+                    self._finished[job_id] = (event, entry[1] - 1)
+                else:
+                    del self._finished[job_id]
+
+    async def _work(self) -> None:
+        while True:
+            # cleared before claiming so an enqueue racing the claim is not lost
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self.queue.claim)
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            payload = UploadPayload(
+                image_bytes=job["image_bytes"],
+                image_hash=job["image_hash"],
+                filename=job["filename"] or "unknown",
+                content_type=job["content_type"] or "application/octet-stream",
+            )
+
+            try:
+                result = await self.runner(payload, bool(job["use_cache"]))
+                await asyncio.to_thread(self.queue.complete, job["id"], result)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await asyncio.to_thread(
+                    self.queue.fail,
+                    job["id"],
+                    str(getattr(e, "detail", None) or e),
+                    int(getattr(e, "status_code", 500)),
+                )
+
+            entry = self._finished.pop(job["id"], None)
+            if entry is not None:
+                entry[0].set()
@@ -0,0 +1,311 @@
+# backend/services/metrics.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# =========================
+# CONFIG
+# =========================
+
+# upper bounds (seconds) for the exported Prometheus histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# recent observations kept per stage for p50 / p95 / p99
+QUANTILE_WINDOW = 1024
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+# =========================
+# HISTOGRAM
+# =========================
+
+class LatencyHistogram:
+    """
+    Fixed-bucket histogram plus a ring buffer of recent samples.
+
+    Buckets feed the cumulative Prometheus export, the ring buffer
+    feeds the p50/p95/p99 quantiles. `observe` is O(buckets) with
+    no allocation so it stays cheap on the request path.
+    """
+
+    __slots__ = ("buckets", "counts", "total", "count", "_window", "_cursor", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._window: List[float] = []
+        self._cursor = 0
+        self._lock = Lock()
+
+    def observe(self, seconds: float) -> None:
+        idx = 0
+        for bound in self.buckets:
+            if seconds <= bound:
+                break
+            idx += 1
+
+        with self._lock:
+            self.counts[idx] += 1
+            self.total += seconds
+            self.count += 1
+
+            if len(self._window) < QUANTILE_WINDOW:
+                self._window.append(seconds)
+            else:
+                self._window[self._cursor] = seconds
+                self._cursor = (self._cursor + 1) % QUANTILE_WINDOW
+
+    def quantiles(self, qs: Iterable[float] = QUANTILES) -> Dict[float, float]:
+        with self._lock:
+            window = sorted(self._window)
+
+        if not window:
+            return {q: 0.0 for q in qs}
+
+        last = len(window) - 1
+        return {q: window[min(int(round(q * last)), last)] for q in qs}
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+# =========================
+# REGISTRY
+# =========================
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_histograms: Dict[Tuple[str, LabelKey], LatencyHistogram] = {}
+_counters: Dict[Tuple[str, LabelKey], Counter] = {}
+_gauges: Dict[Tuple[str, LabelKey], Gauge] = {}
+_help: Dict[str, str] = {}
+_registry_lock = Lock()
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _get_or_create(store, factory, name: str, labels, help_text: str):
+    key = (name, _label_key(labels))
+    metric = store.get(key)
+    if metric is not None:
+        return metric
+
+    with _registry_lock:
+        metric = store.get(key)
+        if metric is None:
+            metric = factory()
+            store[key] = metric
+            if help_text:
+                _help.setdefault(name, help_text)
+    return metric
+
+
+def histogram(name: str, labels: Optional[Dict[str, str]] = None, help_text: str = "") -> LatencyHistogram:
+    return _get_or_create(_histograms, LatencyHistogram, name, labels, help_text)
+
+
+def counter(name: str, labels: Optional[Dict[str, str]] = None, help_text: str = "") -> Counter:
+    return _get_or_create(_counters, Counter, name, labels, help_text)
+
+
+def gauge(name: str, labels: Optional[Dict[str, str]] = None, help_text: str = "") -> Gauge:
+    return _get_or_create(_gauges, Gauge, name, labels, help_text)
+
+
+# =========================
+# STAGE SPANS
+# =========================
+
+STAGE_METRIC = "calyx_stage_duration_seconds"
+
+_stage_histograms: Dict[str, LatencyHistogram] = {}
+
+
+class RequestTrace:
+    """Per-request list of (stage, seconds) used for Server-Timing."""
+
+    __slots__ = ("spans",)
+
+    def __init__(self):
+        self.spans: List[Tuple[str, float]] = []
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{stage};dur={seconds * 1000:.1f}"
+            for stage, seconds in self.spans
+        )
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar(
+    "calyx_request_trace",
+    default=None,
+)
+
+
+# off for synthetic traffic (startup warm-up, preload) so it does not
+# land in the production stage histograms
+_stage_recording: ContextVar[bool] = ContextVar("calyx_stage_recording", default=True)
+
+
+@contextmanager
+def stage_recording_off() -> Iterator[None]:
+    """Spans inside still fill the request trace, not the stage histograms."""
+
+    token = _stage_recording.set(False)
+    try:
+        yield
+    finally:
+        _stage_recording.reset(token)
+
+
+def start_trace() -> RequestTrace:
+    trace = RequestTrace()
+    _current_trace.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def _stage_histogram(stage: str) -> LatencyHistogram:
+    hist = _stage_histograms.get(stage)
+    if hist is None:
+        hist = histogram(
+            STAGE_METRIC,
+            {"stage": stage},
+            "Wall time spent in each identify pipeline stage",
+        )
+        _stage_histograms[stage] = hist
+    return hist
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    if _stage_recording.get():
+        _stage_histogram(stage).observe(seconds)
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append((stage, seconds))
+
+
+class span:
+    """
+    Times a pipeline stage:
+
+        with span("prepare_image"):
+            prepared = prepare_image(img)
+
+    The duration lands in the stage histogram and, when a request
+    trace is active, in that request's Server-Timing list.
+    """
+
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._start = 0.0
+
+    def __enter__(self) -> "span":
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        record_stage(self.stage, perf_counter() - self._start)
+
+
+# =========================
+# PROMETHEUS EXPORT
+# =========================
+
+def _format_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+
+    by_name: Dict[str, List[Tuple[LabelKey, LatencyHistogram]]] = {}
+    for (name, labels), hist in list(_histograms.items()):
+        by_name.setdefault(name, []).append((labels, hist))
+
+    for name, series in sorted(by_name.items()):
+        if name in _help:
+            lines.append(f"# HELP {name} {_help[name]}")
+        lines.append(f"# TYPE {name} histogram")
+
+        for labels, hist in series:
+            counts, total, count = hist.snapshot()
+            cumulative = 0
+            for bound, n in zip(hist.buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {repr(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        quantile_name = f"{name}_quantile"
+        lines.append(f"# TYPE {quantile_name} gauge")
+        for labels, hist in series:
+            for q, value in hist.quantiles().items():
+                lines.append(f"{quantile_name}{_format_labels(labels, (('quantile', str(q)),))} {repr(value)}")
+
+    for store, kind in ((_counters, "counter"), (_gauges, "gauge")):
+        grouped: Dict[str, List[Tuple[LabelKey, float]]] = {}
+        for (name, labels), metric in list(store.items()):
+            grouped.setdefault(name, []).append((labels, metric.value))
+
+        for name, series in sorted(grouped.items()):
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
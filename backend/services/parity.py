@@ -0,0 +1,393 @@
+# backend/services/parity.py
+import asyncio
+import hashlib
+import json
+import random
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from backend.config import settings
+from backend.services.candidate_service import rank_candidates
+from backend.services.color_extractor import extract_color_traits
+from backend.services.metrics import counter
+from backend.services.pose_extractor import compute_pose_traits
+from backend.services.shape_extractor import compute_shape_traits
+
+
+# bump when the snapshot layout changes; golden files from another
+# version have to be re-recorded
+PARITY_VERSION = 1
+
+# ranked candidates compared per image
+RANKING_TOP_K = 5
+
+CLUSTER_FIELDS = ("centre", "area", "confidence", "petal_spread_ratio")
+BBOX_FIELDS = ("major_axis", "minor_axis", "orientation")
+
+TRAIT_FIELDS = (
+    "cluster_count",
+    "pose_confidence",
+    "petal_count",
+    "petal_shape_outer",
+    "petal_shape_inner",
+    "petal_overlap",
+    "petal_margin",
+    "bloom_openness",
+    "ips_radius",
+    "horizon_count",
+    "horizon_variance",
+    "structure_type",
+)
+
+# snapshot field -> path into extract_color_traits output
+COLOR_FIELDS = {
+    "petal_color_primary": ("petal_color", "primary"),
+    "petal_color_secondary": ("petal_color", "secondary"),
+    "petal_color_confidence": ("petal_color", "confidence"),
+    "centre_color_primary": ("centre_color", "primary"),
+    "color_finish": ("color_finish",),
+}
+
+
+# =========================
+# TOLERANCES
+# =========================
+
+@dataclass(frozen=True)
+class Tolerance:
+    """Numbers match when |a - b| <= abs + rel * |expected|."""
+
+    abs: float = 0.0
+    rel: float = 0.0
+
+    def allows(self, expected: float, actual: float) -> bool:
+        return abs(actual - expected) <= self.abs + self.rel * abs(expected)
+
+
+# keyed by snapshot path with list indices dropped; anything not
+# listed (categoricals, counts, candidate ids) must match exactly
+TOLERANCES: Dict[str, Tolerance] = {
+    "clusters.centre": Tolerance(abs=5),  # 0-1000 grid
+    "clusters.area": Tolerance(rel=0.03),
+    "clusters.confidence": Tolerance(abs=0.02),
+    "clusters.petal_spread_ratio": Tolerance(rel=0.05),
+    "clusters.bbox.major_axis": Tolerance(rel=0.03),
+    "clusters.bbox.minor_axis": Tolerance(rel=0.03),
+    "clusters.bbox.orientation": Tolerance(abs=5.0),
+    "traits.pose_confidence": Tolerance(abs=0.02),
+    "traits.ips_radius": Tolerance(abs=2),
+    "traits.horizon_variance": Tolerance(abs=0.05),
+    "color.petal_color_confidence": Tolerance(abs=0.03),
+    "ranking.trait_score": Tolerance(abs=0.05),
+}
+
+
+@dataclass
+class Mismatch:
+    field: str
+    expected: Any
+    actual: Any
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"field": self.field, "expected": self.expected, "actual": self.actual}
+
+
+# =========================
+# SNAPSHOTS
+# =========================
+
+def _json_safe(value: Any) -> Any:
+    # round-trip so tuples / numpy scalars compare like the golden file
+    return json.loads(json.dumps(value, default=float))
+
+
+def _lookup(data: Dict[str, Any], path: tuple) -> Any:
+    for key in path:
+        data = (data or {}).get(key)
+    return data
+
+
+def trait_snapshot(traits: Dict[str, Any]) -> Dict[str, Any]:
+    """Cluster geometry plus the scalar traits matching relies on."""
+
+    clusters = []
+    for cluster in traits.get("clusters") or []:
+        entry = {field: cluster.get(field) for field in CLUSTER_FIELDS}
+        entry["bbox"] = {field: (cluster.get("bbox") or {}).get(field) for field in BBOX_FIELDS}
+        clusters.append(entry)
+
+    return _json_safe({
+        "clusters": clusters,
+        "traits": {field: traits.get(field) for field in TRAIT_FIELDS},
+    })
+
+
+def ranking_snapshot(candidates: List[Dict[str, Any]], traits: Dict[str, Any], top_k: int = RANKING_TOP_K) -> List[Dict[str, Any]]:
+    return _json_safe([
+        {"id": c.get("id"), "trait_score": round(float(c.get("trait_score") or 0.0), 4)}
+        for c in rank_candidates(candidates, traits)[:top_k]
+    ])
+
+
+def image_snapshot(img: Image.Image, pose_mode: str, candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Blocking: pose, shape, colour and ranking for one image with the
+    given pose implementation.
+    """
+
+    pose = compute_pose_traits(img, mode=pose_mode)
+    shape = compute_shape_traits(img, pose)
+
+    traits = {
+        **{k: v for k, v in pose.items() if k not in ("cluster_masks", "global_mask", "contours")},
+        **shape,
+    }
+
+    color = extract_color_traits(img, pose)
+
+    snapshot = trait_snapshot(traits)
+    snapshot["color"] = _json_safe({
+        field: _lookup(color, path)
+        for field, path in COLOR_FIELDS.items()
+    })
+    snapshot["ranking"] = ranking_snapshot(candidates, traits)
+
+    return snapshot
+
+
+def seed_candidates(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Seed species flattened like search_by_traits rows, as a fixed shortlist."""
+
+    with open(path or settings.LOCAL_DB_SEED_PATH, "r", encoding="utf-8") as f:
+        payload = json.load(f)
+
+    rows = payload.get("species", []) if isinstance(payload, dict) else payload
+
+    return [
+        {
+            "id": row.get("id"),
+            "scientific_name": row.get("scientific_name"),
+            **(row.get("traits") or {}),
+        }
+        for row in rows
+    ]
+
+
+# =========================
+# DIFF
+# =========================
+
+def _tolerance_key(path: str) -> str:
+    return ".".join(part for part in path.split(".") if not part.isdigit())
+
+
+def diff_snapshots(expected: Any, actual: Any, path: str = "", tolerances: Optional[Dict[str, Tolerance]] = None) -> List[Mismatch]:
+    tolerances = TOLERANCES if tolerances is None else tolerances
+
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        mismatches: List[Mismatch] = []
+        for key in sorted(set(expected) | set(actual)):
+            child = f"{path}.{key}" if path else key
+            mismatches.extend(diff_snapshots(expected.get(key), actual.get(key), child, tolerances))
+        return mismatches
+
+    tolerance = tolerances.get(_tolerance_key(path))
+
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [Mismatch(f"{path}.length", len(expected), len(actual))]
+
+        mismatches = []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            # numeric pairs such as centres use the field's tolerance element-wise
+            if tolerance is not None and _is_number(e) and _is_number(a):
+                if not tolerance.allows(float(e), float(a)):
+                    return [Mismatch(path, expected, actual)]
+                continue
+            mismatches.extend(diff_snapshots(e, a, f"{path}.{i}", tolerances))
+        return mismatches
+
+    if tolerance is not None and _is_number(expected) and _is_number(actual):
+        return [] if tolerance.allows(float(expected), float(actual)) else [Mismatch(path, expected, actual)]
+
+    return [] if expected == actual else [Mismatch(path, expected, actual)]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+# =========================
+# GOLDEN CORPUS
+# =========================
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+# committed synthetic corpus: regenerated from the seed, never stored
+SYNTHETIC_COUNT = 6
+SYNTHETIC_SEED = 0
+
+
+def corpus_manifest(folder: Path) -> Dict[str, str]:
+    """filename -> sha256 for every image in the corpus folder."""
+
+    return {
+        p.name: hashlib.sha256(p.read_bytes()).hexdigest()
+        for p in sorted(folder.iterdir())
+        if p.suffix.lower() in IMAGE_SUFFIXES
+    }
+
+
+def _load_image(path: Path) -> Image.Image:
+    with Image.open(path) as img:
+        return img.convert("RGB")
+
+
+def folder_corpus(folder: Path) -> Tuple[Dict[str, str], Callable[[str], Image.Image]]:
+    """(manifest, loader) for an image folder; images load lazily."""
+
+    return corpus_manifest(folder), lambda name: _load_image(folder / name)
+
+
+def synthetic_corpus(count: int = SYNTHETIC_COUNT, seed: int = SYNTHETIC_SEED) -> Tuple[Dict[str, str], Callable[[str], Image.Image]]:
+    """
+    (manifest, loader) for the seeded synthetic scenes, rendered in
+    memory. The manifest hashes decoded pixels rather than file bytes,
+    so it does not depend on the JPEG encoder.
+    """
+
+    from backend.services.synthetic_flowers import corpus_scenes
+
+    images = {name: scene.image.convert("RGB") for name, scene in corpus_scenes(count, seed)}
+    manifest = {
+        name: hashlib.sha256(f"{img.size}".encode() + img.tobytes()).hexdigest()
+        for name, img in images.items()
+    }
+    return manifest, images.__getitem__
+
+
+def record_golden(
+    manifest: Dict[str, str],
+    load: Callable[[str], Image.Image],
+    pose_mode: str = "reference",
+    candidates: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    candidates = seed_candidates() if candidates is None else candidates
+
+    return {
+        "parity_version": PARITY_VERSION,
+        "pose_mode": pose_mode,
+        "manifest": manifest,
+        "snapshots": {
+            name: image_snapshot(load(name), pose_mode, candidates)
+            for name in manifest
+        },
+    }
+
+
+def check_golden(
+    manifest: Dict[str, str],
+    load: Callable[[str], Image.Image],
+    golden: Dict[str, Any],
+    pose_mode: str,
+    candidates: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, List[Mismatch]]:
+    """
+    Re-runs every corpus image with `pose_mode` and diffs it against
+    the golden snapshots. Returns {name: mismatches} for failures.
+    """
+
+    if golden.get("parity_version") != PARITY_VERSION:
+        raise ValueError(
+            f"Golden file is parity version {golden.get('parity_version')}, "
+            f"expected {PARITY_VERSION}; re-record it"
+        )
+
+    if manifest != golden.get("manifest"):
+        changed = sorted(set(manifest.items()) ^ set((golden.get("manifest") or {}).items()))
+        raise ValueError(f"Corpus differs from the golden manifest ({len(changed)} entries); re-record it")
+
+    candidates = seed_candidates() if candidates is None else candidates
+
+    failures: Dict[str, List[Mismatch]] = {}
+    for name, expected in golden["snapshots"].items():
+        actual = image_snapshot(load(name), pose_mode, candidates)
+        mismatches = diff_snapshots(expected, actual)
+        if mismatches:
+            failures[name] = mismatches
+
+    return failures
+
+
+# =========================
+# SHADOW MODE
+# =========================
+
+_shadow_match = counter(
+    "calyx_parity_shadow_comparisons_total",
+    {"outcome": "match"},
+    "Sampled requests re-run with SHADOW_POSE_MODE and diffed against the served traits",
+)
+_shadow_mismatch = counter("calyx_parity_shadow_comparisons_total", {"outcome": "mismatch"})
+_shadow_error = counter("calyx_parity_shadow_comparisons_total", {"outcome": "error"})
+
+
+def shadow_sampled() -> bool:
+    # multi-flower traits come from a different shape path; single-flower only
+    if not settings.SHADOW_POSE_MODE or settings.MULTI_FLOWER:
+        return False
+    return random.random() < settings.SHADOW_SAMPLE_RATE
+
+
+def _shadow_compare_blocking(
+    img: Image.Image,
+    traits: Dict[str, Any],
+    candidates: List[Dict[str, Any]],
+) -> List[Mismatch]:
+    expected = trait_snapshot(traits)
+    expected["ranking"] = ranking_snapshot(candidates, traits)
+
+    pose = compute_pose_traits(img, mode=settings.SHADOW_POSE_MODE)
+    shadow_traits = {**pose, **compute_shape_traits(img, pose)}
+
+    actual = trait_snapshot(shadow_traits)
+    actual["ranking"] = ranking_snapshot(candidates, shadow_traits)
+
+    return diff_snapshots(expected, actual)
+
+
+async def shadow_compare(
+    img: Image.Image,
+    traits: Dict[str, Any],
+    candidates: List[Dict[str, Any]],
+) -> None:
+    """
+    Re-runs pose + shape on `img` with SHADOW_POSE_MODE and diffs the
+    result (and the ranking it gives the same shortlist) against what
+    was served. Only counts and logs; the response never waits on it.
+    """
+
+    try:
+        mismatches = await asyncio.to_thread(_shadow_compare_blocking, img, traits, candidates)
+    except Exception as e:
+        _shadow_error.inc()
+        print(f"⚠️ Shadow comparison failed: {e}")
+        return
+
+    if not mismatches:
+        _shadow_match.inc()
+        return
+
+    _shadow_mismatch.inc()
+    for m in mismatches:
+        counter(
+            "calyx_parity_shadow_field_mismatches_total",
+            {"field": _tolerance_key(m.field)},
+            "Fields outside tolerance in shadow comparisons",
+        ).inc()
+
+    print(f"⚠️ Shadow mismatch ({settings.POSE_MODE} vs {settings.SHADOW_POSE_MODE}): "
+          + ", ".join(f"{m.field}: {m.expected} → {m.actual}" for m in mismatches[:5]))
@@ -0,0 +1,115 @@
+# backend/services/pipeline_dag.py
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Set, Tuple
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One node of the pipeline graph.
+
+    `fn` is awaited with the results of `deps` as keyword arguments
+    (keyed by dependency name). Background stages are started once
+    their deps resolve but never hold up `run_dag`.
+    """
+
+    name: str
+    fn: Callable[..., Awaitable[Any]]
+    deps: Tuple[str, ...] = ()
+    background: bool = False
+
+
+# strong refs so fire-and-forget stages are not garbage collected mid-run
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _validate(stages: Sequence[Stage]) -> None:
+    names = [s.name for s in stages]
+
+    if len(names) != len(set(names)):
+        raise ValueError("Duplicate stage names in pipeline")
+
+    known = set(names)
+    for stage in stages:
+        missing = [d for d in stage.deps if d not in known]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages {missing}")
+
+    background = {s.name for s in stages if s.background}
+    for stage in stages:
+        if not stage.background and any(d in background for d in stage.deps):
+            raise ValueError(f"Stage '{stage.name}' cannot depend on a background stage")
+
+    # Kahn's algorithm: anything left over is part of a cycle
+    indegree = {s.name: len(s.deps) for s in stages}
+    children: Dict[str, List[str]] = {s.name: [] for s in stages}
+    for stage in stages:
+        for dep in stage.deps:
+            children[dep].append(stage.name)
+
+    ready = [n for n, d in indegree.items() if d == 0]
+    visited = 0
+    while ready:
+        node = ready.pop()
+        visited += 1
+        for child in children[node]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                ready.append(child)
+
+    if visited != len(stages):
+        raise ValueError("Pipeline stages contain a dependency cycle")
+
+
+async def run_dag(stages: Sequence[Stage]) -> Dict[str, Any]:
+    """
+    Runs every stage as soon as its dependencies resolve, so wall time
+    tracks the longest dependency chain instead of the sum of stages.
+
+    Returns results for the foreground stages. The first foreground
+    failure cancels the remaining work and is re-raised.
+    """
+
+    _validate(stages)
+
+    tasks: Dict[str, asyncio.Task] = {}
+
+    async def _run(stage: Stage) -> Any:
+        kwargs = {}
+        for dep in stage.deps:
+            kwargs[dep] = await tasks[dep]
+        return await stage.fn(**kwargs)
+
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(_run(stage))
+
+    foreground = {s.name: tasks[s.name] for s in stages if not s.background}
+
+    for stage in stages:
+        if stage.background:
+            task = tasks[stage.name]
+            _background_tasks.add(task)
+            task.add_done_callback(_finish_background)
+
+    try:
+        await asyncio.gather(*foreground.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        # drain so sibling failures are not reported as never retrieved
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+
+    return {name: task.result() for name, task in foreground.items()}
+
+
+def _finish_background(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+
+    if task.cancelled():
+        return
+
+    exc = task.exception()
+    if exc is not None:
+        print(f"❌ Background stage failed: {exc}")
@@ -1,9 +1,14 @@
-from typing import Any, Dict, List
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Dict, List, Optional
 
 import cv2
 import numpy as np
 from PIL import Image
 
+from backend.config import settings
+from backend.services.metrics import counter, gauge
+
 
 # =========================
 # CONFIG
@@ -17,6 +22,14 @@ LINEARITY_RATIO_THRESHOLD = 10.0
 
 PROXIMITY_MERGE_THRESHOLD = 80
 
+# components lying entirely inside this band along one frame edge are
+# severed slivers and never reach contour scoring
+BORDER_BAND = 8
+
+# per-request default mode (admission control degrades overloaded
+# requests to "pyramid"); copied into asyncio.to_thread workers
+pose_mode_override: ContextVar[Optional[str]] = ContextVar("calyx_pose_mode_override", default=None)
+
 
 # =========================
 # TEXTURE FILTER
@@ -136,7 +149,8 @@ def _compute_radial_symmetry(
 # =========================
 
 def _compute_core_score(
-    contour: np.ndarray
+    contour: np.ndarray,
+    scale: float = 1.0
 ) -> float:
 
     x, y, bw, bh = cv2.boundingRect(contour)
@@ -189,7 +203,7 @@ def _compute_core_score(
 
     score = (
         edge_dist * 0.7 +
-        min(max_val / 40.0, 1.0) * 0.3
+        min(max_val * scale / 40.0, 1.0) * 0.3
     )
 
     return float(
@@ -262,6 +276,8 @@ def _compute_edge_adhesion(
     if len(pts) < 12:
         return 0.0
 
+    # per-contour reference; the main path uses _score_contours_batch
+
     edge_strengths = []
 
     contrasts = []
@@ -354,6 +370,235 @@ def _compute_edge_adhesion(
         np.clip(score, 0.0, 1.0)
     )
 
+# =========================
+# BATCHED CONTOUR SCORING
+# =========================
+
+def _score_contours_batch(
+    contours,
+    centres,
+    gradient_mag: np.ndarray,
+    hsv: np.ndarray,
+    img_width: int,
+    img_height: int,
+    margin: int = 8,
+    sample_step: int = 4
+):
+    """
+    Border contact, radial symmetry and edge adhesion for every
+    contour at once.
+
+    All contour points are concatenated with a segment id per point;
+    tangents, normals, inside/outside samples and per-contour means are
+    array ops plus bincount reductions. Matches the per-contour
+    `_get_border_contact_ratio`, `_compute_radial_symmetry` and
+    `_compute_edge_adhesion` up to float summation order.
+    """
+
+    n = len(contours)
+
+    border = np.zeros(n, dtype=np.float64)
+    symmetry = np.zeros(n, dtype=np.float64)
+    edge = np.zeros(n, dtype=np.float64)
+
+    if n == 0:
+        return border, symmetry, edge
+
+    lengths = np.array(
+        [len(c) for c in contours],
+        dtype=np.int64
+    )
+
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    pts = np.concatenate(
+        [c.reshape(-1, 2) for c in contours]
+    )
+
+    seg = np.repeat(
+        np.arange(n),
+        lengths
+    )
+
+    counts = np.maximum(lengths, 1).astype(np.float64)
+
+    # =========================
+    # BORDER CONTACT
+    # =========================
+
+    on_border = (
+        (pts[:, 0] <= margin) |
+        (pts[:, 0] >= (img_width - margin)) |
+        (pts[:, 1] <= margin) |
+        (pts[:, 1] >= (img_height - margin))
+    )
+
+    border = np.bincount(
+        seg,
+        weights=on_border,
+        minlength=n
+    ) / counts
+
+    # =========================
+    # RADIAL SYMMETRY
+    # =========================
+
+    centres = np.asarray(centres, dtype=np.float64).reshape(n, 2)
+
+    distances = np.sqrt(
+        (pts[:, 0] - centres[seg, 0]) ** 2 +
+        (pts[:, 1] - centres[seg, 1]) ** 2
+    )
+
+    mean_dist = np.bincount(seg, weights=distances, minlength=n) / counts
+
+    deviation = distances - mean_dist[seg]
+
+    std_dist = np.sqrt(
+        np.bincount(seg, weights=deviation ** 2, minlength=n) / counts
+    )
+
+    symmetric_ok = (lengths >= 10) & (mean_dist > 1e-6)
+
+    symmetry[symmetric_ok] = np.clip(
+        1.0 - std_dist[symmetric_ok] / mean_dist[symmetric_ok],
+        0.0,
+        1.0
+    )
+
+    # =========================
+    # EDGE ADHESION
+    # =========================
+
+    local = np.arange(len(pts)) - offsets[seg]
+
+    sampled = (
+        (local % sample_step == 0) &
+        (lengths[seg] >= 12)
+    )
+
+    s_idx = np.flatnonzero(sampled)
+
+    if len(s_idx) == 0:
+        return border, symmetry, edge
+
+    s_seg = seg[s_idx]
+    s_local = local[s_idx]
+    s_len = lengths[s_seg]
+    s_off = offsets[s_seg]
+
+    p_prev = pts[s_off + (s_local - 1) % s_len]
+    p_curr = pts[s_idx]
+    p_next = pts[s_off + (s_local + 1) % s_len]
+
+    tangent = (p_next - p_prev).astype(np.float64)
+
+    norm = np.sqrt(
+        tangent[:, 0] ** 2 +
+        tangent[:, 1] ** 2
+    )
+
+    moving = norm > 1e-6
+
+    tangent = tangent[moving] / norm[moving, None]
+
+    p_curr = p_curr[moving].astype(np.float32)
+    s_seg = s_seg[moving]
+
+    # perpendicular normal
+    normal_x = -tangent[:, 1]
+    normal_y = tangent[:, 0]
+
+    x = p_curr[:, 0]
+    y = p_curr[:, 1]
+
+    # astype truncates toward zero, same as int()
+    ox = (x + normal_x * 2).astype(np.int64)
+    oy = (y + normal_y * 2).astype(np.int64)
+
+    ix = (x - normal_x * 2).astype(np.int64)
+    iy = (y - normal_y * 2).astype(np.int64)
+
+    h, w = gradient_mag.shape
+
+    in_bounds = (
+        (ox >= 0) & (oy >= 0) & (ox < w) & (oy < h) &
+        (ix >= 0) & (iy >= 0) & (ix < w) & (iy < h)
+    )
+
+    x = x[in_bounds].astype(np.int64)
+    y = y[in_bounds].astype(np.int64)
+    ox, oy = ox[in_bounds], oy[in_bounds]
+    ix, iy = ix[in_bounds], iy[in_bounds]
+    s_seg = s_seg[in_bounds]
+
+    edge_strengths = gradient_mag[y, x].astype(np.float64)
+
+    delta = (
+        hsv[iy, ix].astype(np.float32) -
+        hsv[oy, ox].astype(np.float32)
+    )
+
+    contrasts = np.sqrt(
+        np.sum(delta * delta, axis=1)
+    ).astype(np.float64)
+
+    sample_counts = np.bincount(s_seg, minlength=n).astype(np.float64)
+
+    has_samples = sample_counts > 0
+
+    mean_edge = np.bincount(s_seg, weights=edge_strengths, minlength=n)
+    mean_contrast = np.bincount(s_seg, weights=contrasts, minlength=n)
+
+    mean_edge[has_samples] /= sample_counts[has_samples] * 255.0
+    mean_contrast[has_samples] /= sample_counts[has_samples] * 255.0
+
+    edge[has_samples] = np.clip(
+        mean_edge[has_samples] * 0.55 +
+        mean_contrast[has_samples] * 0.45,
+        0.0,
+        1.0
+    )
+
+    return border, symmetry, edge
+
+
+def _score_contours_reference(
+    contours,
+    centres,
+    gradient_mag: np.ndarray,
+    hsv: np.ndarray,
+    img_width: int,
+    img_height: int,
+    margin: int = 8,
+    sample_step: int = 4
+):
+    """
+    Same (border, symmetry, edge) arrays as `_score_contours_batch`,
+    one contour at a time with the original scorers.
+    """
+
+    border = [
+        _get_border_contact_ratio(contour, img_width, img_height, margin=margin)
+        for contour in contours
+    ]
+
+    symmetry = [
+        _compute_radial_symmetry(contour, centre)
+        for contour, centre in zip(contours, centres)
+    ]
+
+    edge = [
+        _compute_edge_adhesion(contour, gradient_mag, hsv, sample_step=sample_step)
+        for contour in contours
+    ]
+
+    return (
+        np.asarray(border, dtype=np.float64),
+        np.asarray(symmetry, dtype=np.float64),
+        np.asarray(edge, dtype=np.float64)
+    )
+
 # =========================
 # FLOWER MASK
 # =========================
@@ -495,6 +740,124 @@ def _create_flower_mask(
     return mask
 
 
+# =========================
+# CONNECTED COMPONENT PREFILTER
+# =========================
+
+_components_in = counter(
+    "calyx_pose_components_total",
+    {"outcome": "in"},
+    "Mask components seen by the pose prefilter"
+)
+
+_components_kept = counter(
+    "calyx_pose_components_total",
+    {"outcome": "kept"},
+    "Mask components seen by the pose prefilter"
+)
+
+_prefilter_saved = counter(
+    "calyx_pose_prefilter_seconds_saved_total",
+    help_text="Estimated contour scoring time avoided by the prefilter, net of its own cost"
+)
+
+_contour_gate_cost = gauge(
+    "calyx_pose_contour_gate_seconds",
+    help_text="Moving average of per-contour gate cost used for the saved-time estimate"
+)
+
+# EWMA weight for the per-contour gate cost
+_GATE_COST_ALPHA = 0.1
+
+
+def _prefilter_components(
+    mask: np.ndarray,
+    min_area: int = MIN_CLUSTER_AREA,
+    band: int = BORDER_BAND
+):
+    """
+    Drops mask components that can never become a scored contour,
+    using vectorised connectedComponentsWithStats stats instead of
+    building and gating a contour per blob.
+
+    A component is rejected when its bounding box is smaller than
+    `min_area` (a contour's polygon area never exceeds its bbox) or
+    when it sits entirely inside the `band` along a frame edge.
+
+    Returns (filtered_mask, components_in, components_kept).
+    """
+
+    n_labels, labels, stats, _ = cv2.connectedComponentsWithStats(
+        mask,
+        connectivity=8
+    )
+
+    # label 0 is background
+    stats = stats[1:]
+
+    n_components = len(stats)
+
+    if n_components == 0:
+        return mask, 0, 0
+
+    h, w = mask.shape
+
+    x = stats[:, cv2.CC_STAT_LEFT]
+    y = stats[:, cv2.CC_STAT_TOP]
+    bw = stats[:, cv2.CC_STAT_WIDTH]
+    bh = stats[:, cv2.CC_STAT_HEIGHT]
+
+    big_enough = (bw * bh) >= min_area
+
+    in_band = (
+        (x + bw <= band) |
+        (y + bh <= band) |
+        (x >= w - band) |
+        (y >= h - band)
+    )
+
+    keep = big_enough & ~in_band
+
+    kept = int(np.count_nonzero(keep))
+
+    if kept == n_components:
+        return mask, n_components, kept
+
+    lut = np.zeros(n_labels, dtype=np.uint8)
+    lut[1:][keep] = 255
+
+    return lut[labels], n_components, kept
+
+
+def _record_prefilter(
+    components_in: int,
+    components_kept: int,
+    prefilter_seconds: float,
+    gate_seconds: float,
+    gated_contours: int
+) -> None:
+
+    _components_in.inc(components_in)
+    _components_kept.inc(components_kept)
+
+    if gated_contours:
+        per_contour = gate_seconds / gated_contours
+
+        if _contour_gate_cost.value == 0.0:
+            _contour_gate_cost.set(per_contour)
+        else:
+            _contour_gate_cost.set(
+                _contour_gate_cost.value * (1 - _GATE_COST_ALPHA) +
+                per_contour * _GATE_COST_ALPHA
+            )
+
+    rejected = components_in - components_kept
+
+    saved = rejected * _contour_gate_cost.value - prefilter_seconds
+
+    _prefilter_saved.inc(max(saved, 0.0))
+
+
 # =========================
 # GEOMETRY
 # =========================
@@ -545,11 +908,12 @@ def _score_contour(
     contour,
     geometry,
     image_centre,
-    max_distance
+    max_distance,
+    area_scale: float = 1.0
 ):
 
     area_score = min(
-        geometry["area"] / 50000,
+        geometry["area"] * area_scale / 50000,
         1.0
     )
 
@@ -586,9 +950,142 @@ def _score_contour(
 # CONTOUR GROUPING
 # =========================
 
+def _contour_stats(
+    contours
+):
+    """
+    Areas and centroids for every contour, computed once.
+
+    `valid` is False for degenerate contours (zero m00), which the
+    grouping skips exactly like the original pairwise loop did.
+    """
+
+    n = len(contours)
+
+    areas = np.zeros(n, dtype=np.float64)
+    centroids = np.zeros((n, 2), dtype=np.float64)
+    valid = np.zeros(n, dtype=bool)
+
+    for i, contour in enumerate(contours):
+
+        M = cv2.moments(contour)
+
+        areas[i] = cv2.contourArea(contour)
+
+        if M["m00"] == 0:
+            continue
+
+        centroids[i, 0] = M["m10"] / M["m00"]
+        centroids[i, 1] = M["m01"] / M["m00"]
+        valid[i] = True
+
+    return areas, centroids, valid
+
+
 def _group_contours(
+    contours,
+    threshold: float = PROXIMITY_MERGE_THRESHOLD
+):
+    """
+    Greedy proximity grouping in score order.
+
+    Contours are bucketed into a grid with `threshold` sized cells, so each seed only looks at the 3x3 cells around it
+    instead of every other contour. Candidates are still visited in
+    index order, so groups match the pairwise reference exactly.
+    """
+
+    n = len(contours)
+
+    if n == 0:
+        return []
+
+    areas, centroids, valid = _contour_stats(contours)
+
+    cell_size = float(threshold)
+
+    cells = np.floor(
+        centroids / cell_size
+    ).astype(np.int64)
+
+    grid: Dict[tuple, List[int]] = {}
+
+    for idx in np.flatnonzero(valid):
+        key = (int(cells[idx, 0]), int(cells[idx, 1]))
+        grid.setdefault(key, []).append(int(idx))
+
+    grouped = []
+
+    used = np.zeros(n, dtype=bool)
+
+    for i in range(n):
+
+        if used[i]:
+            continue
+
+        used[i] = True
+
+        if not valid[i]:
+            continue
+
+        group = [contours[i]]
+
+        cx1, cy1 = centroids[i]
+        area1 = areas[i]
+
+        gx, gy = int(cells[i, 0]), int(cells[i, 1])
+
+        neighbours = []
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for j in grid.get((gx + dx, gy + dy), ()):
+                    if j > i:
+                        neighbours.append(j)
+
+        neighbours.sort()
+
+        for j in neighbours:
+
+            if used[j]:
+                continue
+
+            cx2, cy2 = centroids[j]
+
+            dist = np.sqrt(
+                (cx1 - cx2) ** 2 +
+                (cy1 - cy2) ** 2
+            )
+
+            area2 = areas[j]
+
+            area_ratio = max(
+                area1,
+                area2
+            ) / (
+                min(area1, area2) + 1e-6
+            )
+
+            if area_ratio > 4.0:
+                continue
+
+            if dist < threshold:
+
+                group.append(contours[j])
+
+                used[j] = True
+
+        grouped.append(group)
+
+    return grouped
+
+
+def _group_contours_reference(
     contours
 ):
+    """
+    Original O(n^2) pairwise grouping, kept as the parity reference
+    for `_group_contours`.
+    """
 
     grouped = []
 
@@ -654,21 +1151,13 @@ def _group_contours(
 
 
 # =========================
-# MAIN
+# STAGES
 # =========================
 
-async def extract_pose_traits(
-    img: Image.Image
-) -> Dict[str, Any]:
-
-    rgb = np.asarray(
-        img.convert("RGB")
-    )
-
-    bgr = cv2.cvtColor(
-        rgb,
-        cv2.COLOR_RGB2BGR
-    )
+def _compute_planes(
+    bgr: np.ndarray
+):
+    """HSV, gray, normalised Sobel magnitude and flower mask for one level."""
 
     hsv = cv2.cvtColor(
         bgr,
@@ -719,8 +1208,52 @@ async def extract_pose_traits(
         gray
     )
 
+    return hsv, gray, gradient_mag, mask
+
+
+def _rank_contour_groups(
+    mask: np.ndarray,
+    hsv: np.ndarray,
+    gradient_mag: np.ndarray,
+    scale: float = 1.0,
+    reference: bool = False
+):
+    """
+    Prefilter, gate, score and group the mask's contours.
+
+    `scale` is the full-resolution pixels per pixel of this level;
+    area, distance and proximity thresholds are rescaled by it so a
+    coarse pyramid level ranks contours like the full image would.
+
+    `reference` skips the component prefilter and uses the original
+    per-contour scorers and pairwise grouping (parity baseline).
+    """
+
+    area_scale = scale * scale
+
+    min_area = MIN_CLUSTER_AREA / area_scale
+
+    prefilter_start = perf_counter()
+
+    if reference:
+
+        filtered_mask = mask
+
+    else:
+
+        # removed components never hold kept ones in their holes
+        # (bbox containment), so the external contours of the
+        # survivors are exactly those of the full mask
+        filtered_mask, components_in, components_kept = _prefilter_components(
+            mask,
+            min_area=int(min_area),
+            band=max(int(BORDER_BAND / scale), 1)
+        )
+
+    prefilter_seconds = perf_counter() - prefilter_start
+
     contours, _ = cv2.findContours(
-        mask,
+        filtered_mask,
         cv2.RETR_EXTERNAL,
         cv2.CHAIN_APPROX_SIMPLE
     )
@@ -737,75 +1270,99 @@ async def extract_pose_traits(
         h
     ])
 
-    scored = []
+    # =========================
+    # CHEAP GATES: AREA + GEOMETRY
+    # =========================
+
+    gate_start = perf_counter()
+
+    candidates = []
+    geometries = []
 
     for contour in contours:
 
         area = cv2.contourArea(contour)
 
-        if area < MIN_CLUSTER_AREA:
+        if area < min_area:
             continue
 
-        # =========================
-        # BORDER CONTACT REJECTION
-        # =========================
-
-        border_ratio = _get_border_contact_ratio(
-            contour,
-            w,
-            h,
-            margin=8
-        )
-
-        # heavily severed by frame edge
-        border_penalty = border_ratio * 0.35
-
         geometry = _compute_geometry(contour)
 
         if geometry is None:
             continue
 
-        symmetry_score = _compute_radial_symmetry(
-            contour,
-            geometry["centre"]
-        )
+        if geometry["ratio"] > LINEARITY_RATIO_THRESHOLD:
+            continue
 
-        edge_score = _compute_edge_adhesion(
-            contour,
-            gradient_mag,
-            hsv
-        )
+        candidates.append(contour)
+        geometries.append(geometry)
 
-        core_score = _compute_core_score(
-            contour
+    if not reference:
+
+        _record_prefilter(
+            components_in,
+            components_kept,
+            prefilter_seconds,
+            perf_counter() - gate_start,
+            len(contours)
         )
 
-        if geometry["ratio"] > LINEARITY_RATIO_THRESHOLD:
-            continue
+    # =========================
+    # BATCHED SCORES
+    # =========================
 
-        # reject highly asymmetric fragments
-        if symmetry_score < 0.18:
-            continue
+    score_fn = (
+        _score_contours_reference
+        if reference
+        else _score_contours_batch
+    )
+
+    border_ratios, symmetry_scores, edge_scores = score_fn(
+        candidates,
+        [g["centre"] for g in geometries],
+        gradient_mag,
+        hsv,
+        w,
+        h,
+        margin=max(int(8 / scale), 1)
+    )
+
+    # reject highly asymmetric fragments + weak edges
+    keep = (
+        (symmetry_scores >= 0.18) &
+        (edge_scores >= 0.08)
+    )
+
+    scored = []
+
+    for idx in np.flatnonzero(keep):
+
+        contour = candidates[idx]
+        geometry = geometries[idx]
 
         # penalise fragments with low core completeness
-        if core_score < 0.22:
-            continue
+        core_score = _compute_core_score(
+            contour,
+            scale=scale
+        )
 
-        if edge_score < 0.08:
+        if core_score < 0.22:
             continue
 
         score = _score_contour(
             contour,
             geometry,
             image_centre,
-            max_distance
+            max_distance,
+            area_scale=area_scale
         )
 
-        score -= border_penalty
+        # heavily severed by frame edge
+        score -= border_ratios[idx] * 0.35
         score += core_score * 0.25
 
         scored.append(
-            (score, contour, geometry)
+            (float(score), contour, geometry)
         )
 
     scored.sort(
@@ -818,159 +1375,403 @@ async def extract_pose_traits(
         for s in scored
     ]
 
-    contour_groups = _group_contours(contours)
+    if reference:
 
-    results = []
+        return _group_contours_reference(
+            contours
+        )
 
-    contour_data = []
+    return _group_contours(
+        contours,
+        threshold=PROXIMITY_MERGE_THRESHOLD / scale
+    )
 
-    cluster_masks = []
 
-    cluster_id = 1
+def _build_cluster(
+    group,
+    h: int,
+    w: int,
+    cluster_id: int
+):
+    """
+    Merged mask, contour points and cluster record for one group of
+    full-resolution contours. Returns None for degenerate groups.
+    """
+
+    merged_mask = np.zeros(
+        (h, w),
+        dtype=np.uint8
+    )
+
+    group_contours = []
 
+    total_area = 0
 
-    # for group in contour_groups[:MAX_CLUSTERS]:
+    weighted_cx = 0
+    weighted_cy = 0
 
-    # TRAINING MODE:
-    # Only use the highest-ranked cluster group
-    for group in contour_groups[:1]:
+    group_confidence = 0
+
+    best_geometry = None
+
+    for contour in group:
+
+        geometry = _compute_geometry(contour)
+
+        if geometry is None:
+            continue
 
-        merged_mask = np.zeros(
-            (h, w),
-            dtype=np.uint8
+        area = geometry["area"]
+
+        total_area += area
+
+        cx, cy = geometry["centre"]
+
+        weighted_cx += cx * area
+        weighted_cy += cy * area
+
+        confidence = min(
+            area / 150000,
+            1.0
         )
 
-        group_contours = []
+        group_confidence = max(
+            group_confidence,
+            confidence
+        )
 
-        total_area = 0
+        if (
+            best_geometry is None or
+            area > best_geometry["area"]
+        ):
+            best_geometry = geometry
+
+        cv2.drawContours(
+            merged_mask,
+            [contour],
+            -1,
+            255,
+            thickness=-1
+        )
 
-        weighted_cx = 0
-        weighted_cy = 0
+        contour_points = contour.reshape(
+            -1,
+            2
+        ).tolist()
 
-        group_confidence = 0
+        group_contours.append(
+            contour_points
+        )
 
-        best_geometry = None
+    if total_area == 0:
+        return None
 
-        for contour in group:
+    if best_geometry is None:
+        return None
 
-            geometry = _compute_geometry(contour)
+    final_cx = int(
+        weighted_cx / total_area
+    )
 
-            if geometry is None:
-                continue
+    final_cy = int(
+        weighted_cy / total_area
+    )
 
-            area = geometry["area"]
+    cluster_uid = (
+        f"cluster_{cluster_id:03d}"
+    )
 
-            total_area += area
+    cluster = {
 
-            cx, cy = geometry["centre"]
+        "id": cluster_id,
 
-            weighted_cx += cx * area
-            weighted_cy += cy * area
+        "uid": cluster_uid,
 
-            confidence = min(
-                area / 150000,
-                1.0
-            )
+        "centre": (
+            int((final_cx / w) * 1000),
+            int((final_cy / h) * 1000),
+        ),
 
-            group_confidence = max(
-                group_confidence,
-                confidence
-            )
+        "bbox": {
 
-            if (
-                best_geometry is None or
-                area > best_geometry["area"]
-            ):
-                best_geometry = geometry
-
-            cv2.drawContours(
-                merged_mask,
-                [contour],
-                -1,
-                255,
-                thickness=-1
-            )
+            "major_axis": round(
+                best_geometry["major"],
+                2
+            ),
 
-            contour_points = contour.reshape(
-                -1,
+            "minor_axis": round(
+                best_geometry["minor"],
                 2
-            ).tolist()
+            ),
 
-            group_contours.append(
-                contour_points
-            )
+            "orientation": round(
+                best_geometry["angle"],
+                2
+            ),
+        },
 
-        if total_area == 0:
-            continue
+        "area": int(total_area),
+
+        "petal_spread_ratio": round(
+            best_geometry["ratio"],
+            3
+        ),
+
+        "confidence": round(
+            group_confidence,
+            3
+        ),
+    }
 
-        if best_geometry is None:
-           continue
+    return cluster, merged_mask, group_contours
 
-        final_cx = int(
-            weighted_cx / total_area
-        )
 
-        final_cy = int(
-            weighted_cy / total_area
-        )
+# =========================
+# PYRAMID MODE
+# =========================
+
+def _refine_group(
+    group,
+    bgr: np.ndarray,
+    scale: int
+):
+    """
+    Re-extracts a coarse group's boundary at full resolution.
+
+    Only the group's bounding box (plus a margin) is segmented at
+    full size, and the result is restricted to the upsampled coarse
+    footprint so neighbouring blobs do not leak in. Falls back to
+    the rescaled coarse contours if refinement finds nothing.
+    """
+
+    h, w = bgr.shape[:2]
+
+    coarse = np.concatenate(
+        [c.reshape(-1, 2) for c in group]
+    )
+
+    pad = 4 * scale + BORDER_BAND
+
+    x0 = max(int(coarse[:, 0].min()) * scale - pad, 0)
+    y0 = max(int(coarse[:, 1].min()) * scale - pad, 0)
+    x1 = min((int(coarse[:, 0].max()) + 1) * scale + pad, w)
+    y1 = min((int(coarse[:, 1].max()) + 1) * scale + pad, h)
+
+    scaled_group = [
+        np.clip(
+            c * scale,
+            0,
+            [w - 1, h - 1]
+        ).astype(np.int32)
+        for c in group
+    ]
+
+    footprint = np.zeros(
+        (y1 - y0, x1 - x0),
+        dtype=np.uint8
+    )
+
+    cv2.drawContours(
+        footprint,
+        scaled_group,
+        -1,
+        255,
+        thickness=-1,
+        offset=(-x0, -y0)
+    )
 
-        cluster_uid = (
-            f"cluster_{cluster_id:03d}"
+    footprint = cv2.dilate(
+        footprint,
+        np.ones((3, 3), np.uint8),
+        iterations=scale
+    )
+
+    _, _, _, roi_mask = _compute_planes(
+        np.ascontiguousarray(bgr[y0:y1, x0:x1])
+    )
+
+    roi_mask = cv2.bitwise_and(
+        roi_mask,
+        footprint
+    )
+
+    contours, _ = cv2.findContours(
+        roi_mask,
+        cv2.RETR_EXTERNAL,
+        cv2.CHAIN_APPROX_SIMPLE,
+        offset=(x0, y0)
+    )
+
+    refined = [
+        c for c in contours
+        if cv2.contourArea(c) >= MIN_CLUSTER_AREA
+    ]
+
+    return refined or scaled_group
+
+
+def resolve_pose_mode(
+    mode: str,
+    h: int,
+    w: int,
+    levels: int
+) -> str:
+    """
+    Mode that actually runs: "pyramid" falls back to "full" when the
+    image is too small to downsample usefully.
+    """
+
+    if mode == "pyramid" and min(h, w) >> levels < 64:
+        return "full"
+
+    return mode
+
+
+def _pyramid_level(
+    bgr: np.ndarray,
+    levels: int
+):
+    coarse = bgr
+
+    for _ in range(levels):
+        coarse = cv2.pyrDown(coarse)
+
+    return coarse
+
+
+# =========================
+# MAIN
+# =========================
+
+async def extract_pose_traits(
+    img: Image.Image
+) -> Dict[str, Any]:
+
+    return compute_pose_traits(img)
+
+
+def compute_pose_traits(
+    img: Image.Image,
+    mode: str | None = None,
+    max_clusters: int = 1,
+    pyramid_levels: int | None = None
+) -> Dict[str, Any]:
+    """
+    Blocking pose extraction. Pure CPU work, safe to run on a
+    worker thread so the event loop stays free.
+
+    `mode` is "full" (segment and score at working resolution),
+    "pyramid" (segment and score on a POSE_PYRAMID_LEVELS-down level,
+    then refine the winning cluster at full resolution) or "reference"
+    (full resolution through the original unoptimised scorers, for
+    parity checks). Defaults to pose_mode_override, then settings.POSE_MODE. Either way contours, bbox axes and areas are
+    in full-resolution pixels and `centre` is on the 0-1000 grid.
+
+    `max_clusters` is 1 for the single-flower (training) pipeline and
+    up to MAX_CLUSTERS in multi-flower mode. `pyramid_levels`
+    overrides POSE_PYRAMID_LEVELS for this call.
+    """
+
+    max_clusters = max(1, min(max_clusters, MAX_CLUSTERS))
+
+    mode = mode or pose_mode_override.get() or settings.POSE_MODE
+
+    rgb = np.asarray(
+        img.convert("RGB")
+    )
+
+    bgr = cv2.cvtColor(
+        rgb,
+        cv2.COLOR_RGB2BGR
+    )
+
+    h, w = bgr.shape[:2]
+
+    levels = (
+        settings.POSE_PYRAMID_LEVELS
+        if pyramid_levels is None
+        else pyramid_levels
+    )
+
+    mode = resolve_pose_mode(mode, h, w, levels)
+
+    if mode == "pyramid":
+
+        scale = 2 ** levels
+
+        coarse_bgr = _pyramid_level(bgr, levels)
+
+        # pyrDown rounds odd sizes up, so measure the real ratio
+        scale_x = w / coarse_bgr.shape[1]
+        scale_y = h / coarse_bgr.shape[0]
+
+        hsv, _, gradient_mag, coarse_mask = _compute_planes(coarse_bgr)
+
+        contour_groups = _rank_contour_groups(
+            coarse_mask,
+            hsv,
+            gradient_mag,
+            scale=(scale_x + scale_y) / 2
         )
 
-        cluster_masks.append(
-            merged_mask
+        contour_groups = [
+            _refine_group(group, bgr, scale)
+            for group in contour_groups[:max_clusters]
+        ]
+
+        mask = cv2.resize(
+            coarse_mask,
+            (w, h),
+            interpolation=cv2.INTER_NEAREST
         )
 
-        contour_data.append(
-            group_contours
+    else:
+
+        hsv, _, gradient_mag, mask = _compute_planes(bgr)
+
+        contour_groups = _rank_contour_groups(
+            mask,
+            hsv,
+            gradient_mag,
+            reference=(mode == "reference")
         )
 
-        results.append({
+    results = []
 
-            "id": cluster_id,
+    contour_data = []
 
-            "uid": cluster_uid,
+    cluster_masks = []
 
-            "centre": (
-                int((final_cx / w) * 1000),
-                int((final_cy / h) * 1000),
-            ),
+    cluster_id = 1
 
-            "bbox": {
+    for group in contour_groups[:max_clusters]:
 
-                "major_axis": round(
-                    best_geometry["major"],
-                    2
-                ),
+        built = _build_cluster(
+            group,
+            h,
+            w,
+            cluster_id
+        )
 
-                "minor_axis": round(
-                    best_geometry["minor"],
-                    2
-                ),
+        if built is None:
+            continue
 
-                "orientation": round(
-                    best_geometry["angle"],
-                    2
-                ),
-            },
+        cluster, merged_mask, group_contours = built
 
-            "area": int(total_area),
+        cluster_masks.append(
+            merged_mask
+        )
 
-            "petal_spread_ratio": round(
-                best_geometry["ratio"],
-                3
-            ),
+        contour_data.append(
+            group_contours
+        )
 
-            "confidence": round(
-                group_confidence,
-                3
-            ),
-        })
+        results.append(cluster)
 
         cluster_id += 1
 
     print("---- POSE DEBUG ----")
+    print("Mode:", mode)
     print("Contours:", len(results))
     print("Mask coverage:", int(np.sum(mask > 0)))
 
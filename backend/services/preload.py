@@ -0,0 +1,111 @@
+# backend/services/preload.py
+"""
+Copy-on-write preloading for pre-fork servers (gunicorn preload_app).
+
+The master imports the pipeline, builds the fork-safe clients (local
+species table and embedding matrix, vision model), publishes and maps
+the node's shared species embedding file (EMBEDDING_STORE_PATH, either
+backend), primes the per-size geometry caches on the built-in warm-up
+scenes and then moves every surviving object into the GC's permanent
+generation with gc.freeze().
+
+With the Supabase backend the catalogue itself stays in Postgres
+(trait search is an RPC); the embedding matrix is the only catalogue
+state workers hold, and it is shared only with EMBEDDING_STORE_PATH set.
+The Supabase client holds sockets, so the master uses a short-lived
+one for the fetch and each worker builds its own.
+Workers forked afterwards share those pages until something writes to
+them; freezing keeps the collector's own bookkeeping writes (which
+touch every tracked object's header) from un-sharing them.
+"""
+
+import asyncio
+import gc
+import time
+from typing import Any, Dict
+
+from backend import main_state
+from backend.config import settings
+from backend.services.metrics import stage_recording_off
+from backend.services.warmup import warm_imports, warmup_payloads, warmup_state
+
+
+def _prime_caches() -> int:
+    from backend.services.image_processing_service import prepare_image
+    from backend.services.preprocess_service import decode_upload
+    from backend.services.trait_extractor import extract_traits
+
+    payloads = warmup_payloads()
+    # forked workers inherit the master's histograms; keep them empty
+    with stage_recording_off():
+        for payload in payloads:
+            processed = decode_upload(payload)
+            prepared = prepare_image(processed.pil_image, processed.stats)
+            # no loop is running in the master yet
+            asyncio.run(extract_traits(prepared.cropped_flower, processed.image_metadata))
+
+    return len(payloads)
+
+
+def _preload_embeddings() -> int:
+    """
+    Publishes the shared embedding file if it is missing or stale and
+    maps it, so forked workers inherit the mapping instead of each
+    fetching or waiting for a publish. Returns the rows mapped.
+    """
+
+    embeddings = main_state.get_embeddings()
+    if embeddings is None:
+        return 0
+
+    from backend.services.embedding_store import publish_from
+
+    temporary = None
+    try:
+        if settings.DATABASE_BACKEND == "local":
+            db = main_state.get_db()
+        else:
+            from backend.database import SupabaseClient
+
+            db = temporary = SupabaseClient()
+
+        publish_from(embeddings.path, db.fetch_embeddings, settings.EMBEDDING_REFRESH_SECONDS)
+    except Exception as e:
+        # workers publish on startup instead
+        print(f"⚠️ Embedding preload failed: {e}")
+    finally:
+        if temporary is not None:
+            temporary.close()
+
+    matrix = embeddings.current(force=True)
+    return len(matrix) if matrix is not None else 0
+
+
+def preload_shared_state() -> Dict[str, Any]:
+    """
+    Runs in the master before forking. Returns a small report (timings,
+    frozen object count) for the startup log.
+    """
+
+    start = time.perf_counter()
+    report: Dict[str, Any] = {}
+
+    report["import_ms"] = round(warm_imports(), 1)
+
+    main_state.init_shared_state()
+
+    report["embeddings"] = _preload_embeddings()
+
+    primed = time.perf_counter()
+    report["scenes"] = _prime_caches()
+    report["prime_ms"] = round((time.perf_counter() - primed) * 1000, 1)
+
+    warmup_state.preloaded = True
+
+    # collect first so garbage is not frozen along with the live objects
+    gc.collect()
+    gc.freeze()
+
+    report["frozen_objects"] = gc.get_freeze_count()
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return report
@@ -1,17 +1,54 @@
 # backend/services/preprocess_service.py
 from dataclasses import dataclass
+import asyncio
 import hashlib
 import io
+import struct
 from pathlib import Path
 
 from fastapi import HTTPException, UploadFile
 from PIL import Image, UnidentifiedImageError
-import numpy as np
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
-ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
-ALLOWED_MIME_TYPES = {"image/jpeg", "image/png", "image/webp"}
-MAX_BYTES = 5 * 1024 * 1024  # 5MB
+from backend.config import settings
+from backend.services.image_stats import ImageStats, compute_image_stats
+from backend.services.image_processing_service import (
+    WORKING_MAX_SIDE,
+    resize_for_processing,
+    working_size,
+)
+
+# compact client protocol: b"CRGB" + >HH (width, height) + packed RGB8
+RAW_RGB_MIME = "application/x-calyx-rgb"
+RAW_RGB_MAGIC = b"CRGB"
+RAW_RGB_HEADER = struct.Struct(">4sHH")
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".rgb"}
+ALLOWED_MIME_TYPES = {"image/jpeg", "image/png", "image/webp", RAW_RGB_MIME}
+MAX_BYTES = settings.MAX_IMAGE_BYTES  # 5MB default
+
+MAX_IMAGE_PIXELS = 20_000_000
+
+# uploads are pulled from the spooled form part in bounded chunks
+READ_CHUNK_BYTES = 64 * 1024
+
+# stop trying to parse dimensions if the header is not in the first 256KB
+HEADER_SNIFF_LIMIT = 256 * 1024
+
+MAGIC_SIGNATURES = {
+    "image/jpeg": lambda head: head.startswith(b"\xff\xd8\xff"),
+    "image/png": lambda head: head.startswith(b"\x89PNG\r\n\x1a\n"),
+    "image/webp": lambda head: head[:4] == b"RIFF" and head[8:12] == b"WEBP",
+    RAW_RGB_MIME: lambda head: head.startswith(RAW_RGB_MAGIC),
+}
+
+
+@dataclass
+class UploadPayload:
+    image_bytes: bytes
+    image_hash: str
+    filename: str
+    content_type: str
 
 
 @dataclass
@@ -22,11 +59,160 @@ class ProcessedImage:
     filename: str
     content_type: str
     image_metadata: Optional[Dict[str, Any]] = None
+    original_size: Optional[Tuple[int, int]] = None
+    stats: Optional[ImageStats] = None
+
+
+def _decode_working_image(img: Image.Image) -> Image.Image:
+    """
+    Decode once, straight to the working resolution.
+
+    `img` is a freshly opened (header-only) image. JPEGs use draft mode
+    so libjpeg's DCT scaling does most of the downscale during decode;
+    everything else goes through a reducing resize.
+    """
+
+    original_size = img.size
+
+    if img.format == "JPEG":
+        target = working_size(original_size, WORKING_MAX_SIDE)
+        img.draft("RGB", target)
+
+    # full decode: raises on truncated / corrupt data
+    img.load()
+
+    return resize_for_processing(
+        img.convert("RGB"),
+        WORKING_MAX_SIDE,
+        original_size=original_size,
+    )
+
+
+def _check_dimensions(width: int, height: int) -> None:
+
+    # ✅ SIZE CHECK
+    if width < 64 or height < 64:
+        raise HTTPException(
+            status_code=400,
+            detail="Image is too small. Please upload a clearer flower photo.",
+        )
+
+    # ✅ ASPECT RATIO CHECK
+    aspect_ratio = width / (height + 1e-6)
+    if aspect_ratio > 10 or aspect_ratio < 0.1:
+        raise HTTPException(
+            status_code=400,
+            detail="Image aspect ratio is not suitable for processing.",
+        )
+
+    if width * height > MAX_IMAGE_PIXELS:
+        raise HTTPException(
+            status_code=413,
+            detail="Image resolution too large.",
+        )
+
+
+def _sniff_dimensions(head: bytes) -> Optional[Tuple[int, int]]:
+    """Header-only parse; None until enough bytes have arrived."""
+
+    if head.startswith(RAW_RGB_MAGIC):
+        if len(head) < RAW_RGB_HEADER.size:
+            return None
+        _, width, height = RAW_RGB_HEADER.unpack_from(head)
+        return width, height
+
+    try:
+        with Image.open(io.BytesIO(head)) as probe:
+            return probe.size
+    except Exception:
+        return None
+
+
+def _decode_raw_rgb(image_bytes: bytes) -> Image.Image:
+    """
+    Raw RGB uploads are already at (or below) the working size, so
+    there is nothing to decode or resize.
+    """
+
+    _, width, height = RAW_RGB_HEADER.unpack_from(image_bytes)
+
+    if max(width, height) > WORKING_MAX_SIDE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Raw RGB uploads must be at most {WORKING_MAX_SIDE}px on the longest side.",
+        )
+
+    if len(image_bytes) != RAW_RGB_HEADER.size + width * height * 3:
+        raise HTTPException(
+            status_code=400,
+            detail="Raw RGB payload length does not match its header.",
+        )
+
+    return Image.frombytes(
+        "RGB",
+        (width, height),
+        image_bytes[RAW_RGB_HEADER.size:],
+    )
+
+
+async def _read_upload_bounded(image: UploadFile, content_type: str) -> Tuple[bytes, str]:
+    """
+    Reads the upload in chunks, hashing as it goes.
+
+    Aborts as soon as MAX_BYTES is crossed, and rejects on magic bytes
+    or header dimensions from the first chunks instead of after the
+    whole body is in memory. Returns (bytes, sha256 hex).
+    """
+
+    hasher = hashlib.sha256()
+    buffer = bytearray()
+
+    magic_checked = False
+    dimensions_checked = False
+
+    while True:
+        chunk = await image.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+
+        if len(buffer) + len(chunk) > MAX_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum allowed size is {MAX_BYTES // (1024 * 1024)}MB.",
+            )
+
+        hasher.update(chunk)
+        buffer += chunk
+
+        if not magic_checked and len(buffer) >= 12:
+            magic_checked = True
+            if not MAGIC_SIGNATURES[content_type](bytes(buffer[:12])):
+                raise HTTPException(
+                    status_code=415,
+                    detail="File contents do not match the declared image type.",
+                )
+
+        if not dimensions_checked and len(buffer) <= HEADER_SNIFF_LIMIT:
+            size = _sniff_dimensions(bytes(buffer))
+            if size is not None:
+                dimensions_checked = True
+                _check_dimensions(*size)
+
+    return bytes(buffer), hasher.hexdigest()
 
 
 async def process_upload(image: UploadFile) -> ProcessedImage:
 
-    Image.MAX_IMAGE_PIXELS = 20_000_000
+    payload = await read_upload(image)
+
+    # decode + pixel stats are CPU bound; keep them off the event loop
+    return await asyncio.to_thread(decode_upload, payload)
+
+
+async def read_upload(image: UploadFile) -> UploadPayload:
+    """Validates the declared type and pulls the body in bounded chunks."""
+
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
 
     if image is None:
         raise HTTPException(status_code=400, detail="No file uploaded")
@@ -37,7 +223,7 @@ async def process_upload(image: UploadFile) -> ProcessedImage:
     if suffix not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=415,
-            detail="Unsupported file extension. Please upload a JPG, PNG, or WEBP image.",
+            detail="Unsupported file extension. Please upload a JPG, PNG, WEBP or raw RGB image.",
         )
 
     if image.content_type not in ALLOWED_MIME_TYPES:
@@ -46,51 +232,61 @@ async def process_upload(image: UploadFile) -> ProcessedImage:
             detail="Unsupported image.",
         )
 
-    image_bytes = await image.read()
+    image_bytes, image_hash = await _read_upload_bounded(image, image.content_type)
 
     if not image_bytes:
         raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
-    if len(image_bytes) > MAX_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail="File too large. Maximum allowed size is 5MB.",
-        )
+    return UploadPayload(
+        image_bytes=image_bytes,
+        image_hash=image_hash,
+        filename=filename,
+        content_type=image.content_type or "application/octet-stream",
+    )
 
-    # ✅ VERIFY IMAGE
-    try:
-        Image.open(io.BytesIO(image_bytes)).verify()
-    except (UnidentifiedImageError, OSError):
-        raise HTTPException(
-            status_code=400,
-            detail="The uploaded file is not a valid image or is corrupted.",
-        )
 
-    # ✅ REOPEN IMAGE
-    pil_image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+def decode_upload(payload: UploadPayload) -> ProcessedImage:
+    """Blocking decode + pixel checks for an already-read upload."""
 
-    width, height = pil_image.size
+    image_bytes = payload.image_bytes
 
-    # ✅ SIZE CHECK
-    if width < 64 or height < 64:
-        raise HTTPException(
-            status_code=400,
-            detail="Image is too small. Please upload a clearer flower photo.",
-        )
+    if payload.content_type == RAW_RGB_MIME:
+        if len(image_bytes) < RAW_RGB_HEADER.size or not image_bytes.startswith(RAW_RGB_MAGIC):
+            raise HTTPException(status_code=400, detail="Raw RGB payload is truncated.")
 
-    # ✅ ASPECT RATIO CHECK
-    aspect_ratio = width / (height + 1e-6)
-    if aspect_ratio > 10 or aspect_ratio < 0.1:
-        raise HTTPException(
-            status_code=400,
-            detail="Image aspect ratio is not suitable for processing.",
-        )
+        _, width, height = RAW_RGB_HEADER.unpack_from(image_bytes)
+        _check_dimensions(width, height)
+
+        pil_image = _decode_raw_rgb(image_bytes)
+
+    else:
+        # ✅ OPEN (header only, nothing decoded yet)
+        try:
+            opened = Image.open(io.BytesIO(image_bytes))
+        except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+            raise HTTPException(
+                status_code=400,
+                detail="The uploaded file is not a valid image or is corrupted.",
+            )
+
+        width, height = opened.size
 
-    # ✅ PIXEL CHECKS
-    arr = np.asarray(pil_image, dtype=np.uint8)
+        _check_dimensions(width, height)
+
+        # ✅ SINGLE DECODE (verifies + lands on working size)
+        try:
+            pil_image = _decode_working_image(opened)
+        except (OSError, Image.DecompressionBombError):
+            raise HTTPException(
+                status_code=400,
+                detail="The uploaded file is not a valid image or is corrupted.",
+            )
+
+    # ✅ PIXEL CHECKS (one stats pass over the working-size array)
+    stats = compute_image_stats(pil_image)
 
     # uniform / blank detection
-    if arr.std() < 5:
+    if stats.std < 5:
         raise HTTPException(
             status_code=400,
             detail="Image appears too uniform or blank.",
@@ -101,12 +297,10 @@ async def process_upload(image: UploadFile) -> ProcessedImage:
     # ------------------------
 
     # entropy (distribution complexity)
-    hist = np.histogram(arr, bins=256)[0]
-    prob = hist / (hist.sum() + 1e-6)
-    entropy = float(-np.sum(prob * np.log2(prob + 1e-9)))
+    entropy = stats.entropy
 
     # vibrance proxy (pixel variation)
-    std_val = float(arr.std())
+    std_val = stats.std
 
     # ------------------------
     # soft penalty (NO blocking)
@@ -132,19 +326,18 @@ async def process_upload(image: UploadFile) -> ProcessedImage:
     else:
         color_finish = "natural"
 
-    image_hash = hashlib.sha256(image_bytes).hexdigest()
-
     return ProcessedImage(
         image_bytes=image_bytes,
-        image_hash=image_hash,
+        image_hash=payload.image_hash,
         pil_image=pil_image,
-        filename=filename,
-        content_type=image.content_type or "application/octet-stream",
-        
+        filename=payload.filename,
+        content_type=payload.content_type,
+        original_size=(width, height),
         image_metadata={
             "entropy": round(entropy, 3),
             "vibrance": round(std_val, 3),
             "color_finish": color_finish,
             "noise_penalty": noise_penalty
-        }
+        },
+        stats=stats,
     )
@@ -4,6 +4,9 @@ from PIL import Image
 import colorsys
 
 
+# below this pose confidence the centre is too uncertain to analyse
+MIN_POSE_CONFIDENCE = 0.18
+
 def _edge_strength(gray: np.ndarray) -> np.ndarray:
     gx = np.abs(np.diff(gray, axis=1, prepend=gray[:, :1]))
     gy = np.abs(np.diff(gray, axis=0, prepend=gray[:1, :]))
@@ -57,6 +60,7 @@ def _find_reproductive_hotspot(
     centre_point: tuple[float, float] | None,
     search_ratio: float = 0.40,
     patch_ratio: float = 0.16,
+    hsv_plane: Optional[np.ndarray] = None,
 ) -> Tuple[tuple[float, float], np.ndarray]:
 
     h, w, _ = arr.shape
@@ -80,7 +84,10 @@ def _find_reproductive_hotspot(
         fallback_patch = _extract_patch(arr, centre_point, ratio=patch_ratio)
         return (cx, cy), fallback_patch
 
-    hsv = _rgb_to_hsv_array(search)
+    if hsv_plane is not None:
+        hsv = hsv_plane[sy1:sy2, sx1:sx2]
+    else:
+        hsv = _rgb_to_hsv_array(search)
     gray = search.mean(axis=2)
     edges = _edge_strength(gray)
 
@@ -126,7 +133,31 @@ def extract_reproductive_traits(
     pose_confidence = float(pose_traits.get("pose_confidence", 0.0))
     centre_point = pose_traits.get("centre_point")
 
-    if not centre_visible or pose_confidence < 0.18:
+    arr = None
+    if centre_visible and pose_confidence >= MIN_POSE_CONFIDENCE:
+        arr = np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0
+
+    return compute_reproductive_traits(
+        arr,
+        centre_point=centre_point,
+        pose_confidence=pose_confidence,
+        centre_visible=centre_visible,
+    )
+
+
+def compute_reproductive_traits(
+    arr: Optional[np.ndarray],
+    centre_point: tuple[float, float] | None,
+    pose_confidence: float,
+    centre_visible: bool = True,
+    hsv_plane: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Reproductive traits from an RGB (0-1) plane. `hsv_plane` is the
+    matching precomputed HSV plane, if the caller already has one.
+    """
+
+    if arr is None or not centre_visible or pose_confidence < MIN_POSE_CONFIDENCE:
         return {
             "stamen_visible": False,
             "anther_visible": False,
@@ -136,8 +167,7 @@ def extract_reproductive_traits(
             "reproductive_hotspot": None,
         }
 
-    arr = np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0
-    hotspot_point, patch = _find_reproductive_hotspot(arr, centre_point)
+    hotspot_point, patch = _find_reproductive_hotspot(arr, centre_point, hsv_plane=hsv_plane)
 
     if patch.size == 0:
         return {
@@ -149,7 +179,10 @@ def extract_reproductive_traits(
             "reproductive_hotspot": hotspot_point,
         }
 
-    hsv = _rgb_to_hsv_array(patch)
+    if hsv_plane is not None:
+        hsv = _extract_patch(hsv_plane, hotspot_point, ratio=0.16)
+    else:
+        hsv = _rgb_to_hsv_array(patch)
     gray = patch.mean(axis=2)
     edges = _edge_strength(gray)
 
@@ -1,4 +1,5 @@
-from typing import Any, Dict, List
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
 import numpy as np
 from PIL import Image
 
@@ -48,6 +49,35 @@ def _rgb_to_hsv(arr: np.ndarray) -> np.ndarray:
     return np.stack([h, s, v], axis=2)
 
 
+# =========================
+# SHARED PLANES
+# =========================
+
+@dataclass
+class ImagePlanes:
+    """
+    Per-image float planes every per-cluster extractor reads.
+    Computed once per image and shared read-only across clusters.
+    """
+
+    arr: np.ndarray     # RGB float32 0-1
+    hsv: np.ndarray     # hue degrees, sat 0-1, val 0-1
+    gray: np.ndarray
+    edges: np.ndarray
+
+
+def compute_image_planes(img: Image.Image) -> ImagePlanes:
+    arr = np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0
+    gray = _to_gray(arr)
+
+    return ImagePlanes(
+        arr=arr,
+        hsv=_rgb_to_hsv(arr),
+        gray=gray,
+        edges=_edge_strength(gray),
+    )
+
+
 # =========================
 # IPS (INNER PETAL START)
 # =========================
@@ -169,7 +199,7 @@ def _estimate_bloom(structure):
 # CLUSTER PROCESSOR
 # =========================
 
-def _process_cluster(arr, hsv, cluster):
+def _process_cluster(arr, hsv, cluster, gray=None, edges=None):
     h, w = arr.shape[:2]
 
     cx = int(cluster["centre"][0] / 1000 * w)
@@ -178,8 +208,11 @@ def _process_cluster(arr, hsv, cluster):
     major = int(cluster["bbox"]["major_axis"])
     max_radius = max(20, int(major * 0.6))
 
-    gray = _to_gray(arr)
-    edges = _edge_strength(gray)
+    # image-wide planes: callers with several clusters pass them in
+    if gray is None:
+        gray = _to_gray(arr)
+    if edges is None:
+        edges = _edge_strength(gray)
 
     ips_radius = _estimate_ips_radius(hsv, (cx, cy), max_radius)
     horizon_count, spacing = _radial_contrast_scan(
@@ -217,18 +250,40 @@ async def extract_shape_traits(
     pose_data: Dict[str, Any]
 ) -> Dict[str, Any]:
 
-    arr = np.asarray(img.convert("RGB"), dtype=np.float32) / 255.0
-    hsv = _rgb_to_hsv(arr)
+    return compute_shape_traits(img, pose_data)
+
+
+def compute_cluster_shape(
+    planes: ImagePlanes,
+    cluster: Dict[str, Any]
+) -> Dict[str, Any]:
+
+    return _process_cluster(
+        planes.arr,
+        planes.hsv,
+        cluster,
+        gray=planes.gray,
+        edges=planes.edges,
+    )
+
+
+def compute_shape_traits(
+    img: Image.Image,
+    pose_data: Dict[str, Any],
+    planes: Optional[ImagePlanes] = None
+) -> Dict[str, Any]:
 
     clusters = pose_data.get("clusters", [])
 
     if not clusters:
         return {"cluster_shapes": []}
 
+    planes = planes or compute_image_planes(img)
+
     results: List[Dict[str, Any]] = []
 
     for cluster in clusters:
-        results.append(_process_cluster(arr, hsv, cluster))
+        results.append(compute_cluster_shape(planes, cluster))
 
     output = {
         "cluster_shapes": results
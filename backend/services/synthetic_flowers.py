@@ -0,0 +1,287 @@
+# backend/services/synthetic_flowers.py
+"""
+Parametric synthetic flower scenes with known ground truth.
+
+Each scene is radial-petal blooms with a contrasting centre, drawn over
+a plain, gradient or foliage-textured background with optional clutter
+(leaves and stems) and sensor noise. Size, bloom count, petal count and
+clutter vary independently, which real photos cannot do.
+
+Startup warm-up and the parity checks render these in memory; the
+benchmarks write them to disk (backend/benchmarks/synthetic_flowers.py).
+"""
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+RGB = Tuple[int, int, int]
+
+PETAL_COLORS: Tuple[RGB, ...] = (
+    (220, 40, 60),    # red
+    (240, 200, 30),   # yellow
+    (245, 245, 245),  # white
+    (235, 120, 170),  # pink
+    (140, 70, 190),   # purple
+    (250, 140, 30),   # orange
+    (70, 110, 220),   # blue
+)
+
+CENTRE_COLORS: Tuple[RGB, ...] = (
+    (250, 210, 40),
+    (90, 55, 25),
+    (40, 30, 20),
+    (230, 160, 40),
+)
+
+BACKGROUNDS = ("plain", "gradient", "foliage")
+
+
+@dataclass(frozen=True)
+class FlowerSpec:
+    cx: float
+    cy: float
+    radius: float
+    petal_count: int
+    rotation: float = 0.0
+    petal_width: float = 0.45  # petal width / petal length
+    centre_ratio: float = 0.25  # centre disc radius / flower radius
+    petal_color: RGB = PETAL_COLORS[0]
+    centre_color: RGB = CENTRE_COLORS[0]
+
+
+@dataclass(frozen=True)
+class SceneSpec:
+    width: int
+    height: int
+    flowers: Tuple[FlowerSpec, ...]
+    background: str = "foliage"
+    clutter: int = 0
+    noise: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class SyntheticScene:
+    image: Image.Image
+    spec: SceneSpec
+    # one entry per flower, in spec order
+    ground_truth: List[Dict[str, Any]] = field(default_factory=list)
+
+
+# =========================
+# DRAWING
+# =========================
+
+def _background(spec: SceneSpec, rng: np.random.Generator) -> np.ndarray:
+    h, w = spec.height, spec.width
+
+    if spec.background == "plain":
+        return np.full((h, w, 3), (70, 110, 60), dtype=np.uint8)
+
+    if spec.background == "gradient":
+        ramp = np.linspace(0.0, 1.0, h, dtype=np.float32)[:, None, None]
+        top = np.array([120, 160, 200], dtype=np.float32)
+        bottom = np.array([50, 90, 45], dtype=np.float32)
+        return np.broadcast_to(top + (bottom - top) * ramp, (h, w, 3)).astype(np.uint8)
+
+    if spec.background != "foliage":
+        raise ValueError(f"Unknown background '{spec.background}' (expected one of {', '.join(BACKGROUNDS)})")
+
+    # low-frequency mottling: coarse noise upsampled and blurred
+    coarse = rng.normal(0.0, 1.0, (max(h // 16, 2), max(w // 16, 2))).astype(np.float32)
+    mottle = cv2.GaussianBlur(cv2.resize(coarse, (w, h), interpolation=cv2.INTER_CUBIC), (0, 0), 6)
+
+    base = np.array([55, 95, 45], dtype=np.float32)
+    tint = np.array([20, 35, 15], dtype=np.float32)
+    return np.clip(base + mottle[..., None] * tint, 0, 255).astype(np.uint8)
+
+
+def _draw_clutter(canvas: np.ndarray, count: int, scale: float, rng: random.Random) -> None:
+    h, w = canvas.shape[:2]
+
+    for _ in range(count):
+        x, y = rng.randint(0, w - 1), rng.randint(0, h - 1)
+        kind = rng.random()
+
+        if kind < 0.5:
+            # leaf
+            green = (rng.randint(30, 80), rng.randint(90, 160), rng.randint(30, 70))
+            axes = (max(int(rng.uniform(10, 40) * scale), 2), max(int(rng.uniform(4, 14) * scale), 1))
+            cv2.ellipse(canvas, (x, y), axes, rng.uniform(0, 180), 0, 360, green, -1, cv2.LINE_AA)
+        elif kind < 0.7:
+            # stem
+            green = (rng.randint(30, 80), rng.randint(90, 160), rng.randint(30, 70))
+            length = rng.uniform(40, 160) * scale
+            angle = rng.uniform(0, math.pi)
+            end = (int(x + math.cos(angle) * length), int(y + math.sin(angle) * length))
+            cv2.line(canvas, (x, y), end, green, max(int(3 * scale), 1), cv2.LINE_AA)
+        else:
+            # fallen petal: flower-coloured, so it survives segmentation as a contour
+            axes = (max(int(rng.uniform(6, 18) * scale), 2), max(int(rng.uniform(3, 8) * scale), 1))
+            cv2.ellipse(canvas, (x, y), axes, rng.uniform(0, 180), 0, 360, rng.choice(PETAL_COLORS), -1, cv2.LINE_AA)
+
+
+def _draw_flower(canvas: np.ndarray, flower: FlowerSpec) -> np.ndarray:
+    """Draws one bloom and returns its boolean footprint."""
+
+    h, w = canvas.shape[:2]
+    footprint = np.zeros((h, w), dtype=np.uint8)
+
+    # petals start inside the centre disc and reach out to `radius`
+    petal_length = flower.radius * (1.0 - flower.centre_ratio * 0.5)
+    half_length = petal_length / 2
+    half_width = half_length * flower.petal_width
+
+    # slight shading so petals are not one flat colour
+    shade = tuple(int(c * 0.85) for c in flower.petal_color)
+
+    for i in range(flower.petal_count):
+        angle = flower.rotation + 2 * math.pi * i / flower.petal_count
+        px = flower.cx + math.cos(angle) * (flower.radius - half_length)
+        py = flower.cy + math.sin(angle) * (flower.radius - half_length)
+
+        centre = (int(round(px)), int(round(py)))
+        axes = (max(int(round(half_length)), 1), max(int(round(half_width)), 1))
+        degrees = math.degrees(angle)
+
+        cv2.ellipse(canvas, centre, axes, degrees, 0, 360, flower.petal_color, -1, cv2.LINE_AA)
+        cv2.ellipse(canvas, centre, axes, degrees, 0, 360, shade, max(int(flower.radius / 60), 1), cv2.LINE_AA)
+        cv2.ellipse(footprint, centre, axes, degrees, 0, 360, 1, -1)
+
+    centre_radius = max(int(round(flower.radius * flower.centre_ratio)), 1)
+    centre_point = (int(round(flower.cx)), int(round(flower.cy)))
+    cv2.circle(canvas, centre_point, centre_radius, flower.centre_color, -1, cv2.LINE_AA)
+    cv2.circle(footprint, centre_point, centre_radius, 1, -1)
+
+    return footprint.astype(bool)
+
+
+def render_scene(spec: SceneSpec) -> SyntheticScene:
+    np_rng = np.random.default_rng(spec.seed)
+    py_rng = random.Random(spec.seed)
+
+    canvas = np.ascontiguousarray(_background(spec, np_rng))
+
+    scale = min(spec.width, spec.height) / 512
+    _draw_clutter(canvas, spec.clutter, scale, py_rng)
+
+    ground_truth = []
+    for flower in spec.flowers:
+        footprint = _draw_flower(canvas, flower)
+        ground_truth.append({
+            "centre": (
+                int(flower.cx / spec.width * 1000),
+                int(flower.cy / spec.height * 1000),
+            ),
+            "radius": flower.radius,
+            "petal_count": flower.petal_count,
+            "area": int(footprint.sum()),
+            "petal_color": flower.petal_color,
+        })
+
+    if spec.noise > 0:
+        noisy = canvas.astype(np.float32) + np_rng.normal(0.0, spec.noise, canvas.shape)
+        canvas = np.clip(noisy, 0, 255).astype(np.uint8)
+
+    return SyntheticScene(
+        image=Image.fromarray(canvas, "RGB"),
+        spec=spec,
+        ground_truth=ground_truth,
+    )
+
+
+# =========================
+# RANDOM SCENES
+# =========================
+
+def _place_flowers(
+    width: int,
+    height: int,
+    count: int,
+    petal_count: Optional[int],
+    rng: random.Random,
+) -> Tuple[FlowerSpec, ...]:
+    """Non-overlapping blooms, shrinking as more have to fit."""
+
+    short = min(width, height)
+    grid = math.ceil(math.sqrt(count))
+    max_radius = short / (2.4 * grid)
+
+    cells = [(r, c) for r in range(grid) for c in range(grid)]
+    rng.shuffle(cells)
+
+    flowers = []
+    for row, col in cells[:count]:
+        radius = rng.uniform(0.7, 1.0) * max_radius
+        cell_w, cell_h = width / grid, height / grid
+        cx = (col + 0.5) * cell_w + rng.uniform(-0.1, 0.1) * cell_w
+        cy = (row + 0.5) * cell_h + rng.uniform(-0.1, 0.1) * cell_h
+
+        flowers.append(FlowerSpec(
+            cx=cx,
+            cy=cy,
+            radius=radius,
+            petal_count=petal_count or rng.choice((4, 5, 5, 6, 8, 12)),
+            rotation=rng.uniform(0, math.pi),
+            petal_width=rng.uniform(0.35, 0.55),
+            centre_ratio=rng.uniform(0.18, 0.3),
+            petal_color=rng.choice(PETAL_COLORS),
+            centre_color=rng.choice(CENTRE_COLORS),
+        ))
+
+    return tuple(flowers)
+
+
+def random_scene(
+    width: int = 640,
+    height: int = 480,
+    flowers: int = 1,
+    petal_count: Optional[int] = None,
+    clutter: int = 0,
+    noise: float = 0.0,
+    background: str = "foliage",
+    seed: int = 0,
+) -> SyntheticScene:
+    rng = random.Random(seed)
+
+    return render_scene(SceneSpec(
+        width=width,
+        height=height,
+        flowers=_place_flowers(width, height, max(flowers, 0), petal_count, rng),
+        background=background,
+        clutter=clutter,
+        noise=noise,
+        seed=seed,
+    ))
+
+
+# =========================
+# CORPUS
+# =========================
+
+def corpus_scenes(count: int, seed: int = 0) -> List[Tuple[str, SyntheticScene]]:
+    """`count` varied scenes named synthetic_000, ...; same seed, same pixels."""
+
+    rng = random.Random(seed)
+
+    scenes = []
+    for i in range(count):
+        scene = random_scene(
+            width=rng.choice((480, 640, 800, 1024)),
+            height=rng.choice((360, 480, 600, 768)),
+            flowers=rng.choice((1, 1, 1, 2, 3)),
+            clutter=rng.choice((0, 10, 40)),
+            noise=rng.choice((0.0, 3.0, 8.0)),
+            background=rng.choice(BACKGROUNDS),
+            seed=seed * 10_000 + i,
+        )
+        scenes.append((f"synthetic_{i:03d}", scene))
+
+    return scenes
@@ -1,11 +1,21 @@
 # backend/services/trait_extractor.py
 
-from typing import Any, Dict, cast
+import asyncio
+from typing import Any, Dict, List, cast
 from PIL import Image
 import numpy as np
 
-from backend.services.shape_extractor import extract_shape_traits
-from backend.services.pose_extractor import extract_pose_traits
+from backend.config import settings
+from backend.services.shape_extractor import (
+    ImagePlanes,
+    compute_cluster_shape,
+    compute_image_planes,
+    compute_shape_traits,
+)
+from backend.services.pose_extractor import MAX_CLUSTERS, compute_pose_traits
+from backend.services.color_extractor import compute_color_traits, estimate_color_blending
+from backend.services.reproductive_extractor import compute_reproductive_traits
+from backend.services.metrics import span
 
 
 def _make_json_safe(obj):
@@ -30,9 +40,29 @@ async def extract_traits(
     image_metadata: Dict[str, Any] | None = None
 ) -> Dict[str, Any]:
 
+    if settings.MULTI_FLOWER:
+        return await _extract_multi_flower_traits(img, image_metadata)
+
+    # CPU bound: keep it off the event loop so embedding / RPC
+    # stages can make progress at the same time
+    return await asyncio.to_thread(
+        _extract_traits_blocking,
+        img,
+        image_metadata,
+    )
+
+
+def _extract_traits_blocking(
+    img: Image.Image,
+    image_metadata: Dict[str, Any] | None = None
+) -> Dict[str, Any]:
+
     # ✅ ONLY WHAT WORKS
-    pose_traits = await extract_pose_traits(img)
-    shape_traits = await extract_shape_traits(img, pose_traits)
+    with span("extract_pose_traits"):
+        pose_traits = compute_pose_traits(img)
+
+    with span("extract_shape_traits"):
+        shape_traits = compute_shape_traits(img, pose_traits)
 
     clean_pose = _strip_internal_pose(pose_traits)
 
@@ -45,4 +75,149 @@ async def extract_traits(
     traits["color_primary"] = []
     traits["centre_color_primary"] = []
 
-    return cast(Dict[str, Any], _make_json_safe(traits))
\ No newline at end of file
+    return cast(Dict[str, Any], _make_json_safe(traits))
+
+
+# =========================
+# MULTI-FLOWER MODE
+# =========================
+
+def _pose_blocking(img: Image.Image) -> Dict[str, Any]:
+    with span("extract_pose_traits"):
+        return compute_pose_traits(img, max_clusters=MAX_CLUSTERS)
+
+
+def _planes_blocking(img: Image.Image) -> ImagePlanes:
+    with span("image_planes"):
+        return compute_image_planes(img)
+
+
+def cluster_window(height: int, width: int, cluster: Dict[str, Any]) -> tuple[int, int, int, int]:
+    """(x1, y1, x2, y2) box around one flower, sized from its major axis."""
+
+    cx = cluster["centre"][0] / 1000 * width
+    cy = cluster["centre"][1] / 1000 * height
+
+    half = max(24, int(cluster["bbox"]["major_axis"] * 0.6))
+
+    return (
+        max(int(cx - half), 0),
+        max(int(cy - half), 0),
+        min(int(cx + half), width),
+        min(int(cy + half), height),
+    )
+
+
+def _analyse_flower(
+    planes: ImagePlanes,
+    cluster: Dict[str, Any],
+    image_metadata: Dict[str, Any] | None
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    """(shape, flower traits) for one cluster."""
+
+    h, w = planes.gray.shape
+
+    shape = compute_cluster_shape(planes, cluster)
+
+    # colour and reproductive analysis only look at this flower's window
+    x1, y1, x2, y2 = cluster_window(h, w, cluster)
+
+    rgb = planes.arr[y1:y2, x1:x2]
+    hsv = planes.hsv[y1:y2, x1:x2]
+
+    local_centre = (
+        cluster["centre"][0] / 1000 * w - x1,
+        cluster["centre"][1] / 1000 * h - y1,
+    )
+
+    color = compute_color_traits(
+        rgb,
+        hsv,
+        centre_point=local_centre,
+        image_metadata=image_metadata,
+    )
+
+    reproductive = compute_reproductive_traits(
+        rgb,
+        centre_point=local_centre,
+        pose_confidence=float(cluster.get("confidence", 0.0)),
+        hsv_plane=hsv,
+    )
+
+    hotspot = reproductive.get("reproductive_hotspot")
+    if hotspot is not None:
+        reproductive["reproductive_hotspot"] = (
+            round(hotspot[0] + x1, 1),
+            round(hotspot[1] + y1, 1),
+        )
+
+    return shape, {
+        "cluster_id": cluster["id"],
+        "uid": cluster["uid"],
+        "centre": cluster["centre"],
+        "window": (x1, y1, x2, y2),
+        "bbox": cluster["bbox"],
+        "area": cluster["area"],
+        "pose_confidence": cluster["confidence"],
+        **shape,
+        "petal_color_primary": color["petal_color"]["primary"],
+        "petal_color_secondary": color["petal_color"]["secondary"],
+        "petal_color_confidence": color["petal_color"]["confidence"],
+        "centre_color_primary": color["centre_color"]["primary"],
+        "color_primary": color["color"]["primary"],
+        "color_finish": color["color_finish"],
+        # from this flower's window: whole-image stats would give every flower the same value
+        "color_blending": estimate_color_blending(rgb) if rgb.size else None,
+        **reproductive,
+    }
+
+
+def _analyse_flower_timed(
+    planes: ImagePlanes,
+    cluster: Dict[str, Any],
+    image_metadata: Dict[str, Any] | None
+) -> tuple[Dict[str, Any], Dict[str, Any]]:
+    with span("analyse_flower"):
+        return _analyse_flower(planes, cluster, image_metadata)
+
+
+async def _extract_multi_flower_traits(
+    img: Image.Image,
+    image_metadata: Dict[str, Any] | None = None
+) -> Dict[str, Any]:
+    """
+    Every cluster up to MAX_CLUSTERS. The shared planes are built while
+    pose runs, then each flower is analysed on its own worker thread.
+    The first (highest-ranked) flower also fills the top-level traits,
+    so single-flower consumers keep working.
+    """
+
+    pose_traits, planes = await asyncio.gather(
+        asyncio.to_thread(_pose_blocking, img),
+        asyncio.to_thread(_planes_blocking, img),
+    )
+
+    analysed = await asyncio.gather(*(
+        asyncio.to_thread(_analyse_flower_timed, planes, cluster, image_metadata)
+        for cluster in pose_traits["clusters"]
+    ))
+
+    flowers: List[Dict[str, Any]] = [flower for _, flower in analysed]
+
+    traits = {
+        **_strip_internal_pose(pose_traits),
+        "cluster_shapes": [shape for shape, _ in analysed],
+        "color_primary": [],
+        "centre_color_primary": [],
+    }
+
+    if flowers:
+        traits.update({
+            k: v for k, v in flowers[0].items()
+            if k not in ("uid", "centre", "window", "bbox", "area")
+        })
+
+    traits["flowers"] = flowers
+    traits["flower_count"] = len(flowers)
+
+    return cast(Dict[str, Any], _make_json_safe(traits))
@@ -0,0 +1,233 @@
+# backend/services/warmup.py
+import asyncio
+import hashlib
+import importlib
+import io
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from backend.config import settings
+from backend.services.metrics import gauge, stage_recording_off
+
+
+PHASE_STARTING = "starting"
+PHASE_WARMING = "warming"
+PHASE_READY = "ready"
+
+# heavy modules the identify routes import on first use
+WARM_MODULES = (
+    "numpy",
+    "PIL.Image",
+    "cv2",
+    "backend.services.preprocess_service",
+    "backend.services.identify_service",
+)
+
+# (width, height, flowers, clutter): landscape, portrait and a busy
+# multi-flower scene, so the per-size geometry caches cover both
+# orientations at the working size
+WARMUP_SCENES = (
+    (1024, 768, 1, 10),
+    (768, 1024, 1, 10),
+    (1024, 768, 3, 40),
+)
+
+_ready = gauge("calyx_ready", help_text="1 once startup warm-up has finished and traffic can be routed")
+_rounds = gauge("calyx_warmup_rounds", help_text="Pipeline rounds run during startup warm-up")
+_p50 = gauge("calyx_warmup_p50_seconds", help_text="Median identify latency in the last warm-up round")
+_first = gauge("calyx_warmup_first_seconds", help_text="Latency of the very first (cold) warm-up identify")
+
+
+@dataclass
+class WarmupState:
+    """
+    Liveness is the process answering at all; readiness is this state
+    reaching PHASE_READY. Warm-up is an optimisation, so errors are
+    recorded and the instance still becomes ready.
+    """
+
+    phase: str = PHASE_STARTING
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    import_ms: Optional[float] = None
+    first_ms: Optional[float] = None
+    round_p50_ms: List[float] = field(default_factory=list)
+    steady: bool = False
+    # set in a preload master (services/preload.py) and inherited by the
+    # forked workers, which then only need one round to open connections
+    preloaded: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == PHASE_READY
+
+    def mark_ready(self) -> None:
+        self.phase = PHASE_READY
+        self.finished_at = time.time()
+        _ready.set(1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "phase": self.phase,
+            "ready": self.ready,
+            "steady": self.steady,
+            "preloaded": self.preloaded,
+            "import_ms": self.import_ms,
+            "first_ms": self.first_ms,
+            "round_p50_ms": self.round_p50_ms,
+            "duration_ms": round(((self.finished_at or time.time()) - self.started_at) * 1000, 1),
+            "error": self.error,
+        }
+
+
+warmup_state = WarmupState()
+
+
+# =========================
+# STEPS
+# =========================
+
+def warm_imports() -> float:
+    """Blocking: imports WARM_MODULES; returns the time taken in ms."""
+
+    start = time.perf_counter()
+    for name in WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            print(f"⚠️ Warm import of {name} failed: {e}")
+    return (time.perf_counter() - start) * 1000
+
+
+def warmup_payloads() -> List[Any]:
+    """Built-in synthetic scenes as JPEG uploads, like a client would send."""
+
+    from backend.services.synthetic_flowers import random_scene
+    from backend.services.preprocess_service import UploadPayload
+
+    payloads = []
+    for i, (width, height, flowers, clutter) in enumerate(WARMUP_SCENES):
+        scene = random_scene(width, height, flowers=flowers, clutter=clutter, noise=3.0, seed=i)
+
+        buffered = io.BytesIO()
+        scene.image.save(buffered, format="JPEG", quality=90)
+        data = buffered.getvalue()
+
+        payloads.append(UploadPayload(
+            image_bytes=data,
+            image_hash=hashlib.sha256(data).hexdigest(),
+            filename=f"warmup_{i}.jpg",
+            content_type="image/jpeg",
+        ))
+
+    return payloads
+
+
+class WarmupVision:
+    """
+    Vision client for warm-up rounds. Only the first embedding reaches
+    the real backend (opening its connection); every later one replays
+    that vector, so repeated rounds spend no remote inference quota.
+    """
+
+    def __init__(self, vision):
+        self.vision = vision
+        self.remote_calls = 0
+        self._embedding: Optional[List[float]] = None
+        self._lock = asyncio.Lock()
+
+    async def get_embedding(self, image) -> List[float]:
+        async with self._lock:
+            if self._embedding is None:
+                self.remote_calls += 1
+                self._embedding = await self.vision.get_embedding(image)
+        return list(self._embedding)
+
+    async def get_embeddings(self, images) -> List[List[float]]:
+        return [await self.get_embedding(image) for image in images]
+
+
+def is_steady(round_p50_ms: List[float], tolerance: float) -> bool:
+    """The last two round medians agree within `tolerance` (relative)."""
+
+    if len(round_p50_ms) < 2:
+        return False
+    previous, last = round_p50_ms[-2], round_p50_ms[-1]
+    return abs(last - previous) <= tolerance * max(previous, 1e-6)
+
+
+async def _pipeline_rounds(state: WarmupState, db, vision) -> None:
+    from backend.services.identify_service import run_identify_job
+
+    payloads = await asyncio.to_thread(warmup_payloads)
+    vision = WarmupVision(vision)
+
+    # opens the database connection pool before the first request needs it
+    await db.get_species_count()
+
+    max_rounds = 1 if state.preloaded else max(settings.WARMUP_MAX_ROUNDS, 1)
+
+    for _ in range(max_rounds):
+        samples = []
+        for payload in payloads:
+            start = time.perf_counter()
+            # use_cache=False: warm-up results must never land in the cache
+            await run_identify_job(payload, False, db=db, vision=vision)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if state.first_ms is None:
+                state.first_ms = round(elapsed, 1)
+                _first.set(elapsed / 1000)
+            samples.append(elapsed)
+
+        p50 = statistics.median(samples)
+        state.round_p50_ms.append(round(p50, 1))
+        _rounds.set(len(state.round_p50_ms))
+        _p50.set(p50 / 1000)
+
+        if len(state.round_p50_ms) >= settings.WARMUP_MIN_ROUNDS and is_steady(state.round_p50_ms, settings.WARMUP_STEADY_TOLERANCE):
+            state.steady = True
+            return
+
+
+async def run_warmup(db, vision, state: WarmupState = warmup_state) -> WarmupState:
+    """
+    Imports the identify pipeline, then runs it over the built-in
+    scenes round after round until the median latency stops moving
+    (WARMUP_STEADY_TOLERANCE between consecutive rounds), or until
+    WARMUP_MAX_ROUNDS / WARMUP_TIMEOUT_SECONDS; a single round in a
+    preloaded worker. Only the first embedding is a real inference
+    call (see WarmupVision). Marks the state ready either way.
+    """
+
+    state.phase = PHASE_WARMING
+    # a preloaded worker inherits the master's state; time this process
+    state.started_at = time.time()
+
+    try:
+        if settings.WARM_IMPORTS and not state.preloaded:
+            state.import_ms = round(await asyncio.to_thread(warm_imports), 1)
+
+        if settings.WARMUP_ENABLED:
+            # cold first runs would skew the tail of the production stage histograms
+            with stage_recording_off():
+                await asyncio.wait_for(_pipeline_rounds(state, db, vision), settings.WARMUP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        state.error = f"timed out after {settings.WARMUP_TIMEOUT_SECONDS:.0f}s"
+    except Exception as e:
+        state.error = str(e)
+
+    state.mark_ready()
+
+    if state.error:
+        print(f"⚠️ Warm-up incomplete ({state.error}); serving anyway")
+    elif state.round_p50_ms:
+        print(
+            f"✅ Warm-up: first {state.first_ms}ms, p50 by round {state.round_p50_ms} "
+            f"({'steady' if state.steady else 'not steady'})"
+        )
+
+    return state
@@ -0,0 +1,63 @@
+# backend/stub_vision.py
+import asyncio
+import hashlib
+from typing import Dict, List, Optional
+
+import numpy as np
+from PIL import Image
+
+from backend.config import settings
+from backend.vision import VisionModel
+
+
+EMBEDDING_DIM = 384
+
+# embeddings are keyed on a small thumbnail so re-encodes of one photo agree
+THUMBNAIL_SIDE = 16
+
+
+class StubVisionModel(VisionModel):
+    """
+    VisionModel that never calls HuggingFace.
+
+    Embeddings are deterministic unit vectors derived from a thumbnail of
+    the crop, returned after a configurable delay standing in for the
+    remote round trip. Selected with VISION_BACKEND=stub.
+    """
+
+    def __init__(self, latency_ms: Optional[float] = None):
+        super().__init__()
+        self.latency_ms = settings.VISION_STUB_LATENCY_MS if latency_ms is None else latency_ms
+
+    async def load_model(self):
+        self.loaded = True
+        print("✅ Vision model initialized (stub backend)")
+
+    async def extract_traits(self, image: Image.Image) -> Dict:
+        await self._simulate_latency()
+        return self._extract_traits_fallback(image)
+
+    async def get_embedding(self, image: Image.Image) -> List[float]:
+        await self._simulate_latency()
+        return self._stub_embedding(image)
+
+    async def get_embeddings(self, images: List[Image.Image]) -> List[List[float]]:
+        if not images:
+            return []
+
+        # one simulated round trip per image, issued concurrently like the real client
+        await asyncio.gather(*[self._simulate_latency() for _ in images])
+        return [self._stub_embedding(image) for image in images]
+
+    async def _simulate_latency(self) -> None:
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+
+    @staticmethod
+    def _stub_embedding(image: Image.Image) -> List[float]:
+        thumb = image.convert("RGB").resize((THUMBNAIL_SIDE, THUMBNAIL_SIDE))
+        seed = int(hashlib.sha256(thumb.tobytes()).hexdigest()[:16], 16)
+
+        vec = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM)
+        vec /= np.linalg.norm(vec)
+        return vec.tolist()
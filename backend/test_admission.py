@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Tests for the /identify admission controller (services/admission.py):
+fast path, queue-full and timeout shedding, slot handoff, and the
+degraded pose mode under overload. No server needed.
+Usage: python -m backend.test_admission   (or pytest backend/test_admission.py)
+"""
+
+import asyncio
+import sys
+
+from backend.config import settings
+from backend.services.admission import (
+    DECISION_SHED_QUEUE_FULL,
+    DECISION_SHED_TIMEOUT,
+    AdmissionController,
+    Overloaded,
+)
+from backend.services.pose_extractor import pose_mode_override
+
+
+def _controller(**overrides) -> AdmissionController:
+    options = dict(max_concurrent=1, max_queue=8, target_seconds=1.0, interval_seconds=0.4)
+    options.update(overrides)
+    return AdmissionController("test", **options)
+
+
+async def _shed(controller: AdmissionController) -> Overloaded:
+    try:
+        await controller.acquire()
+    except Overloaded as e:
+        return e
+    raise AssertionError("expected the request to be shed")
+
+
+def test_fast_path():
+    """Free slots are taken without queueing and given back on release"""
+
+    async def run():
+        controller = _controller(max_concurrent=2)
+        assert await controller.acquire() is False
+        assert await controller.acquire() is False
+        assert controller._inflight == 2
+
+        controller.release(0.01)
+        controller.release(0.01)
+        assert controller._inflight == 0
+
+    asyncio.run(run())
+
+
+def test_shed_queue_full():
+    """With every slot busy and the queue full, the next request fails at once"""
+
+    async def run():
+        controller = _controller(max_queue=0)
+        await controller.acquire()
+
+        e = await _shed(controller)
+        assert e.decision == DECISION_SHED_QUEUE_FULL
+        assert e.retry_after >= 1
+
+    asyncio.run(run())
+
+
+def test_shed_timeout():
+    """A waiter that gets no slot within the interval is shed and leaves the queue"""
+
+    async def run():
+        controller = _controller(interval_seconds=0.05)
+        await controller.acquire()
+
+        e = await _shed(controller)
+        assert e.decision == DECISION_SHED_TIMEOUT
+        assert not controller._waiters
+        assert controller._inflight == 1
+
+    asyncio.run(run())
+
+
+def test_handoff():
+    """A released slot goes straight to the oldest waiter, in order"""
+
+    async def run():
+        controller = _controller(max_concurrent=1)
+        await controller.acquire()
+
+        order = []
+
+        async def waiter(name):
+            await controller.acquire()
+            order.append(name)
+
+        first = asyncio.ensure_future(waiter("first"))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(waiter("second"))
+        await asyncio.sleep(0.01)
+
+        controller.release(0.01)
+        await first
+        assert order == ["first"]
+        assert controller._inflight == 1
+
+        controller.release(0.01)
+        await second
+        assert order == ["first", "second"]
+
+        controller.release(0.01)
+        assert controller._inflight == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter():
+    """A waiter cancelled while queued does not keep or leak a slot"""
+
+    async def run():
+        controller = _controller()
+        await controller.acquire()
+
+        task = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert not controller._waiters
+
+        controller.release(0.01)
+        assert controller._inflight == 0
+
+    asyncio.run(run())
+
+
+def test_degrade_under_overload():
+    """Work admitted while the queue has stood for an interval runs in the degrade mode"""
+
+    async def run():
+        controller = _controller(interval_seconds=0.4, target_seconds=1.0)
+        await controller.acquire()
+
+        async def first():
+            # times out at the interval but keeps the queue standing until then
+            try:
+                await controller.acquire()
+            except Overloaded:
+                pass
+
+        seen = {}
+
+        async def second():
+            async with controller.admit() as degraded:
+                seen["mode"] = degraded
+                seen["override"] = pose_mode_override.get()
+
+        async def third():
+            async with controller.admit() as degraded:
+                seen["third"] = degraded
+
+        a = asyncio.ensure_future(first())
+        await asyncio.sleep(0.2)
+        b = asyncio.ensure_future(second())
+        await asyncio.sleep(0.3)
+        # the queue has been non-empty for 0.5s > interval: overloaded
+        assert controller.overloaded()
+        c = asyncio.ensure_future(third())
+        await asyncio.sleep(0.05)
+
+        controller.release(0.01)
+        await asyncio.gather(a, b, c)
+
+        assert seen["mode"] == "pyramid"
+        assert seen["override"] == "pyramid"
+        assert seen["third"] == "pyramid"
+        assert pose_mode_override.get() is None
+        assert controller._inflight == 0
+
+    previous = settings.ADMISSION_DEGRADE_POSE_MODE
+    settings.ADMISSION_DEGRADE_POSE_MODE = "pyramid"
+    try:
+        asyncio.run(run())
+    finally:
+        settings.ADMISSION_DEGRADE_POSE_MODE = previous
+
+
+def test_no_degrade_when_idle():
+    """Without overload, admitted work runs normally even with a degrade mode set"""
+
+    async def run():
+        controller = _controller()
+        async with controller.admit() as degraded:
+            assert degraded == ""
+            assert pose_mode_override.get() is None
+
+    previous = settings.ADMISSION_DEGRADE_POSE_MODE
+    settings.ADMISSION_DEGRADE_POSE_MODE = "pyramid"
+    try:
+        asyncio.run(run())
+    finally:
+        settings.ADMISSION_DEGRADE_POSE_MODE = previous
+
+
+def main():
+    tests = [
+        test_fast_path,
+        test_shed_queue_full,
+        test_shed_timeout,
+        test_handoff,
+        test_cancelled_waiter,
+        test_degrade_under_overload,
+        test_no_degrade_when_idle,
+    ]
+
+    print("\n🚦 Testing admission control...")
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for the identification cache queries in database.py, run
+against the in-memory PostgREST stand-in (local_database.py), which
+enforces the unique indexes from database/migrations. No server needed.
+Usage: python -m backend.test_identification_cache   (or pytest backend/test_identification_cache.py)
+"""
+
+import asyncio
+import sys
+
+from backend.local_database import LocalAPIError, LocalSupabaseClient
+
+
+def _client() -> LocalSupabaseClient:
+    return LocalSupabaseClient(latency_ms=0.0, jitter_ms=0.0, error_rate=0.0)
+
+
+def test_rewrite_same_hash():
+    """Caching one hash twice keeps a single row holding the latest result"""
+
+    async def run():
+        db = _client()
+        first, second = [row["id"] for row in db.client.rows("species")[:2]]
+
+        await db.cache_identification("hash-1", first, 0.61, {"petal_count": 5}, "trait")
+        await db.cache_identification("hash-1", second, 0.83, {"petal_count": 6}, "embedding")
+
+        rows = [r for r in db.client.rows("identification_cache") if r["image_hash"] == "hash-1"]
+        assert len(rows) == 1
+
+        cached = await db.get_cached_identification("hash-1")
+        assert cached is not None
+        assert cached["species_id"] == second
+        assert cached["confidence"] == 0.83
+        assert cached["traits_extracted"] == {"petal_count": 6}
+        assert cached["scientific_name"]
+
+    asyncio.run(run())
+
+
+def test_miss():
+    """An unknown hash is a miss"""
+
+    async def run():
+        assert await _client().get_cached_identification("never-written") is None
+
+    asyncio.run(run())
+
+
+def test_upsert_needs_unique_index():
+    """Like PostgREST, upserting on a column without a unique index is an error"""
+
+    db = _client()
+    try:
+        db.client.table("identification_cache").upsert({"image_hash": "h", "method": "x"}, on_conflict="method").execute()
+    except LocalAPIError:
+        return
+    raise AssertionError("expected the upsert to be rejected")
+
+
+def main():
+    tests = [
+        test_rewrite_same_hash,
+        test_miss,
+        test_upsert_needs_unique_index,
+    ]
+
+    print("\n🗄️ Testing the identification cache...")
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Parity test for the served pose mode: re-runs the seeded synthetic
+corpus and diffs it against the committed reference golden file
+(backend/benchmarks/golden/parity_synthetic.json). No server needed.
+Usage: python -m backend.test_parity   (or pytest backend/test_parity.py)
+"""
+
+import contextlib
+import io
+import json
+import sys
+
+from backend.benchmarks.parity import SYNTHETIC_GOLDEN
+from backend.services.parity import check_golden, synthetic_corpus
+
+
+def _check(pose_mode: str):
+    golden = json.loads(SYNTHETIC_GOLDEN.read_text())
+    synthetic = golden["synthetic"]
+    manifest, load = synthetic_corpus(synthetic["count"], synthetic["seed"])
+
+    # extractors print debug output per image
+    with contextlib.redirect_stdout(io.StringIO()):
+        return check_golden(manifest, load, golden, pose_mode)
+
+
+def test_full_matches_reference():
+    """Full pose mode stays within tolerance of the reference golden file"""
+
+    failures = _check("full")
+    assert not failures, {
+        name: [m.as_dict() for m in mismatches]
+        for name, mismatches in failures.items()
+    }
+
+
+def main():
+    tests = [test_full_matches_reference]
+
+    print("\n🔍 Testing extractor parity...")
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Equivalence tests for the optimised pose scorers and grouping in
+pose_extractor.py against their kept `_reference` versions, on seeded
+synthetic scenes with clutter and several blooms. No server needed.
+Usage: python -m backend.test_pose_grouping   (or pytest backend/test_pose_grouping.py)
+"""
+
+import contextlib
+import io
+import random
+import sys
+
+import cv2
+import numpy as np
+
+from backend.services.pose_extractor import (
+    MAX_CLUSTERS,
+    _compute_geometry,
+    _compute_planes,
+    _group_contours,
+    _group_contours_reference,
+    _score_contours_batch,
+    _score_contours_reference,
+    compute_pose_traits,
+)
+from backend.services.synthetic_flowers import random_scene
+
+
+SCENE_COUNT = 12
+SCENE_SEED = 7
+
+
+def _scenes():
+    """Seeded cluttered multi-flower scenes: same seed, same pixels."""
+
+    rng = random.Random(SCENE_SEED)
+
+    return [
+        random_scene(
+            width=rng.choice((480, 640, 800)),
+            height=rng.choice((360, 480, 600)),
+            flowers=rng.choice((2, 3, 4, 6)),
+            clutter=rng.choice((40, 120, 300)),
+            noise=rng.choice((0.0, 3.0)),
+            background=rng.choice(("plain", "gradient", "foliage")),
+            seed=SCENE_SEED * 1000 + i,
+        )
+        for i in range(SCENE_COUNT)
+    ]
+
+
+def _planes(scene):
+    bgr = cv2.cvtColor(np.asarray(scene.image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    hsv, _, gradient_mag, mask = _compute_planes(bgr)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return hsv, gradient_mag, mask, list(contours)
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.array_equal(np.asarray(a), np.asarray(b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def test_group_contours_matches_reference():
+    """_group_contours groups exactly like the pairwise reference"""
+
+    for scene in _scenes():
+        _, _, _, contours = _planes(scene)
+
+        # score order in production; largest first exercises the same merges
+        contours.sort(key=cv2.contourArea, reverse=True)
+        index = {id(c): i for i, c in enumerate(contours)}
+
+        fast = [[index[id(c)] for c in group] for group in _group_contours(contours)]
+        reference = [[index[id(c)] for c in group] for group in _group_contours_reference(contours)]
+
+        # clutter puts fragments near the blooms, so some groups merge
+        assert any(len(group) > 1 for group in fast), scene.spec.seed
+        assert fast == reference, scene.spec.seed
+
+
+def test_score_contours_matches_reference():
+    """_score_contours_batch matches the per-contour scorers"""
+
+    for scene in _scenes():
+        hsv, gradient_mag, mask, contours = _planes(scene)
+        h, w = mask.shape
+
+        candidates, centres = [], []
+        for contour in contours:
+            geometry = _compute_geometry(contour)
+            if geometry is not None:
+                candidates.append(contour)
+                centres.append(geometry["centre"])
+
+        fast = _score_contours_batch(candidates, centres, gradient_mag, hsv, w, h)
+        reference = _score_contours_reference(candidates, centres, gradient_mag, hsv, w, h)
+
+        # equal up to float summation order
+        for name, a, b in zip(("border", "symmetry", "edge"), fast, reference):
+            assert a.shape == b.shape, (scene.spec.seed, name)
+            assert np.allclose(a, b, rtol=1e-6, atol=1e-6), (scene.spec.seed, name, np.abs(a - b).max())
+
+
+def test_full_mode_matches_reference_mode():
+    """compute_pose_traits mode="full" equals mode="reference" at MAX_CLUSTERS"""
+
+    for scene in _scenes():
+        # extractors print debug output per image
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = compute_pose_traits(scene.image, mode="full", max_clusters=MAX_CLUSTERS)
+            reference = compute_pose_traits(scene.image, mode="reference", max_clusters=MAX_CLUSTERS)
+
+        assert full["cluster_count"] > 1, scene.spec.seed
+        assert _same(full, reference), scene.spec.seed
+
+
+def main():
+    tests = [
+        test_group_contours_matches_reference,
+        test_score_contours_matches_reference,
+        test_full_mode_matches_reference_mode,
+    ]
+
+    print("\n🌸 Testing pose scoring and grouping against the references...")
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__doc__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__doc__}: {e!r}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# backend/upload_limit.py
+from typing import Dict
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# multipart boundaries + part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps request bodies on upload routes while they stream in.
+
+    A declared Content-Length over the limit is rejected before a single
+    body byte is read; chunked bodies are counted as they arrive and cut
+    off with a 413 the moment they cross it, so the multipart parser
+    never spools more than the limit.
+    """
+
+    def __init__(self, app: ASGIApp, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.get(scope.get("path", "").rstrip("/"))
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": "Request body too large"},
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # raised inside the body parser, surfaces as a plain 413
+                    raise HTTPException(status_code=413, detail="Request body too large")
+
+            return message
+
+        await self.app(scope, limited_receive, send)
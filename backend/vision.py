@@ -1,10 +1,10 @@
+import asyncio
 import httpx
 import numpy as np
 from PIL import Image
 import io
 import os
 from typing import Dict, List
-import onnxruntime as ort
 import base64
 
 class VisionModel:
@@ -138,6 +138,48 @@ class VisionModel:
             print(f"Error getting embedding: {e}")
             return self._get_dummy_embedding()
     
+    async def get_embeddings(self, images: List[Image.Image]) -> List[List[float]]:
+        """
+        Embeddings for a batch of crops over one pooled connection.
+
+        The HF feature-extraction endpoint takes a single image per
+        request, so the batch is sent as concurrent requests sharing
+        one client instead of one client (and TLS handshake) per image.
+        """
+        if not images:
+            return []
+
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            return list(await asyncio.gather(*[
+                self._get_embedding_with_client(client, image)
+                for image in images
+            ]))
+
+    async def _get_embedding_with_client(self, client: httpx.AsyncClient, image: Image.Image) -> List[float]:
+        try:
+            buffered = io.BytesIO()
+            image.save(buffered, format="JPEG", quality=85)
+
+            response = await client.post(
+                f"{self.hf_api_url}/{self.clip_model}",
+                headers={"Authorization": f"Bearer {self.hf_token}"},
+                files={"file": ("image.jpg", buffered.getvalue(), "image/jpeg")}
+            )
+
+            if response.status_code != 200:
+                print(f"HF embedding API error: {response.status_code}")
+                return self._get_dummy_embedding()
+
+            embedding = response.json()
+
+            if isinstance(embedding, list) and len(embedding) >= 384:
+                return embedding[:384]
+            return self._get_dummy_embedding()
+
+        except Exception as e:
+            print(f"Error getting embedding: {e}")
+            return self._get_dummy_embedding()
+
     def _extract_traits_fallback(self, image: Image.Image) -> Dict:
         """
         Fallback trait extraction when HF quota exceeded